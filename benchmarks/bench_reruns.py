@@ -0,0 +1,241 @@
+"""Per-rerun latency and memory benchmark for the Streamlit app.
+
+Drives the app through start -> playing -> level_complete -> game_complete
+with Streamlit's ``AppTest`` harness for question banks of increasing
+size, and records for every game state:
+
+* p50/p99 wall-clock latency of a single rerun
+* p50/p99 peak Python allocations during a rerun (tracemalloc)
+
+plus the cold first run and the memory held by one session's state.
+Results are written as JSON; pass ``--baseline`` to compare against an
+earlier run and exit non-zero on regressions::
+
+    python benchmarks/bench_reruns.py --sizes 24 1000 100000 --output bench.json
+    python benchmarks/bench_reruns.py --baseline bench.json --tolerance 0.25
+
+Large banks are not played question by question: after
+``--questions-per-level`` answers the session jumps to the last question
+of the level, so every state is still exercised on the full bank.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from celtic.engine import GAME_COMPLETE, LEVEL_COMPLETE, PLAYING, START  # noqa: E402
+from celtic.metrics import session_bytes  # noqa: E402
+
+APP_PATH = ROOT / "celtic-streamlit-app.py"
+CONTENT_DIR = ROOT / "content"
+LEVEL_COUNT = 6
+METRICS = ("latency_ms", "alloc_peak_kib")
+
+
+def write_synthetic_bank(directory, size):
+    """Write a ``size``-question bank spread over ``LEVEL_COUNT`` levels."""
+    directory.mkdir(parents=True, exist_ok=True)
+    languages = ("ga", "ga", "ga", "gd", "cy", "br")
+    with (directory / "questions.jsonl").open("w", encoding="utf-8") as f:
+        for level in range(LEVEL_COUNT):
+            f.write(json.dumps({
+                "kind": "level",
+                "name": f"Level {level + 1}",
+                "flag": "🍀",
+                "description": f"Synthetic level {level + 1}",
+                "language": languages[level],
+            }) + "\n")
+        for i in range(size):
+            options = [f"Answer {i}-{j}" for j in range(4)]
+            f.write(json.dumps({
+                "kind": "question",
+                "id": f"q{i}",
+                "level": i * LEVEL_COUNT // size,
+                "tags": ["synthetic"],
+                "question": f"Synthetic question {i}?",
+                "options": options,
+                "correct_answer": options[i % 4],
+                "explanation": f"Explanation for synthetic question {i}.",
+            }) + "\n")
+    shutil.copy(CONTENT_DIR / "fun_facts.json", directory / "fun_facts.json")
+    return directory
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def button(at, label=None, key=None):
+    for widget in at.button:
+        if (label is not None and widget.label == label) or (key is not None and widget.key == key):
+            return widget
+    raise LookupError(f"no button {label or key!r} on the page")
+
+
+class Recorder:
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.samples = {}
+
+    def run(self, at):
+        """Rerun the app and record the sample against the state it rendered."""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(f"app raised during a rerun: {at.exception}")
+        state = at.session_state["game"].state
+        sample = self.samples.setdefault(state, {metric: [] for metric in METRICS})
+        sample["latency_ms"].append(elapsed * 1000)
+        if self.trace_memory:
+            sample["alloc_peak_kib"].append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+
+
+def play_game(at, recorder, questions_per_level):
+    """Play one full game from the start screen, recording every rerun."""
+    at.session_state["game"].state = START
+    recorder.run(at)
+    button(at, "Start Learning").click()
+    recorder.run(at)
+    while True:
+        game = at.session_state["game"]
+        if game.state == PLAYING:
+            if game.selected is None:
+                button(at, key=f"option_{game.qid}_0").click()
+            elif questions_per_level and questions_per_level <= game.question < game.level_size - 1:
+                # Fast-forward through big levels once we have enough samples
+                game.question = game.level_size - 1
+                game.selected = game.is_correct = None
+            else:
+                button(at, "Next Question").click()
+        elif game.state == LEVEL_COMPLETE:
+            button(at, "Continue to Next Level").click()
+        elif game.state == GAME_COMPLETE:
+            return game
+        else:
+            raise RuntimeError(f"unexpected state {game.state!r}")
+        recorder.run(at)
+
+
+def bench_size(size, content_dir, games, questions_per_level, timeout):
+    os.environ["CELTIC_CONTENT_DIR"] = str(content_dir)
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+    started = time.perf_counter()
+    at.run()
+    cold_ms = (time.perf_counter() - started) * 1000
+
+    timing = Recorder(trace_memory=False)
+    for _ in range(games):
+        game = play_game(at, timing, questions_per_level)
+
+    memory = Recorder(trace_memory=True)
+    tracemalloc.start()
+    try:
+        play_game(at, memory, questions_per_level)
+    finally:
+        tracemalloc.stop()
+
+    states = {}
+    for state, sample in timing.samples.items():
+        latency = sample["latency_ms"]
+        allocs = memory.samples.get(state, {}).get("alloc_peak_kib", [])
+        states[state] = {
+            "reruns": len(latency),
+            "latency_ms_p50": percentile(latency, 50),
+            "latency_ms_p99": percentile(latency, 99),
+            "alloc_peak_kib_p50": percentile(allocs, 50),
+            "alloc_peak_kib_p99": percentile(allocs, 99),
+        }
+    return {
+        "questions": size,
+        "cold_run_ms": cold_ms,
+        "session_state_bytes": session_bytes(game),
+        "states": states,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Return a list of regressions of ``result`` against ``baseline``."""
+    regressions = []
+    for size, current in result["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        for state, stats in current["states"].items():
+            old = previous["states"].get(state, {})
+            for metric, value in stats.items():
+                if metric == "reruns" or value is None or not old.get(metric):
+                    continue
+                if value > old[metric] * (1 + tolerance):
+                    regressions.append(
+                        f"{size} questions, {state}: {metric} {value:.2f} > {old[metric]:.2f} (+{tolerance:.0%})"
+                    )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[24, 1000, 10000, 100000],
+                        help="question bank sizes; 24 uses the shipped content")
+    parser.add_argument("--games", type=int, default=3, help="timed games per bank size")
+    parser.add_argument("--questions-per-level", type=int, default=5,
+                        help="questions answered per level before jumping to its end (0 plays every question)")
+    parser.add_argument("--timeout", type=float, default=60, help="per-rerun timeout in seconds")
+    parser.add_argument("--output", type=Path, default=Path("bench_reruns.json"))
+    parser.add_argument("--baseline", type=Path, help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    result = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("CELTIC_PROGRESS_DB", str(Path(tmp) / "progress.db"))
+        for size in args.sizes:
+            if size == 24:
+                content_dir = CONTENT_DIR
+            else:
+                content_dir = write_synthetic_bank(Path(tmp) / str(size), size)
+            stats = bench_size(size, content_dir, args.games, args.questions_per_level, args.timeout)
+            result["sizes"][str(size)] = stats
+            for state, row in stats["states"].items():
+                print(
+                    f"{size:>7} {state:<15} p50 {row['latency_ms_p50']:7.2f} ms  "
+                    f"p99 {row['latency_ms_p99']:7.2f} ms  alloc p50 {row['alloc_peak_kib_p50'] or 0:8.1f} KiB"
+                )
+
+    args.output.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        regressions = compare(result, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
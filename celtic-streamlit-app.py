@@ -1,505 +1,542 @@
 import streamlit as st
+import hmac
+import logging
+import os
 import random
-from PIL import Image
-import base64
-from io import BytesIO
-
-# Set page configuration
-st.set_page_config(
-    page_title="Celtic Language Explorer",
-    page_icon="🍀",
-    layout="centered",
-    initial_sidebar_state="collapsed",
-    menu_items={
-        'About': "# Celtic Language Explorer\nLearn Celtic languages interactively!"
-    }
-)
-
-# Define CSS
-def local_css():
-    st.markdown("""
-    <style>
-        .main {
-            background-color: #1e3d2f;
-            color: white;
-        }
-        .stButton button {
-            background-color: #49976d;
-            color: white;
-            font-weight: bold;
-            border-radius: 20px;
-            padding: 0.5rem 1rem;
-            border: none;
-        }
-        .stButton button:hover {
-            background-color: #3a7857;
-        }
-        .game-container {
-            background-color: #2c5840;
-            color: white;
-            padding: 2rem;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.3);
-        }
-        .correct-answer {
-            background-color: #2c5840;
-            padding: 1rem;
-            border-radius: 5px;
-            border-left: 5px solid #8bcea0;
-            color: white;
-        }
-        .incorrect-answer {
-            background-color: #344d3f;
-            padding: 1rem;
-            border-radius: 5px;
-            border-left: 5px solid #e57373;
-            color: white;
-        }
-        .explanation {
-            background-color: #1a4731;
-            padding: 1rem;
-            border-radius: 5px;
-            margin-top: 1rem;
-            color: #e0e0e0;
-        }
-        .level-title {
-            color: #8bcea0;
-            font-weight: bold;
-        }
-        .question-counter {
-            font-size: 0.9rem;
-            color: #555;
-            margin-bottom: 1rem;
-        }
-        .header-container {
-            background: linear-gradient(90deg, #1a4731, #0d2419);
-            padding: 1.5rem;
-            border-radius: 10px;
-            color: white;
-            margin-bottom: 1.5rem;
-            text-align: center;
-        }
-        .flag-icon {
-            font-size: 1.5rem;
-            margin-right: 0.5rem;
-        }
-        .option-button {
-            background-color: #3a7857;
-            border: 1px solid #49976d;
-            padding: 10px;
-            border-radius: 5px;
-            margin-bottom: 10px;
-            cursor: pointer;
-            transition: background-color 0.3s;
-            color: white;
-        }
-        .option-button:hover {
-            background-color: #49976d;
-        }
-        .score-display {
-            font-size: 1.2rem;
-            font-weight: bold;
-            color: #8bcea0;
-            margin-top: 1rem;
-        }
-        .fun-fact {
-            background-color: #1a4731;
-            padding: 1rem;
-            border-radius: 5px;
-            border-left: 5px solid #8bcea0;
-            margin-top: 1rem;
-            color: #e0e0e0;
+import time
+import uuid
+from pathlib import Path
+
+from celtic import metrics, render
+from celtic.analytics import NullAnalytics, confusion, open_analytics, summary
+from celtic.audio import AudioPack, PackError
+from celtic.content import ContentStore
+from celtic.distractors import DistractorEngine
+from celtic.engine import ADAPTIVE, CHOICE, DEFAULT_TIME_LIMIT, LINEAR, TYPED, GameSession, score_band
+from celtic.fuzzy import AnswerIndex
+from celtic.lazy import MissingExtra
+from celtic.leaderboard import GAME, Leaderboard, level_board
+from celtic.progress import open_progress_store
+from celtic.sessions import SessionFormatError, dumps, loads, open_session_store
+from celtic.theme import CSS, FOOTER, HEADER, header
+
+logger = logging.getLogger("celtic.app")
+
+# Timing spans around render sections and transitions, off unless CELTIC_SPANS is set
+if os.environ.get("CELTIC_SPANS"):
+    metrics.enable()
+def main():
+    """Build the page; runs once per rerun."""
+    # Set page configuration
+    st.set_page_config(
+        page_title="Celtic Language Explorer",
+        page_icon="🍀",
+        layout="centered",
+        initial_sidebar_state="collapsed",
+        menu_items={
+            'About': "# Celtic Language Explorer\nLearn Celtic languages interactively!"
         }
-    </style>
-    """, unsafe_allow_html=True)
-
-# Apply CSS
-local_css()
-
-# Game data
-LEVELS = [
-    {
-        "name": "Beginner Irish Gaelic",
-        "flag": "🇮🇪",
-        "description": "Learn basic Irish Gaelic greetings and phrases",
-        "questions": [
-            {
-                "question": "How do you say 'Hello' in Irish Gaelic?",
-                "options": ["Dia duit", "Slán", "Go raibh maith agat", "Cad é sin"],
-                "correct_answer": "Dia duit",
-                "explanation": "Dia duit (pronounced 'dee-ah gwit') literally means 'God be with you'."
-            },
-            {
-                "question": "What does 'Slán' mean?",
-                "options": ["Hello", "Thank you", "Goodbye", "Please"],
-                "correct_answer": "Goodbye",
-                "explanation": "Slán (pronounced 'slawn') is used to say goodbye."
-            },
-            {
-                "question": "How do you say 'Thank you' in Irish Gaelic?",
-                "options": ["Slán", "Dia duit", "Go raibh maith agat", "Tá"],
-                "correct_answer": "Go raibh maith agat",
-                "explanation": "Go raibh maith agat (pronounced 'guh rev mah ah-gut') literally means 'may you have goodness'."
-            }
-        ]
-    },
-    {
-        "name": "Intermediate Irish Gaelic",
-        "flag": "🇮🇪",
-        "description": "Test your knowledge of Irish Gaelic vocabulary",
-        "questions": [
-            {
-                "question": "What is the Irish word for 'water'?",
-                "options": ["Bainne", "Uisce", "Arán", "Feoil"],
-                "correct_answer": "Uisce",
-                "explanation": "Uisce (pronounced 'ish-ka') means water. Interestingly, the word 'whiskey' comes from 'uisce beatha' meaning 'water of life'."
-            },
-            {
-                "question": "What does 'sláinte' mean when making a toast?",
-                "options": ["Cheers", "Good luck", "Congratulations", "Good night"],
-                "correct_answer": "Cheers",
-                "explanation": "Sláinte (pronounced 'slawn-cha') literally means 'health' and is used as 'cheers' when drinking."
-            },
-            {
-                "question": "Which of these means 'I love you' in Irish?",
-                "options": ["Tá brón orm", "Tá áthas orm", "Tá grá agam duit", "Cén t-am é"],
-                "correct_answer": "Tá grá agam duit",
-                "explanation": "Tá grá agam duit (pronounced 'taw graw ah-gum ditch') literally means 'I have love for you'."
-            }
-        ]
-    },
-    {
-        "name": "Advanced Irish Gaelic",
-        "flag": "🇮🇪",
-        "description": "Challenge yourself with Irish culture and language connections",
-        "questions": [
-            {
-                "question": "The Irish word 'craic' (pronounced 'crack') refers to:",
-                "options": ["A type of bread", "Fun and entertainment", "An ancient weapon", "A traditional dance"],
-                "correct_answer": "Fun and entertainment",
-                "explanation": "Having 'good craic' means having a good time, with conversation, music, and often drinks."
-            },
-            {
-                "question": "Which of these Irish place names means 'black pool'?",
-                "options": ["Dublin", "Galway", "Cork", "Belfast"],
-                "correct_answer": "Dublin",
-                "explanation": "Dublin (Dubh Linn) comes from 'dubh' meaning black and 'linn' meaning pool, referring to a dark tidal pool where the River Poddle entered the River Liffey."
-            },
-            {
-                "question": "What does the phrase 'Erin go Bragh' mean?",
-                "options": ["Ireland forever", "Irish blessing", "Celtic cross", "Irish warrior"],
-                "correct_answer": "Ireland forever",
-                "explanation": "Erin go Bragh (Éirinn go Brách) means 'Ireland forever' or 'Ireland until the end of time' and became a popular expression of Irish nationalism."
-            }
-        ]
-    },
-    {
-        "name": "Scottish Gaelic",
-        "flag": "🏴󠁧󠁢󠁳󠁣󠁴󠁿",
-        "description": "Explore another Celtic language: Scottish Gaelic",
-        "questions": [
-            {
-                "question": "How do you say 'Hello' in Scottish Gaelic?",
-                "options": ["Dia duit", "Hallo", "Halò", "Dydd da"],
-                "correct_answer": "Halò",
-                "explanation": "Halò is a simple greeting in Scottish Gaelic. You can also use 'Madainn mhath' (Good morning) or 'Feasgar math' (Good afternoon)."
-            },
-            {
-                "question": "What does 'Alba' mean in Scottish Gaelic?",
-                "options": ["White", "Mountain", "Scotland", "River"],
-                "correct_answer": "Scotland",
-                "explanation": "Alba is the Scottish Gaelic name for Scotland."
-            },
-            {
-                "question": "What does 'Slàinte mhath' mean?",
-                "options": ["Good morning", "Good health", "Good luck", "Good night"],
-                "correct_answer": "Good health",
-                "explanation": "Slàinte mhath (pronounced 'slanj-uh vah') means 'good health' and is used as a toast when drinking."
-            }
-        ]
-    },
-    {
-        "name": "Welsh",
-        "flag": "🏴󠁧󠁢󠁷󠁬󠁳󠁿",
-        "description": "Learn basics of the Welsh language",
-        "questions": [
-            {
-                "question": "How do you say 'Good morning' in Welsh?",
-                "options": ["Bore da", "Nos da", "Diolch", "Croeso"],
-                "correct_answer": "Bore da",
-                "explanation": "Bore da (pronounced 'bor-eh dah') is Welsh for 'good morning'."
-            },
-            {
-                "question": "What does 'Cymru' mean?",
-                "options": ["Hello", "Wales", "Dragon", "Mountain"],
-                "correct_answer": "Wales",
-                "explanation": "Cymru is the Welsh name for Wales."
-            },
-            {
-                "question": "What is the meaning of the Welsh word 'hiraeth'?",
-                "options": ["Joy", "Courage", "Homesickness/longing", "Celebration"],
-                "correct_answer": "Homesickness/longing",
-                "explanation": "Hiraeth is a Welsh concept of longing for home, nostalgia, or a sense of belonging that cannot be translated directly into English."
-            }
-        ]
-    },
-    {
-        "name": "Breton",
-        "flag": "🇫🇷",
-        "description": "Discover Breton, the Celtic language of Brittany, France",
-        "questions": [
-            {
-                "question": "How do you say 'Hello' in Breton?",
-                "options": ["Demat", "Kenavo", "Trugarez", "Diolch"],
-                "correct_answer": "Demat",
-                "explanation": "Demat (pronounced 'deh-mat') is the standard greeting in Breton."
-            },
-            {
-                "question": "What is Brittany called in the Breton language?",
-                "options": ["Bretagne", "Breizh", "Kernow", "Bretaña"],
-                "correct_answer": "Breizh",
-                "explanation": "Breizh is the Breton name for Brittany, the Celtic region in the northwest of France."
-            },
-            {
-                "question": "Which famous Breton festival celebrates Celtic culture?",
-                "options": ["Festival Interceltique", "Fête de la Musique", "Gouel Breizh", "Le Printemps de Bourges"],
-                "correct_answer": "Festival Interceltique",
-                "explanation": "The Festival Interceltique de Lorient is one of the largest Celtic festivals in the world, celebrating Breton and other Celtic cultures."
-            }
-        ]
-    }
-]
-
-# Fun facts about Celtic languages
-FUN_FACTS = [
-    "There are six Celtic languages still spoken today: Irish, Scottish Gaelic, Welsh, Breton, Cornish, and Manx.",
-    "The Celtic languages are divided into two groups: Goidelic (Irish, Scottish Gaelic, Manx) and Brythonic (Welsh, Breton, Cornish).",
-    "Welsh has the most speakers of any Celtic language, with approximately 750,000 speakers.",
-    "Cornish became extinct in the late 18th century but has been successfully revived since the early 20th century.",
-    "Manx, the Celtic language of the Isle of Man, was declared extinct in 1974 but has since been revived.",
-    "Irish (Gaeilge) is the first official language of Ireland, with English being the second.",
-    "The oldest Celtic language artifacts date back to the 6th century BCE.",
-    "Celtic languages use initial consonant mutations, where the first consonant of a word changes in certain grammatical contexts.",
-    "The Celtic knot symbolizes the interconnectedness of life and eternity in Celtic culture.",
-    "Celtic languages heavily influenced place names across Europe, especially in river names."
-]
-
-# Initialize session state variables if they don't exist
-if 'game_state' not in st.session_state:
-    st.session_state.game_state = 'start'  # start, playing, level_complete, game_complete
-if 'current_level' not in st.session_state:
-    st.session_state.current_level = 0
-if 'score' not in st.session_state:
-    st.session_state.score = 0
-if 'current_question' not in st.session_state:
-    st.session_state.current_question = 0
-if 'selected_answer' not in st.session_state:
-    st.session_state.selected_answer = None
-if 'is_correct' not in st.session_state:
-    st.session_state.is_correct = None
-if 'show_explanation' not in st.session_state:
-    st.session_state.show_explanation = False
-if 'total_questions' not in st.session_state:
-    st.session_state.total_questions = sum(len(level["questions"]) for level in LEVELS)
-if 'current_fun_fact' not in st.session_state:
-    st.session_state.current_fun_fact = random.choice(FUN_FACTS)
-
-# Helper functions
-def start_game():
-    st.session_state.game_state = 'playing'
-    st.session_state.current_level = 0
-    st.session_state.score = 0
-    st.session_state.current_question = 0
-    st.session_state.selected_answer = None
-    st.session_state.is_correct = None
-    st.session_state.show_explanation = False
-
-def next_question():
-    current_level_questions = LEVELS[st.session_state.current_level]["questions"]
-    
-    # If we've completed all questions in this level
-    if st.session_state.current_question >= len(current_level_questions) - 1:
-        # If there are more levels
-        if st.session_state.current_level < len(LEVELS) - 1:
-            st.session_state.game_state = 'level_complete'
-        else:
-            st.session_state.game_state = 'game_complete'
-            st.session_state.current_fun_fact = random.choice(FUN_FACTS)
-    else:
-        # Move to next question in current level
-        st.session_state.current_question += 1
-        st.session_state.selected_answer = None
-        st.session_state.is_correct = None
-        st.session_state.show_explanation = False
-
-def next_level():
-    st.session_state.current_level += 1
-    st.session_state.current_question = 0
-    st.session_state.selected_answer = None
-    st.session_state.is_correct = None
-    st.session_state.show_explanation = False
-    st.session_state.game_state = 'playing'
-
-def check_answer(selected_option):
-    current_question_data = LEVELS[st.session_state.current_level]["questions"][st.session_state.current_question]
-    is_correct = selected_option == current_question_data["correct_answer"]
-    
-    st.session_state.selected_answer = selected_option
-    st.session_state.is_correct = is_correct
-    st.session_state.show_explanation = True
-    
-    if is_correct:
-        st.session_state.score += 1
-
-def restart_game():
-    start_game()
-
-# Create celtic-style header image
-def get_celtic_header():
-    # This is a simplified version, you can replace with actual image
-    return """
-    <div class="header-container">
-        <h1>Celtic Language Explorer</h1>
-        <p>Learn Irish, Scottish Gaelic, Welsh, and Breton</p>
-        <div style="font-size: 1.5rem;">🍀 🏴󠁧󠁢󠁳󠁣󠁴󠁿 🏴󠁧󠁢󠁷󠁬󠁳󠁿 🇮🇪</div>
-    </div>
-    """
-
-# Game UI based on state
-if st.session_state.game_state == 'start':
-    # Start screen
-    st.markdown(get_celtic_header(), unsafe_allow_html=True)
-    
-    st.markdown('<div class="game-container">', unsafe_allow_html=True)
-    st.markdown("## Welcome to the Celtic Language Explorer!")
-    st.write("Learn and test your knowledge of Celtic languages through this interactive quiz game.")
-    
-    st.markdown("### Game Levels:")
-    for i, level in enumerate(LEVELS):
-        st.markdown(f"**{i+1}. {level['flag']} {level['name']}:** {level['description']}")
-    
-    st.markdown(f"**Total questions:** {st.session_state.total_questions}")
-    
-    st.markdown('<div class="fun-fact">', unsafe_allow_html=True)
-    st.markdown("**Did you know?**")
-    st.write(random.choice(FUN_FACTS))
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    if st.button("Start Learning"):
-        start_game()
-        st.rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
-
-elif st.session_state.game_state == 'playing':
-    # Playing state
-    current_level = LEVELS[st.session_state.current_level]
-    current_question_data = current_level["questions"][st.session_state.current_question]
-    
-    st.markdown(get_celtic_header(), unsafe_allow_html=True)
-    
-    # Game container
-    st.markdown('<div class="game-container">', unsafe_allow_html=True)
-    
-    # Level and question info
-    st.markdown(f'<span class="level-title">{current_level["flag"]} Level: {current_level["name"]}</span>', unsafe_allow_html=True)
-    st.markdown(f'<div class="question-counter">Question {st.session_state.current_question + 1} of {len(current_level["questions"])}</div>', unsafe_allow_html=True)
-    st.markdown(f'<div class="score-display">Score: {st.session_state.score}/{st.session_state.total_questions}</div>', unsafe_allow_html=True)
-    
-    # Question
-    st.markdown(f"### {current_question_data['question']}")
-    
-    # If answer hasn't been selected yet
-    if not st.session_state.selected_answer:
-        for option in current_question_data['options']:
-            if st.button(option, key=option):
-                check_answer(option)
-                st.rerun()
-    
-    # If answer has been selected
-    else:
-        for option in current_question_data['options']:
-            if option == current_question_data['correct_answer']:
-                st.markdown(f'<div class="correct-answer">{option} ✓</div>', unsafe_allow_html=True)
-            elif option == st.session_state.selected_answer and not st.session_state.is_correct:
-                st.markdown(f'<div class="incorrect-answer">{option} ✗</div>', unsafe_allow_html=True)
-            else:
-                st.markdown(f'<div class="option-button">{option}</div>', unsafe_allow_html=True)
+    )
+
+    # Define CSS
+    def local_css():
+        st.markdown(CSS, unsafe_allow_html=True)
+
+    # Apply CSS
+    with metrics.span("css"):
+        local_css()
+
+    # Game content, parsed once per process and shared by all sessions. With a
+    # manifest, each language's pack is only parsed once someone reaches it, and
+    # read from its snapshot if `python -m celtic.validate --snapshot` wrote one.
+    CONTENT_DIR = Path(os.environ.get("CELTIC_CONTENT_DIR") or Path(__file__).parent / "content")
+
+    @st.cache_resource
+    def content_store(content_dir):
+        content_dir = Path(content_dir)
+        questions = content_dir / "manifest.json"
+        if not questions.exists():
+            questions = content_dir / "questions.jsonl"
+        return ContentStore(questions, content_dir / "fun_facts.json")
+
+    CONTENT = content_store(str(CONTENT_DIR)).get()
+    BANK = CONTENT.bank
+    FUN_FACTS = CONTENT.fun_facts
+
+    # Per-session option shuffling with distractors from the level's whole bank,
+    # when the distractors extra (NumPy) is installed. Engines are built once per
+    # bank and dropped with it.
+    def pack_dealer(bank):
+        try:
+            return bank.derived("distractors", DistractorEngine)
+        except MissingExtra:
+            return None
+
+    # Typed answers are matched through a trigram index over every accepted answer
+    def answer_index(bank):
+        return bank.derived("answers", AnswerIndex)
+
+    # Pronunciation clips, one memory-mapped pack shared by every session
+    AUDIO_PACK = Path(os.environ.get("CELTIC_AUDIO_PACK") or Path(__file__).parent / "assets" / "audio.pack")
+
+    @st.cache_resource
+    def audio_pack(path):
+        # A missing or broken pack only turns pronunciation off
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            return AudioPack(path)
+        except (OSError, PackError) as exc:
+            logger.warning("Audio disabled: %s", exc)
+            return None
+
+    AUDIO = audio_pack(str(AUDIO_PACK))
+
+    # Player progress, written in the background to a local SQLite file
+    PROGRESS_DB = os.environ.get("CELTIC_PROGRESS_DB", str(Path(__file__).parent / "data" / "progress.db"))
+
+    @st.cache_resource
+    def progress_store(spec):
+        return open_progress_store(spec)
+
+    PROGRESS = progress_store(PROGRESS_DB)
+
+    # Game sessions shared between worker processes (CELTIC_SESSION_STORE=<sqlite path>),
+    # so any worker can serve any player; by default they stay in this process
+    @st.cache_resource
+    def session_store(spec):
+        return open_session_store(spec)
+
+    SESSIONS = session_store(os.environ.get("CELTIC_SESSION_STORE", "none"))
+
+    # Leaderboards shared by every session, rebuilt from stored results on startup
+    @st.cache_resource
+    def leaderboard(spec):
+        return Leaderboard(progress_store(spec).results())
+
+    LEADERBOARD = leaderboard(PROGRESS_DB)
+
+    # Per-question difficulty and distractor counts, aggregated off the request
+    # path when the analytics extra (NumPy) is installed
+    ANALYTICS_DIR = os.environ.get("CELTIC_ANALYTICS_DIR", str(Path(__file__).parent / "data" / "analytics"))
+
+    @st.cache_resource
+    def analytics(spec, fmt):
+        try:
+            return open_analytics(spec, fmt)
+        except MissingExtra:
+            return NullAnalytics()
+
+    ANALYTICS = analytics(ANALYTICS_DIR, os.environ.get("CELTIC_ANALYTICS_FORMAT", "csv"))
+
+    # Admin pages are reached with ?admin=<CELTIC_ADMIN_TOKEN>, and only when a token is set
+    ADMIN_TOKEN = os.environ.get("CELTIC_ADMIN_TOKEN", "")
+
+    def is_admin():
+        return bool(ADMIN_TOKEN) and hmac.compare_digest(st.query_params.get("admin", ""), ADMIN_TOKEN)
+
+    # Optional sampling profiler over the script threads, every CELTIC_PROFILE_MS milliseconds
+    @st.cache_resource
+    def sampling_profiler(interval_ms):
+        profiler = metrics.SamplingProfiler(interval_ms / 1000, thread_prefix="ScriptRunner")
+        profiler.start()
+        return profiler
+
+    PROFILER = sampling_profiler(float(os.environ["CELTIC_PROFILE_MS"])) if os.environ.get("CELTIC_PROFILE_MS") else None
+
+    def analytics_page():
+        st.markdown("## Question analytics")
+        table = ANALYTICS.snapshot()
+        min_answers = st.number_input("Minimum answers", min_value=1, value=5)
+        rows = summary(table, min_answers)
+        if not rows:
+            st.write("No answers recorded yet.")
+            return
+        st.dataframe(rows)
         
-        # Show explanation
-        st.markdown(f'<div class="explanation">{current_question_data["explanation"]}</div>', unsafe_allow_html=True)
+        # Which options players pick for one question
+        question = st.selectbox("Question", [row["question"] for row in rows])
+        st.dataframe(confusion(table, question))
+
+    def diagnostics_page():
+        st.markdown("## Diagnostics")
+        if not metrics.enabled():
+            st.write("Timing spans are off; set CELTIC_SPANS=1 and restart to collect them.")
+        col1, col2 = st.columns(2)
+        col1.metric("Active sessions", metrics.SESSIONS.active())
+        col2.metric("Session state", f"{metrics.SESSIONS.state_bytes() / 1024:.1f} KiB")
         
-        # Next question button
-        if st.button("Next Question"):
-            next_question()
-            st.rerun()
-    
-    st.markdown('</div>', unsafe_allow_html=True)
-
-elif st.session_state.game_state == 'level_complete':
-    # Level complete state
-    completed_level = LEVELS[st.session_state.current_level]
-    next_level_data = LEVELS[st.session_state.current_level + 1]
-    
-    st.markdown(get_celtic_header(), unsafe_allow_html=True)
-    
-    st.markdown('<div class="game-container">', unsafe_allow_html=True)
-    st.markdown(f"## {completed_level['flag']} Level Complete: {completed_level['name']}")
-    
-    # Calculate questions answered so far
-    questions_so_far = sum(len(LEVELS[i]["questions"]) for i in range(st.session_state.current_level + 1))
-    
-    st.markdown(f'<div class="score-display">Current Score: {st.session_state.score}/{questions_so_far}</div>', unsafe_allow_html=True)
-    
-    st.markdown(f"### Next Level: {next_level_data['flag']} {next_level_data['name']}")
-    st.write(next_level_data['description'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("Continue to Next Level"):
-            next_level()
+        # Latency per section over the last few minutes
+        spans = metrics.snapshot()
+        if spans:
+            st.dataframe([
+                {
+                    "span": name,
+                    "p50_ms": row["p50"] * 1000 if row["p50"] is not None else None,
+                    "p99_ms": row["p99"] * 1000 if row["p99"] is not None else None,
+                    "count": row["count"],
+                    "mean_ms": row["total"] / row["count"] * 1000 if row["count"] else None,
+                }
+                for name, row in spans.items()
+            ])
+            name = st.selectbox("Histogram", list(spans))
+            bounds = [f"≤{bound * 1000:g} ms" for bound in metrics.BUCKETS] + ["more"]
+            st.bar_chart({"bucket": bounds, "count": spans[name]["recent"]}, x="bucket", y="count")
+        
+        if PROFILER is not None:
+            st.markdown(f"### Sampling profiler ({PROFILER.samples} samples)")
+            st.dataframe([{"function": function, "samples": count} for function, count in PROFILER.top_functions()])
+            st.download_button("Collapsed stacks", PROFILER.collapsed(), file_name="celtic-stacks.txt")
+        
+        text = metrics.prometheus_text(profiler=PROFILER)
+        st.download_button("Prometheus metrics", text, file_name="celtic-metrics.prom")
+        with st.expander("Prometheus text"):
+            st.code(text, language="text")
+
+    ADMIN_PAGES = {"analytics": analytics_page, "diagnostics": diagnostics_page}
+
+    if is_admin():
+        ADMIN_PAGES.get(st.query_params.get("view"), analytics_page)()
+        st.caption("Pages: " + ", ".join(f"?view={view}" for view in ADMIN_PAGES))
+        st.stop()
+
+    # Players are identified by a token in the URL, so reconnecting resumes their game
+    if not st.query_params.get("player"):
+        st.query_params["player"] = uuid.uuid4().hex
+    PLAYER = st.query_params["player"][:64]
+
+    # Each session drives its own headless game engine, replaced by a newer copy
+    # when another worker has moved this player's game on
+    shared = SESSIONS.load(PLAYER, st.session_state.get('session_rev', 0))
+    if shared is not None:
+        try:
+            # Sessions carry the current level's answers; earlier ones come from the store
+            st.session_state.game = loads(shared[1], BANK, FUN_FACTS, pack_dealer,
+                                          history=PROGRESS.answer_history(PLAYER))
+        except SessionFormatError as exc:
+            # Skip this revision from now on; the next save replaces it
+            logger.warning("Ignoring saved session %s for %s: %s", shared[0], PLAYER, exc)
+        st.session_state.session_rev = shared[0]
+    if 'game' not in st.session_state:
+        st.session_state.game = GameSession(BANK, FUN_FACTS, history=PROGRESS.answer_history(PLAYER), dealer=pack_dealer)
+        saved = PROGRESS.load_position(PLAYER)
+        if saved is not None:
+            st.session_state.game.resume(saved)
+    game = st.session_state.game
+    # Active sessions are counted for the diagnostics page even with spans off
+    metrics.SESSIONS.touch(st.session_state.setdefault('session_id', uuid.uuid4().hex), game)
+
+    # Helper functions: thin adapters from the UI onto the engine
+    def save_progress():
+        PROGRESS.save_position(PLAYER, game.position())
+        st.session_state.session_rev = SESSIONS.save(PLAYER, dumps(game))
+
+    @metrics.timed("transition.start_game")
+    def start_game(order=None, answer_mode=None, time_limit=None):
+        game.start(BANK, order, pack_dealer, answer_mode, time_limit)
+        save_progress()
+
+    def submit_result(board, score, total):
+        name = st.session_state.get('display_name') or f"Player {PLAYER[:4]}"
+        result = LEADERBOARD.submit(board, PLAYER, name, score, total)
+        PROGRESS.record_result(board, result)
+        return result
+
+    @metrics.timed("transition.next_question")
+    def next_question():
+        state = game.next_question()
+        if state in ('level_complete', 'game_complete'):
+            submit_result(level_board(game.level), game.level_score, game.level_size)
+        if state == 'game_complete':
+            st.session_state.final_result = submit_result(GAME, game.score, game.total_questions)
+        save_progress()
+
+    @metrics.timed("transition.next_level")
+    def next_level():
+        game.next_level()
+        save_progress()
+
+    def record_analytics(qid, now):
+        # ``selected`` indexes the options as shown; analytics count them in bank order
+        bank = game.bank
+        shown = game.options()[game.selected] if game.selected >= 0 else None
+        options = bank.options[qid]
+        choice = options.index(shown) if shown in options else -1
+        ANALYTICS.record(bank.keys[qid], options, bank.correct_index(qid), choice, game.is_correct, game.response_time(now))
+
+    def still_open(qid):
+        # A click can arrive after the countdown already closed the question
+        return game.state == 'playing' and game.qid == qid and game.selected is None
+
+    # Answers are timed on the monotonic clock from when the card was first drawn,
+    # read as soon as the click reaches the server
+    @metrics.timed("transition.check_answer")
+    def check_answer(qid, selected_index):
+        now = time.monotonic()
+        if not still_open(qid):
+            return
+        is_correct = game.check_answer(selected_index, now)
+        PROGRESS.record_answer(PLAYER, game.bank.keys[qid], game.options()[selected_index], is_correct)
+        record_analytics(qid, now)
+        save_progress()
+
+    @metrics.timed("transition.check_typed")
+    def check_typed(qid):
+        now = time.monotonic()
+        text = st.session_state.get(f"typed_{qid}", "").strip()
+        if not text or not still_open(qid):
+            return
+        is_correct = game.check_typed(text, answer_index(game.bank), now)
+        PROGRESS.record_answer(PLAYER, game.bank.keys[qid], text, is_correct)
+        record_analytics(qid, now)
+        save_progress()
+
+    @metrics.timed("transition.time_up")
+    def time_up():
+        now = time.monotonic()
+        qid = game.qid
+        if not game.time_up(now):
+            return False
+        PROGRESS.record_answer(PLAYER, game.bank.keys[qid], "", False)
+        record_analytics(qid, now)
+        next_question()
+        return True
+
+    @metrics.timed("transition.restart_game")
+    def restart_game():
+        game.restart(BANK, dealer=pack_dealer)
+        save_progress()
+
+    # Create celtic-style header image
+    def get_celtic_header():
+        return header(CONTENT.languages) if CONTENT.languages else HEADER
+
+    @metrics.timed("header")
+    def show_header():
+        st.markdown(get_celtic_header(), unsafe_allow_html=True)
+
+    def score_line(label, score, total):
+        points = f" · {game.points} points" if game.time_limit else ""
+        return f'<div class="score-display">{label}: {score}/{total}{points}</div>'
+
+    # UI fragments: a click inside one of these reruns only that fragment,
+    # so the header, CSS and footer around it are not rebuilt or resent
+    @st.fragment(run_every=1)
+    def countdown():
+        # Reruns on its own every second while a timed question is open; only
+        # when time runs out does the question move on and the page redraw
+        if game.state != 'playing' or game.selected is not None:
+            return
+        left = game.time_left(time.monotonic())
+        if left <= 0 and time_up():
             st.rerun()
-    with col2:
-        if st.button("Restart Game", key="restart_level"):
-            restart_game()
+        st.markdown(render.countdown(left, game.time_limit), unsafe_allow_html=True)
+
+    @st.fragment
+    @metrics.timed("fragment.question_card")
+    def question_card():
+        # Finishing a level or the game changes the whole page
+        if game.state != 'playing':
             st.rerun()
-    
-    st.markdown('</div>', unsafe_allow_html=True)
-
-elif st.session_state.game_state == 'game_complete':
-    # Game complete state
-    st.markdown(get_celtic_header(), unsafe_allow_html=True)
-    
-    st.markdown('<div class="game-container">', unsafe_allow_html=True)
-    st.markdown("## 🎉 Congratulations! Game Complete!")
-    
-    st.markdown(f'<div class="score-display">Final Score: {st.session_state.score}/{st.session_state.total_questions}</div>', unsafe_allow_html=True)
-    
-    # Give feedback based on score
-    percentage = (st.session_state.score / st.session_state.total_questions) * 100
-    if percentage == 100:
-        st.markdown("### Perfect score! You're a Celtic language master! 🏆")
-    elif percentage >= 80:
-        st.markdown("### Excellent job! You have a strong grasp of Celtic languages! 🌟")
-    elif percentage >= 60:
-        st.markdown("### Good work! You're well on your way to understanding Celtic languages. 👍")
-    else:
-        st.markdown("### Good effort! Keep practicing to improve your Celtic language skills. 📚")
-    
-    st.markdown('<div class="fun-fact">', unsafe_allow_html=True)
-    st.markdown("**Did you know?**")
-    st.write(st.session_state.current_fun_fact)
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    if st.button("Play Again"):
-        restart_game()
-        st.rerun()
-    
-    st.markdown('</div>', unsafe_allow_html=True)
-
-# Add a footer
-st.markdown("""
-<div style="text-align: center; margin-top: 2rem; padding: 1rem; font-size: 0.8rem; color: #8bcea0;">
-    Celtic Language Explorer © 2025<br>
-    Created with Streamlit
-</div>
-""", unsafe_allow_html=True)
+        qid = game.qid
+        options = game.options()
+        # Response times run from the first time this question is drawn
+        if game.shown_at is None:
+            game.present(time.monotonic())
+            save_progress()
+        
+        # Question info and score
+        st.markdown(f'<div class="question-counter">Question {game.question + 1} of {game.level_size}</div>', unsafe_allow_html=True)
+        st.markdown(score_line("Score", game.score, game.total_questions), unsafe_allow_html=True)
+        
+        # Question
+        st.markdown(f"### {game.bank.question(qid)}")
+        
+        # Pronunciation, when the pack has a clip for this question
+        key = game.bank.keys[qid]
+        if AUDIO is not None and key in AUDIO:
+            clip, mime = AUDIO.clip(key)
+            st.audio(bytes(clip), format=mime)
+        
+        # Timed questions count down in their own fragment
+        if game.selected is None and game.time_limit:
+            countdown()
+        
+        # If answer hasn't been selected yet
+        if game.selected is None and game.answer_mode == TYPED:
+            with st.form(f"typed_form_{qid}", clear_on_submit=False, border=False):
+                st.text_input("Your answer", key=f"typed_{qid}")
+                st.form_submit_button("Check Answer", on_click=check_typed, args=(qid,))
+        elif game.selected is None:
+            for i, option in enumerate(options):
+                st.button(option, key=f"option_{qid}_{i}", on_click=check_answer, args=(qid, i))
+        
+        # If answer has been selected
+        else:
+            if game.typed is not None:
+                rows = render.typed_answer(game.typed, options[game.correct_index()], game.is_correct)
+            else:
+                rows = render.answered_options(options, game.correct_index(), game.selected)
+            for row in rows:
+                st.markdown(row, unsafe_allow_html=True)
+            
+            # Show explanation
+            st.markdown(render.explanation(game.bank.explanation(qid)), unsafe_allow_html=True)
+            
+            # Next question button
+            st.button("Next Question", on_click=next_question)
+
+    def show_another_fact(key, fact):
+        st.session_state[key] = (fact, random.choice(FUN_FACTS))
+
+    @st.fragment
+    @metrics.timed("fragment.fun_fact_panel")
+    def fun_fact_panel(fact, key):
+        # Keep a fact picked with "Another fact" until the page passes a new one
+        base, shown = st.session_state.get(key, (fact, fact))
+        if base != fact:
+            shown = fact
+        
+        st.markdown('<div class="fun-fact">', unsafe_allow_html=True)
+        st.markdown("**Did you know?**")
+        st.write(shown)
+        st.markdown('</div>', unsafe_allow_html=True)
+        st.button("Another fact", key=f"{key}_button", on_click=show_another_fact, args=(key, fact))
+
+    @st.fragment
+    @metrics.timed("fragment.leaderboard_panel")
+    def leaderboard_panel():
+        boards = [GAME] + [level_board(level.index) for level in game.catalog.levels]
+        labels = ["All levels"] + [f"{level.flag} {level.name}" for level in game.catalog.levels]
+        board = st.selectbox("Leaderboard", boards, format_func=lambda b: labels[boards.index(b)])
+        top = LEADERBOARD.top(board, 10)
+        if top:
+            # As data rather than Markdown, so names cannot add links or images
+            st.dataframe(render.leaderboard_rows(top), hide_index=True)
+        else:
+            st.write("No results yet.")
+
+    # Game UI based on state
+    with metrics.span(f"state.{game.state}"):
+        if game.state == 'start':
+            # Start screen
+            show_header()
+            
+            st.markdown('<div class="game-container">', unsafe_allow_html=True)
+            st.markdown("## Welcome to the Celtic Language Explorer!")
+            st.write("Learn and test your knowledge of Celtic languages through this interactive quiz game.")
+            
+            st.markdown("### Game Levels:")
+            for line in render.level_list(BANK.levels):
+                st.markdown(line)
+            
+            st.markdown(f"**Total questions:** {CONTENT.total_questions}")
+            
+            fun_fact_panel(random.choice(FUN_FACTS), 'start_fun_fact')
+            
+            st.session_state.display_name = st.text_input(
+                "Your name for the leaderboard",
+                value=st.session_state.get('display_name', ''),
+                max_chars=30,
+            ).strip()
+            adaptive = st.toggle(
+                "Adaptive review",
+                value=game.order == ADAPTIVE,
+                help="Order each level's questions by spaced repetition, starting with the ones you find hardest.",
+            )
+            typed = st.toggle(
+                "Type your answers",
+                value=game.answer_mode == TYPED,
+                help="Type each answer instead of picking it. Accents and small typos are forgiven.",
+            )
+            timed = st.toggle(
+                "Timed challenge",
+                value=bool(game.time_limit),
+                help=f"{DEFAULT_TIME_LIMIT} seconds per question, with more points for faster right answers.",
+            )
+            if st.button("Start Learning"):
+                start_game(ADAPTIVE if adaptive else LINEAR, TYPED if typed else CHOICE, DEFAULT_TIME_LIMIT if timed else 0)
+                st.rerun()
+            st.markdown('</div>', unsafe_allow_html=True)
+
+        elif game.state == 'playing':
+            # Playing state
+            show_header()
+            
+            # Game container
+            st.markdown('<div class="game-container">', unsafe_allow_html=True)
+            
+            # Level info
+            level = game.catalog.levels[game.level]
+            st.markdown(render.level_title(level.flag, level.name), unsafe_allow_html=True)
+            
+            question_card()
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+
+        elif game.state == 'level_complete':
+            # Level complete state
+            completed_level = game.catalog.levels[game.level]
+            next_level_data = game.catalog.levels[game.level + 1]
+            
+            show_header()
+            
+            st.markdown('<div class="game-container">', unsafe_allow_html=True)
+            st.markdown(f"## {completed_level.flag} Level Complete: {completed_level.name}")
+            
+            # Questions answered so far
+            questions_so_far = game.questions_so_far
+            
+            st.markdown(score_line("Current Score", game.score, questions_so_far), unsafe_allow_html=True)
+            
+            st.markdown(f"### Next Level: {next_level_data.flag} {next_level_data.name}")
+            st.write(next_level_data.description)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Continue to Next Level"):
+                    next_level()
+                    st.rerun()
+            with col2:
+                if st.button("Restart Game", key="restart_level"):
+                    restart_game()
+                    st.rerun()
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+
+        elif game.state == 'game_complete':
+            # Game complete state
+            show_header()
+            
+            st.markdown('<div class="game-container">', unsafe_allow_html=True)
+            st.markdown("## 🎉 Congratulations! Game Complete!")
+            
+            st.markdown(score_line("Final Score", game.score, game.total_questions), unsafe_allow_html=True)
+            
+            # Give feedback based on score
+            st.markdown(f"### {score_band(game.score, game.total_questions)}")
+            
+            # Where this game places among everyone's
+            result = st.session_state.get('final_result')
+            if result is not None:
+                rank, percentile, entries = LEADERBOARD.standing(GAME, result.percentage)
+                st.markdown(f"**Leaderboard:** #{rank} of {entries}, ahead of {percentile:.0f}% of games played")
+            leaderboard_panel()
+            
+            fun_fact_panel(game.fun_fact, 'final_fun_fact')
+            
+            if st.button("Play Again"):
+                restart_game()
+                st.rerun()
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+
+    # Add a footer
+    with metrics.span("footer"):
+        st.markdown(FOOTER, unsafe_allow_html=True)
+
+
+# The "rerun" span also closes when the script ends early through st.rerun() or st.stop()
+with metrics.span("rerun"):
+    main()
@@ -0,0 +1 @@
+"""Core modules for the Celtic Language Explorer app."""
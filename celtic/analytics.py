@@ -0,0 +1,331 @@
+"""Per-question answer analytics.
+
+Every answer is reported with the option picked and how long the player
+took. On the request path that is a single queue put; a background
+aggregator drains the queue in batches into fixed-width NumPy counters,
+one row per question:
+
+* answers and correct answers, for difficulty
+* a response-time histogram (``TIME_EDGES``) and the total time
+* picks per option, in the bank's own option order, for confusion
+  between the answer and its distractors; a distractor dealt from the
+  question's pool, a typed miss or a timed-out question counts as
+  ``other``
+
+The counters are written to ``questions.csv`` (or ``questions.parquet``)
+every ``flush_interval`` seconds and read back on startup, so they
+accumulate across restarts.
+
+Needs the ``analytics`` extra (NumPy, plus pyarrow for Parquet).
+"""
+import atexit
+import csv
+import logging
+import math
+import queue
+import threading
+import time
+from pathlib import Path
+
+from celtic.lazy import optional_import
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the response-time buckets; one more bucket holds the rest
+TIME_EDGES = (1, 2, 3, 5, 8, 13, 21, 34, 60)
+# Option columns per question; later options count as "other"
+MAX_OPTIONS = 8
+OTHER = MAX_OPTIONS
+INITIAL_ROWS = 1024
+
+TIME_COLUMNS = tuple(f"time_le_{edge}s" for edge in TIME_EDGES) + (f"time_gt_{TIME_EDGES[-1]}s",)
+OPTION_COLUMNS = tuple(f"option_{i}" for i in range(MAX_OPTIONS))
+PICK_COLUMNS = tuple(f"picks_{i}" for i in range(MAX_OPTIONS)) + ("picks_other",)
+COLUMNS = ("question", "answer", "answers", "correct", "seconds") + TIME_COLUMNS + OPTION_COLUMNS + PICK_COLUMNS
+
+
+class QuestionStats:
+    """Running counts per question, in arrays that double in size when full."""
+
+    def __init__(self, rows=INITIAL_ROWS):
+        np = optional_import("numpy", "analytics")
+        self.np = np
+        self.keys = []
+        self.labels = []
+        # Index of the right answer among the labels
+        self.answer = []
+        self._rows = {}
+        self.answers = np.zeros(rows, dtype=np.int64)
+        self.correct = np.zeros(rows, dtype=np.int64)
+        self.seconds = np.zeros(rows, dtype=np.float64)
+        self.times = np.zeros((rows, len(TIME_COLUMNS)), dtype=np.int64)
+        self.picks = np.zeros((rows, len(PICK_COLUMNS)), dtype=np.int64)
+        self._edges = np.array(TIME_EDGES, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def row(self, key, options=(), answer=-1):
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self.keys)
+            self.keys.append(key)
+            self.labels.append(tuple(options[:MAX_OPTIONS]))
+            self.answer.append(answer)
+            if row == len(self.answers):
+                self._grow()
+        elif options and (self.labels[row] != options[:MAX_OPTIONS] or self.answer[row] != answer):
+            # The question was edited; label the counts with its latest options
+            self.labels[row] = tuple(options[:MAX_OPTIONS])
+            self.answer[row] = answer
+        return row
+
+    def _grow(self):
+        np = self.np
+        for name in ("answers", "correct", "seconds", "times", "picks"):
+            array = getattr(self, name)
+            grown = np.zeros((len(array) * 2, *array.shape[1:]), dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def add(self, events):
+        """Count a batch of ``(key, options, answer, choice, correct, seconds)`` events."""
+        np = self.np
+        n = len(events)
+        rows = np.fromiter((self.row(key, options, answer) for key, options, answer, *_ in events), dtype=np.int64, count=n)
+        choice = np.fromiter((event[3] for event in events), dtype=np.int64, count=n)
+        correct = np.fromiter((event[4] for event in events), dtype=np.int64, count=n)
+        seconds = np.fromiter((event[5] for event in events), dtype=np.float64, count=n)
+        choice[(choice < 0) | (choice >= MAX_OPTIONS)] = OTHER
+        np.add.at(self.answers, rows, 1)
+        np.add.at(self.correct, rows, correct)
+        np.add.at(self.seconds, rows, seconds)
+        np.add.at(self.times, (rows, np.searchsorted(self._edges, seconds)), 1)
+        np.add.at(self.picks, (rows, choice), 1)
+
+    def columns(self):
+        """The counters as ``COLUMNS`` -> list of values, one entry per question."""
+        n = len(self.keys)
+        table = {
+            "question": list(self.keys),
+            "answer": list(self.answer),
+            "answers": self.answers[:n].tolist(),
+            "correct": self.correct[:n].tolist(),
+            "seconds": self.seconds[:n].tolist(),
+        }
+        for i, name in enumerate(TIME_COLUMNS):
+            table[name] = self.times[:n, i].tolist()
+        for i, name in enumerate(OPTION_COLUMNS):
+            table[name] = [labels[i] if i < len(labels) else "" for labels in self.labels]
+        for i, name in enumerate(PICK_COLUMNS):
+            table[name] = self.picks[:n, i].tolist()
+        return table
+
+    def load(self, table):
+        """Add counts previously written by ``columns()``."""
+        for i, key in enumerate(table["question"]):
+            options = tuple(table[name][i] for name in OPTION_COLUMNS if table[name][i])
+            row = self.row(key, options, int(table["answer"][i]))
+            self.answers[row] += int(table["answers"][i])
+            self.correct[row] += int(table["correct"][i])
+            self.seconds[row] += float(table["seconds"][i])
+            self.times[row] += [int(table[name][i]) for name in TIME_COLUMNS]
+            self.picks[row] += [int(table[name][i]) for name in PICK_COLUMNS]
+
+
+def write_table(path, table):
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if path.suffix == ".parquet":
+        pa = optional_import("pyarrow", "analytics")
+        pq = optional_import("pyarrow.parquet", "analytics")
+        pq.write_table(pa.table(table), tmp_path)
+    else:
+        with tmp_path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(table)
+            writer.writerows(zip(*table.values()))
+    tmp_path.replace(path)
+
+
+def read_table(path):
+    path = Path(path)
+    if path.suffix == ".parquet":
+        pq = optional_import("pyarrow.parquet", "analytics")
+        return pq.read_table(path).to_pydict()
+    with path.open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        table = {name: [] for name in header}
+        for record in reader:
+            for name, value in zip(header, record):
+                table[name].append(value)
+    return table
+
+
+def summary(table, min_answers=1):
+    """Per-question difficulty rows from a ``columns()`` table, hardest first."""
+    rows = []
+    for i, key in enumerate(table["question"]):
+        answers = table["answers"][i]
+        if answers < min_answers:
+            continue
+        correct = table["correct"][i]
+        options = [table[name][i] for name in OPTION_COLUMNS if table[name][i]]
+        picks = [table[name][i] for name in PICK_COLUMNS]
+        # Most picked wrong option, i.e. the strongest distractor
+        wrong = [(picks[j], options[j]) for j in range(len(options)) if picks[j] and j != table["answer"][i]]
+        rows.append({
+            "question": key,
+            "answers": answers,
+            "accuracy": correct / answers,
+            "mean_seconds": table["seconds"][i] / answers,
+            "median_seconds": _median_bucket(table, i, answers),
+            "top_pick": max(wrong)[1] if wrong else "",
+            "other_picks": picks[OTHER],
+        })
+    rows.sort(key=lambda row: (row["accuracy"], -row["answers"]))
+    return rows
+
+
+def confusion(table, question):
+    """Picks per option of one question, with dealt distractors and typed misses as "(other)"."""
+    i = table["question"].index(question)
+    rows = [
+        {"option": table[option][i], "correct": j == table["answer"][i], "picks": table[picks][i]}
+        for j, (option, picks) in enumerate(zip(OPTION_COLUMNS, PICK_COLUMNS))
+        if table[option][i]
+    ]
+    rows.append({"option": "(other)", "correct": False, "picks": table["picks_other"][i]})
+    return rows
+
+
+def _median_bucket(table, i, answers):
+    """Upper edge of the time bucket holding the median answer."""
+    seen = 0
+    for edge, name in zip((*TIME_EDGES, math.inf), TIME_COLUMNS):
+        seen += table[name][i]
+        if seen * 2 >= answers:
+            return edge
+    return math.inf
+
+
+class Analytics:
+    """Interface for analytics recorders."""
+
+    def record(self, question_key, options, answer, choice, correct, seconds):
+        """An answer to a question with the bank's ``options`` and right ``answer`` index.
+
+        ``choice`` indexes ``options``, or is -1 for anything else.
+        """
+        raise NotImplementedError
+
+    def snapshot(self):
+        """Current counts as a ``COLUMNS`` table."""
+        return {name: [] for name in COLUMNS}
+
+    def flush(self, timeout=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class NullAnalytics(Analytics):
+    def record(self, question_key, options, answer, choice, correct, seconds):
+        pass
+
+
+class AnalyticsRecorder(Analytics):
+    def __init__(self, path, batch_size=1000, flush_interval=60.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = QuestionStats()
+        if self.path.exists():
+            self.stats.load(_typed(read_table(self.path)))
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._aggregate_loop, name="analytics-aggregator", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    # Request path: enqueue only
+    def record(self, question_key, options, answer, choice, correct, seconds):
+        self._queue.put((question_key, options, answer, choice, bool(correct), max(0.0, seconds)))
+
+    def snapshot(self):
+        with self._lock:
+            return self.stats.columns()
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is counted and written."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join(timeout=10)
+
+    # Background aggregator
+    def _aggregate_loop(self):
+        written_at = time.monotonic()
+        while True:
+            events = []
+            waiters = []
+            stop = False
+            timeout = max(0.0, written_at + self.flush_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                while True:
+                    if item is None:
+                        stop = True
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                        break
+                    events.append(item)
+                    if len(events) >= self.batch_size:
+                        break
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            if events:
+                with self._lock:
+                    self.stats.add(events)
+            if waiters or stop or time.monotonic() - written_at >= self.flush_interval:
+                self._write()
+                written_at = time.monotonic()
+            for done in waiters:
+                done.set()
+            if stop:
+                return
+
+    def _write(self):
+        try:
+            write_table(self.path, self.snapshot())
+        except (OSError, ImportError) as exc:
+            logger.warning("Could not write analytics to %s: %s", self.path, exc)
+
+
+def _typed(table):
+    """Numbers in a table read back from CSV are strings."""
+    for name in ("answer", "answers", "correct", *TIME_COLUMNS, *PICK_COLUMNS):
+        table[name] = [int(value) for value in table.get(name, ())]
+    table["seconds"] = [float(value) for value in table.get("seconds", ())]
+    for name in OPTION_COLUMNS:
+        table.setdefault(name, [""] * len(table["question"]))
+    return table
+
+
+def open_analytics(spec, fmt="csv"):
+    """Open a recorder writing to directory ``spec``, or ``none`` to disable."""
+    if not spec or str(spec).lower() == "none":
+        return NullAnalytics()
+    return AnalyticsRecorder(Path(spec) / f"questions.{fmt}")
@@ -0,0 +1,210 @@
+"""Pronunciation clips packed into one memory-mapped asset file.
+
+All clips live in a single pack so the server keeps one file mapping
+instead of opening thousands of small files, and every session reads
+the same pages. Layout (little-endian)::
+
+    header   magic b"CLTAUD01", u32 clip count
+    index    per clip: u16 key length, key (UTF-8), u8 MIME length,
+             MIME (ASCII), u64 offset, u64 length, u32 CRC-32
+    data     clip bytes, at the offsets given in the index
+
+Build a pack from a directory of ``<question id>.<ext>`` files and check
+it with::
+
+    python -m celtic.audio build clips/ assets/audio.pack
+    python -m celtic.audio verify assets/audio.pack
+"""
+import argparse
+import mmap
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+MAGIC = b"CLTAUD01"
+HEADER = struct.Struct("<8sI")
+ENTRY_TAIL = struct.Struct("<QQI")
+
+MIME_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".ogg": "audio/ogg",
+    ".oga": "audio/ogg",
+    ".wav": "audio/wav",
+    ".m4a": "audio/mp4",
+    ".webm": "audio/webm",
+    ".flac": "audio/flac",
+}
+
+
+class PackError(ValueError):
+    pass
+
+
+class Clip:
+    __slots__ = ("key", "mime", "offset", "length", "crc")
+
+    def __init__(self, key, mime, offset, length, crc):
+        self.key = key
+        self.mime = mime
+        self.offset = offset
+        self.length = length
+        self.crc = crc
+
+
+class AudioPack:
+    """Read-only view of a pack; ``clip(key)`` slices the mapping without copying."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            # mmap refuses empty files, e.g. from an interrupted copy
+            if not f.seek(0, 2):
+                raise PackError(f"{self.path}: empty file")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        try:
+            self.clips = self._read_index()
+        except PackError:
+            self.close()
+            raise
+
+    def _read_index(self):
+        view = self._view
+        if len(view) < HEADER.size:
+            raise PackError(f"{self.path}: too short to be an audio pack")
+        magic, count = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise PackError(f"{self.path}: not an audio pack")
+        clips = {}
+        pos = HEADER.size
+        try:
+            for _ in range(count):
+                (key_len,) = struct.unpack_from("<H", view, pos)
+                pos += 2
+                key = bytes(view[pos:pos + key_len]).decode("utf-8")
+                pos += key_len
+                mime_len = view[pos]
+                pos += 1
+                mime = bytes(view[pos:pos + mime_len]).decode("ascii")
+                pos += mime_len
+                offset, length, crc = ENTRY_TAIL.unpack_from(view, pos)
+                pos += ENTRY_TAIL.size
+                if offset + length > len(view):
+                    raise PackError(f"{self.path}: clip {key!r} runs past the end of the pack")
+                clips[key] = Clip(key, mime, offset, length, crc)
+        except (struct.error, IndexError, UnicodeDecodeError) as exc:
+            raise PackError(f"{self.path}: corrupt index: {exc}") from None
+        return clips
+
+    def __contains__(self, key):
+        return key in self.clips
+
+    def __len__(self):
+        return len(self.clips)
+
+    def clip(self, key):
+        """``(memoryview, mime type)`` for ``key``."""
+        entry = self.clips[key]
+        return self._view[entry.offset:entry.offset + entry.length], entry.mime
+
+    def verify(self):
+        """Keys whose bytes no longer match their checksum."""
+        return [
+            key for key, entry in self.clips.items()
+            if zlib.crc32(self._view[entry.offset:entry.offset + entry.length]) != entry.crc
+        ]
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+
+
+def build_pack(clips_dir, out_path, keys=None):
+    """Pack every recognised audio file in ``clips_dir``; returns the packed keys.
+
+    When ``keys`` is given, files whose stem is not one of them are skipped.
+    """
+    files = sorted(
+        path for path in Path(clips_dir).iterdir()
+        if path.is_file() and path.suffix.lower() in MIME_TYPES
+        and (keys is None or path.stem in keys)
+    )
+    seen = set()
+    entries = []
+    for path in files:
+        if path.stem in seen:
+            raise PackError(f"{path}: more than one clip for {path.stem!r}")
+        seen.add(path.stem)
+        entries.append((path.stem.encode("utf-8"), MIME_TYPES[path.suffix.lower()].encode("ascii"), path))
+
+    # Offsets are absolute, so size the header and index before writing
+    offset = HEADER.size + sum(2 + len(key) + 1 + len(mime) + ENTRY_TAIL.size for key, mime, _ in entries)
+    index = []
+    for key, mime, path in entries:
+        data = path.read_bytes()
+        index.append((key, mime, offset, len(data), zlib.crc32(data), path))
+        offset += len(data)
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(HEADER.pack(MAGIC, len(index)))
+        for key, mime, offset, length, crc, _ in index:
+            f.write(struct.pack("<H", len(key)) + key + bytes((len(mime),)) + mime)
+            f.write(ENTRY_TAIL.pack(offset, length, crc))
+        for *_, path in index:
+            f.write(path.read_bytes())
+    tmp_path.replace(out_path)
+    return [key.decode("utf-8") for key, *_ in index]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and check pronunciation audio packs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="pack a directory of <question id>.<ext> clips")
+    build.add_argument("clips_dir", type=Path)
+    build.add_argument("pack", type=Path)
+    build.add_argument("--bank", type=Path, help="question bank or pack manifest to check clip names against")
+    verify = commands.add_parser("verify", help="check every clip's checksum")
+    verify.add_argument("pack", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        keys = None
+        if args.bank:
+            from celtic.content import load_questions
+
+            questions = load_questions(args.bank)
+            keys = {key for level in range(len(questions.levels)) for key in questions.bank_for(level).keys}
+        packed = build_pack(args.clips_dir, args.pack, keys)
+        pack = AudioPack(args.pack)
+        bad = pack.verify()
+        pack.close()
+        print(f"Packed {len(packed)} clips into {args.pack}")
+        if keys is not None:
+            unmatched = sorted(
+                path.name for path in args.clips_dir.iterdir()
+                if path.suffix.lower() in MIME_TYPES and path.stem not in keys
+            )
+            if unmatched:
+                print(f"Skipped {len(unmatched)} clips with no matching question: {', '.join(unmatched[:10])}"
+                      + (" ..." if len(unmatched) > 10 else ""))
+            missing = sorted(keys - set(packed))
+            if missing:
+                print(f"{len(missing)} questions have no clip: {', '.join(missing[:10])}"
+                      + (" ..." if len(missing) > 10 else ""))
+    else:
+        pack = AudioPack(args.pack)
+        bad = pack.verify()
+        print(f"{args.pack}: {len(pack)} clips, {len(bad)} failed checksum")
+        pack.close()
+
+    for key in bad:
+        print(f"checksum mismatch: {key}", file=sys.stderr)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Process-wide game content with mtime-based hot reload.
+
+The question bank (or, for a ``manifest.json``, the catalog of lazily
+loaded language packs, see ``celtic.packs``) and fun facts are parsed
+and validated once per process and shared read-only by every session. ``ContentStore.get()``
+re-stats the source files at most once per ``check_interval`` seconds and
+swaps in a freshly compiled ``Content`` when any of them changed.
+"""
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+from celtic.packs import load_catalog
+from celtic.question_bank import BankError, load_bank
+
+logger = logging.getLogger(__name__)
+
+
+class Content:
+    __slots__ = ("bank", "fun_facts", "total_questions", "version", "languages")
+
+    def __init__(self, bank, fun_facts, version):
+        self.bank = bank
+        self.fun_facts = fun_facts
+        self.total_questions = len(bank)
+        self.version = version
+        # (name, flag) per language for the header; only manifests name them
+        self.languages = tuple((pack.name, pack.flag) for pack in getattr(bank, "packs", ()))
+
+
+def load_fun_facts(path):
+    with Path(path).open(encoding="utf-8") as f:
+        facts = json.load(f)
+    if not isinstance(facts, list) or not facts:
+        raise BankError(f"{path}: expected a non-empty list of fun facts")
+    for i, fact in enumerate(facts):
+        if not isinstance(fact, str) or not fact.strip():
+            raise BankError(f"{path}[{i}]: fun fact must be a non-empty string")
+    return tuple(facts)
+
+
+def load_questions(path):
+    """A ``Catalog`` for a pack manifest, otherwise a single compiled bank."""
+    if Path(path).suffix == ".json":
+        return load_catalog(path)
+    return load_bank(path)
+
+
+def load_content(questions_path, fun_facts_path, version=None):
+    bank = load_questions(questions_path)
+    if not len(bank) or not bank.levels:
+        raise BankError(f"{questions_path}: question bank is empty")
+    return Content(bank, load_fun_facts(fun_facts_path), version)
+
+
+class ContentStore:
+    """Holds the current ``Content`` and reloads it when its files change."""
+
+    def __init__(self, questions_path, fun_facts_path, check_interval=1.0):
+        self.paths = (Path(questions_path), Path(fun_facts_path))
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._failed_version = None
+        version = self._mtimes()
+        self._content = load_content(*self.paths, version=version)
+
+    def _mtimes(self):
+        return tuple(path.stat().st_mtime_ns for path in self.paths)
+
+    def get(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._maybe_reload(now)
+        return self._content
+
+    def _maybe_reload(self, now):
+        # Only one thread re-stats and recompiles; the rest keep serving
+        # the current content until the new one is swapped in.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = now
+            try:
+                version = self._mtimes()
+            except OSError as exc:
+                logger.warning("Content check failed, keeping current content: %s", exc)
+                return
+            if version in (self._content.version, self._failed_version):
+                return
+            try:
+                content = load_content(*self.paths, version=version)
+            except (OSError, ValueError) as exc:
+                self._failed_version = version
+                logger.warning("Content reload failed, keeping current content: %s", exc)
+                return
+            self._content = content
+            logger.info("Reloaded game content (%d questions)", content.total_questions)
+        finally:
+            self._lock.release()
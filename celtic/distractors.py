@@ -0,0 +1,192 @@
+"""Shuffled options with distractors drawn from the whole bank.
+
+Every option in the bank is interned into a vocabulary and grouped into
+pools by answer kind, ``(answer language, part of speech)``. A question's
+wrong options are sampled from its pool, so "What does 'Slán' mean?" can
+be offered any English greeting in the bank, not just the three it was
+written with. The pools are stored CSR-style (one flat member array plus
+per-question offsets), and sampling and shuffling are done with batched
+NumPy operations for whole decks, across any number of sessions, at once.
+
+Sessions are handed rows of pre-dealt batches. Every batch is dealt from
+its own child of the engine's ``SeedSequence``, and each ``Deck`` records
+that seed and its row as ``source``, so any session's options can be
+dealt again with ``replay`` (and a seeded engine deals the same batches
+every run).
+
+Needs the ``distractors`` extra (NumPy).
+"""
+import threading
+from bisect import bisect_left
+
+from celtic.lazy import optional_import
+
+# Sessions dealt at once when a level's pre-dealt decks run out, capped so
+# one batch for a very large level stays around DEAL_CELLS option slots
+DEAL_BATCH = 256
+DEAL_CELLS = 1 << 20
+
+
+class Deck:
+    """One session's options for a run of questions."""
+
+    __slots__ = ("_dealer", "_qids", "_options", "_correct", "source")
+
+    def __init__(self, dealer, qids, options, correct, source=None):
+        self._dealer = dealer
+        self._qids = qids
+        self._options = options
+        self._correct = correct
+        # (batch seed entropy, spawn key, sessions in the batch, row), if pre-dealt
+        self.source = source
+
+    def _row(self, qid):
+        row = bisect_left(self._qids, qid)
+        if row == len(self._qids) or self._qids[row] != qid:
+            raise KeyError(qid)
+        return row
+
+    def __contains__(self, qid):
+        try:
+            self._row(qid)
+        except KeyError:
+            return False
+        return True
+
+    def options(self, qid):
+        vocab = self._dealer.vocab
+        return tuple(vocab[i] for i in self._options[self._row(qid)].tolist() if i >= 0)
+
+    def correct_index(self, qid):
+        return int(self._correct[self._row(qid)])
+
+    def dump(self):
+        """``(options, correct)`` as bytes, for ``DistractorEngine.load_deck``."""
+        np = self._dealer.np
+        return self._options.astype(np.int32).tobytes(), self._correct.astype(np.int8).tobytes()
+
+
+class DistractorEngine:
+    def __init__(self, bank, n_options=4, seed=None, batch=DEAL_BATCH):
+        np = optional_import("numpy", "distractors")
+        self.np = np
+        self.bank = bank
+        self.n_options = n_options
+        self.batch = batch
+        # Each pre-dealt batch draws from its own child seed
+        self._seeds = np.random.SeedSequence(seed)
+        # level -> (options, correct, next unused session row, batch seed)
+        self._dealt = {}
+        self._lock = threading.Lock()
+
+        # Intern option strings per pool; the same text in two pools is two entries
+        vocab = []
+        ids = {}
+        pool_members = [[] for _ in bank.pools]
+        correct_id = np.empty(len(bank), dtype=np.int32)
+        for qid, options in enumerate(bank.options):
+            pool = bank.pool_of[qid]
+            members = pool_members[pool]
+            for i, text in enumerate(options):
+                key = (pool, text)
+                vid = ids.get(key)
+                if vid is None:
+                    vid = ids[key] = len(vocab)
+                    vocab.append(text)
+                    members.append(vid)
+                if i == bank.correct[qid]:
+                    correct_id[qid] = vid
+        self.vocab = vocab
+
+        sizes = np.array([len(members) for members in pool_members], dtype=np.int64)
+        starts = np.zeros(len(sizes), dtype=np.int64)
+        np.cumsum(sizes[:-1], out=starts[1:])
+        self.members = np.array([vid for members in pool_members for vid in members], dtype=np.int32)
+
+        # Per question: where its pool lives and where its answer sits in it
+        pool_of = np.frombuffer(bank.pool_of, dtype=np.uint32).astype(np.int64)
+        self.start = starts[pool_of]
+        self.size = sizes[pool_of]
+        position = np.empty(len(self.members), dtype=np.int64)
+        position[self.members] = np.arange(len(self.members)) - np.repeat(starts, sizes)
+        self.correct_id = correct_id
+        self.correct_pos = position[correct_id]
+
+    def deal(self, qids, sessions=1, seed=None):
+        """Sample and shuffle options for ``qids`` in ``sessions`` sessions.
+
+        Returns ``(options, correct)``: vocabulary ids shaped
+        ``(sessions, len(qids), n_options)``, padded with -1 where a pool
+        is too small, and the index of the right answer in each row.
+        """
+        np = self.np
+        rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+        qids = np.asarray(qids, dtype=np.int64)
+        k = self.n_options - 1
+        shape = (sessions, len(qids), k)
+
+        # Candidates are pool positions other than the answer's own
+        choices = (self.size[qids] - 1)[None, :, None]
+        valid = np.broadcast_to(np.arange(k) < choices, shape)
+        picks = np.where(valid, (rng.random(shape) * np.maximum(choices, 1)).astype(np.int64), -1)
+
+        # Redraw collisions until each row's distractors are distinct
+        earlier = np.tril(np.ones((k, k), dtype=bool), -1)
+        while True:
+            dup = ((picks[..., :, None] == picks[..., None, :]) & earlier).any(-1) & valid
+            if not dup.any():
+                break
+            redraw = (rng.random(dup.sum()) * np.broadcast_to(choices, shape)[dup]).astype(np.int64)
+            picks[dup] = redraw
+
+        picks += picks >= self.correct_pos[qids][None, :, None]
+        distractors = np.where(valid, self.members[np.where(valid, self.start[qids][None, :, None] + picks, 0)], -1)
+
+        answer = np.broadcast_to(self.correct_id[qids][None, :, None], (sessions, len(qids), 1))
+        options = np.concatenate([answer, distractors], axis=2)
+
+        # Shuffle each row; padding sorts to the end
+        keys = rng.random(options.shape)
+        keys[options < 0] = np.inf
+        order = np.argsort(keys, axis=2)
+        options = np.take_along_axis(options, order, axis=2)
+        correct = np.argmax(order == 0, axis=2)
+        return options, correct
+
+    def deck(self, qids, seed=None):
+        """A single session's ``Deck`` for ``qids`` (which must be ascending)."""
+        options, correct = self.deal(qids, 1, seed)
+        return Deck(self, list(qids), options[0], correct[0])
+
+    def load_deck(self, qids, options, correct):
+        """Rebuild a ``Deck`` from ``Deck.dump()`` output."""
+        np = self.np
+        options = np.frombuffer(options, dtype=np.int32)
+        correct = np.frombuffer(correct, dtype=np.int8).astype(np.int64)
+        if len(correct) != len(qids) or len(options) != len(qids) * self.n_options:
+            raise ValueError("dealt options do not match the level")
+        if len(options) and options.max() >= len(self.vocab):
+            raise ValueError("dealt options refer to an unknown vocabulary")
+        return Deck(self, qids, options.reshape(len(qids), self.n_options), correct)
+
+    def level_deck(self, level):
+        """Next pre-dealt ``Deck`` for ``level``, dealing ``batch`` more sessions when needed."""
+        qids = self.bank.level_questions(level)
+        with self._lock:
+            dealt = self._dealt.get(level)
+            if dealt is None or dealt[2] >= len(dealt[1]):
+                sessions = max(1, min(self.batch, DEAL_CELLS // max(1, len(qids) * self.n_options)))
+                (seed,) = self._seeds.spawn(1)
+                dealt = (*self.deal(qids, sessions, seed), 0, seed)
+            options, correct, row, seed = dealt
+            self._dealt[level] = (options, correct, row + 1, seed)
+        source = (seed.entropy, seed.spawn_key, len(correct), row)
+        return Deck(self, qids, options[row], correct[row], source)
+
+    def replay(self, level, source):
+        """The ``Deck`` that ``level_deck`` handed out with this ``source``, dealt again."""
+        entropy, spawn_key, sessions, row = source
+        seed = self.np.random.SeedSequence(entropy, spawn_key=spawn_key)
+        qids = self.bank.level_questions(level)
+        options, correct = self.deal(qids, sessions, seed)
+        return Deck(self, qids, options[row], correct[row], source)
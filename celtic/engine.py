@@ -0,0 +1,393 @@
+"""Headless game engine.
+
+``GameSession`` is the quiz state machine the Streamlit UI drives, with
+no dependency on Streamlit itself, so whole games can be simulated
+in-process::
+
+    start --start()--> playing --next_question()--> level_complete
+                          ^                              |
+                          +-------- next_level() --------+
+    playing --next_question() on the last level--> game_complete
+    any state --restart()--> playing
+
+Questions within a level are asked in bank order (``LINEAR``), or in
+``ADAPTIVE`` order, where a spaced-repetition scheduler seeded with the
+player's answer history picks each next question. With a ``dealer`` (a
+``celtic.distractors.DistractorEngine``) each level's options are drawn
+and shuffled per session instead of using the bank's fixed order; the
+dealt ``deck`` records its ``source``, from which it can be dealt again.
+
+In timed mode (``time_limit`` seconds per question) each right answer
+also earns ``points`` that fall with the response time, measured from
+when the question was first shown (``present``); a question still open
+when its time runs out is marked missed by ``time_up``.
+
+The session is given either a single ``QuestionBank`` or a
+``celtic.packs.Catalog``; ``bank`` is always the compiled bank holding
+the current level, fetched from the catalog when a level is entered.
+"""
+import random
+import time
+
+from celtic.scheduler import GRADE_CORRECT, GRADE_INCORRECT, ReviewScheduler
+
+START = "start"
+PLAYING = "playing"
+LEVEL_COMPLETE = "level_complete"
+GAME_COMPLETE = "game_complete"
+
+# Question orderings
+LINEAR = "linear"
+ADAPTIVE = "adaptive"
+
+# Answer modes: pick one of the options, or type the answer
+CHOICE = "choice"
+TYPED = "typed"
+# ``selected`` for a typed answer that matched none of the options
+TYPED_MISS = -1
+# ``selected`` for a timed question left unanswered
+TIMED_OUT = -2
+
+# Timed mode: seconds per question, and points for an instant right answer
+DEFAULT_TIME_LIMIT = 20
+MAX_POINTS = 100
+
+# (minimum percentage, feedback) pairs for the final score, best first
+SCORE_BANDS = (
+    (100, "Perfect score! You're a Celtic language master! 🏆"),
+    (80, "Excellent job! You have a strong grasp of Celtic languages! 🌟"),
+    (60, "Good work! You're well on your way to understanding Celtic languages. 👍"),
+    (0, "Good effort! Keep practicing to improve your Celtic language skills. 📚"),
+)
+
+
+class InvalidTransition(RuntimeError):
+    pass
+
+
+def score_band(score, total):
+    percentage = (score / total) * 100 if total else 0
+    for minimum, message in SCORE_BANDS:
+        if percentage >= minimum:
+            return message
+    return SCORE_BANDS[-1][1]
+
+
+def speed_points(correct, seconds, limit):
+    """Points for a timed answer: full marks at once, half at the buzzer, none if wrong or late."""
+    if not correct or seconds > limit:
+        return 0
+    return round(MAX_POINTS * (1 - 0.5 * max(0.0, seconds) / limit))
+
+
+class Position:
+    """Where a player is in a game, as saved for resuming.
+
+    ``level_base`` is the score on entering the level. Positions saved
+    before a field was stored have None for it (``points``: 0), and
+    resume keeps the session's own setting.
+    """
+
+    __slots__ = (
+        "state", "level", "question", "score", "selected", "level_base",
+        "order", "answer_mode", "time_limit", "points",
+    )
+
+    def __init__(self, state, level, question, score, selected=None, level_base=None,
+                 order=None, answer_mode=None, time_limit=None, points=0):
+        self.state = state
+        self.level = level
+        self.question = question
+        self.score = score
+        self.selected = selected
+        self.level_base = level_base
+        self.order = order
+        self.answer_mode = answer_mode
+        # Seconds per question, 0 when untimed
+        self.time_limit = time_limit
+        self.points = points
+
+
+class GameSession:
+    __slots__ = (
+        "catalog",
+        "bank",
+        "fun_facts",
+        "rng",
+        "state",
+        "level",
+        "question",
+        "score",
+        "selected",
+        "is_correct",
+        "fun_fact",
+        "order",
+        "history",
+        "clock",
+        "scheduler",
+        "current",
+        "level_base",
+        "dealer",
+        "deck",
+        "answer_mode",
+        "typed",
+        "shown_at",
+        "time_limit",
+        "points",
+        "__weakref__",
+    )
+
+    def __init__(self, bank, fun_facts=(), rng=None, order=LINEAR, history=(), clock=time.time, dealer=None):
+        self.catalog = bank
+        # Loaded when a level is entered
+        self.bank = None
+        self.fun_facts = fun_facts
+        self.rng = rng or random.Random()
+        self.order = order
+        # (question key, correct, answered_at) for every answer seen so far
+        self.history = list(history)
+        self.clock = clock
+        self.scheduler = None
+        self.current = None
+        self.level_base = 0
+        self.dealer = dealer
+        self.deck = None
+        self.answer_mode = CHOICE
+        self.typed = None
+        self.shown_at = None
+        # Seconds per question, or None when untimed
+        self.time_limit = None
+        self.points = 0
+        self.state = START
+        self.level = 0
+        self.question = 0
+        self.score = 0
+        self.selected = None
+        self.is_correct = None
+        self.fun_fact = self.rng.choice(fun_facts) if fun_facts else None
+
+    # Derived values
+    @property
+    def qid(self):
+        if self.scheduler is not None:
+            return self.current
+        return self.bank.level_questions(self.level)[self.question]
+
+    def options(self, qid=None):
+        """Options for ``qid`` (default: the current question) as shown to this player."""
+        qid = self.qid if qid is None else qid
+        if self.deck is not None and qid in self.deck:
+            return self.deck.options(qid)
+        return self.bank.options[qid]
+
+    def correct_index(self, qid=None):
+        qid = self.qid if qid is None else qid
+        if self.deck is not None and qid in self.deck:
+            return self.deck.correct_index(qid)
+        return self.bank.correct_index(qid)
+
+    @property
+    def show_explanation(self):
+        return self.selected is not None
+
+    @property
+    def level_size(self):
+        return self.catalog.level_size(self.level)
+
+    @property
+    def total_questions(self):
+        return len(self.catalog)
+
+    @property
+    def level_score(self):
+        return self.score - self.level_base
+
+    @property
+    def questions_so_far(self):
+        return self.catalog.questions_through(self.level)
+
+    # Transitions
+    def _expect(self, *states):
+        if self.state not in states:
+            raise InvalidTransition(f"not allowed in state {self.state!r}")
+
+    def _reset_answer(self):
+        self.selected = None
+        self.is_correct = None
+        self.typed = None
+        self.shown_at = None
+
+    def present(self, now):
+        """Note when the current question was first shown; later reruns keep that time."""
+        if self.shown_at is None:
+            self.shown_at = now
+        return self.shown_at
+
+    def response_time(self, now):
+        """Seconds from first showing the current question to ``now`` (0 if never shown)."""
+        return now - self.shown_at if self.shown_at is not None else 0.0
+
+    def time_left(self, now):
+        """Seconds until the current timed question runs out (None when untimed)."""
+        if self.time_limit is None:
+            return None
+        return max(0.0, self.time_limit - self.response_time(now))
+
+    def _enter_level(self, deck=None):
+        """Set up the current level; ``deck`` keeps already dealt options (see ``celtic.sessions``)."""
+        self.question = 0
+        self.level_base = self.score
+        self._reset_answer()
+        self.bank = self.catalog.bank_for(self.level)
+        if deck is not None:
+            self.deck = deck
+        else:
+            self.deck = self._deal()
+        if self.order != ADAPTIVE:
+            self.scheduler = None
+            return
+        bank = self.bank
+        self.scheduler = ReviewScheduler(bank.level_questions(self.level))
+        self.scheduler.seed(
+            (bank.qid(key), correct, answered_at)
+            for key, correct, answered_at in self.history
+            if key in bank
+        )
+        self.current = self.scheduler.next_due()
+
+    def level_dealer(self):
+        """The DistractorEngine for the current bank, if options are being dealt."""
+        # ``dealer`` is a DistractorEngine for one bank, or a callable
+        # returning the engine for whichever bank the level is in
+        dealer = self.dealer(self.bank) if callable(self.dealer) else self.dealer
+        return dealer if dealer is not None and dealer.bank is self.bank else None
+
+    def _deal(self):
+        dealer = self.level_dealer()
+        return dealer.level_deck(self.level) if dealer is not None else None
+
+    def start(self, bank=None, order=None, dealer=None, answer_mode=None, time_limit=None):
+        # A new game picks up the latest content if the caller passes it;
+        # ``time_limit`` of 0 turns timed mode off
+        if bank is not None:
+            self.catalog = bank
+        if dealer is not None:
+            self.dealer = dealer
+        if order is not None:
+            self.order = order
+        if answer_mode is not None:
+            self.answer_mode = answer_mode
+        if time_limit is not None:
+            self.time_limit = time_limit or None
+        self.state = PLAYING
+        self.level = 0
+        self.score = 0
+        self.points = 0
+        self._enter_level()
+
+    def restart(self, bank=None, order=None, dealer=None, answer_mode=None, time_limit=None):
+        self.start(bank, order, dealer, answer_mode, time_limit)
+
+    def check_answer(self, option_index, now=None):
+        """Score the option picked; ``now`` is on the clock given to ``present``."""
+        self._expect(PLAYING)
+        if self.selected is not None:
+            raise InvalidTransition("question already answered")
+        qid = self.qid
+        return self._record(qid, option_index, option_index == self.correct_index(qid), now)
+
+    def check_typed(self, text, index, now=None):
+        """Score a typed answer using ``index`` (a ``celtic.fuzzy.AnswerIndex``).
+
+        An accepted answer counts as choosing the correct option, so the
+        usual scoring and explanation display apply.
+        """
+        self._expect(PLAYING)
+        if self.selected is not None:
+            raise InvalidTransition("question already answered")
+        qid = self.qid
+        match = index.match(text, qid)
+        self.typed = text
+        selected = self.correct_index(qid) if match.accepted else TYPED_MISS
+        return self._record(qid, selected, match.accepted, now)
+
+    def time_up(self, now):
+        """Mark the current question missed if its time has run out; returns whether it had."""
+        self._expect(PLAYING)
+        if self.selected is not None or self.time_limit is None or self.time_left(now) > 0:
+            return False
+        self._record(self.qid, TIMED_OUT, False, now)
+        return True
+
+    def _record(self, qid, selected, is_correct, now=None):
+        self.selected = selected
+        self.is_correct = is_correct
+        if is_correct:
+            self.score += 1
+        if self.time_limit is not None and now is not None:
+            self.points += speed_points(is_correct, self.response_time(now), self.time_limit)
+        answered_at = self.clock()
+        self.history.append((self.bank.keys[qid], is_correct, answered_at))
+        if self.scheduler is not None:
+            self.scheduler.review(qid, GRADE_CORRECT if is_correct else GRADE_INCORRECT, answered_at)
+        return is_correct
+
+    def next_question(self):
+        self._expect(PLAYING)
+        # If we've completed all questions in this level
+        if self.question >= self.level_size - 1:
+            if self.level < len(self.catalog.levels) - 1:
+                self.state = LEVEL_COMPLETE
+            else:
+                self.state = GAME_COMPLETE
+                if self.fun_facts:
+                    self.fun_fact = self.rng.choice(self.fun_facts)
+        else:
+            self.question += 1
+            self._reset_answer()
+            if self.scheduler is not None:
+                self.current = self.scheduler.next_due(exclude=self.current)
+        return self.state
+
+    def position(self):
+        return Position(
+            self.state, self.level, self.question, self.score, self.selected, self.level_base,
+            self.order, self.answer_mode, self.time_limit or 0, self.points,
+        )
+
+    def resume(self, position):
+        """Continue from a saved position; returns False if it no longer fits the bank."""
+        if position.state not in (PLAYING, LEVEL_COMPLETE):
+            return False
+        if not 0 <= position.level < len(self.catalog.levels):
+            return False
+        if not 0 <= position.question < self.catalog.level_size(position.level):
+            return False
+        if position.state == LEVEL_COMPLETE and position.level + 1 >= len(self.catalog.levels):
+            return False
+        if position.order is not None:
+            self.order = position.order
+        if position.answer_mode is not None:
+            self.answer_mode = position.answer_mode
+        if position.time_limit is not None:
+            self.time_limit = position.time_limit or None
+        self.state = position.state
+        self.level = position.level
+        # Entering the level takes the score as its base, as in ``celtic.sessions``
+        self.score = position.score if position.level_base is None else position.level_base
+        self._enter_level()
+        self.score = position.score
+        self.points = position.points or 0
+        self.question = position.question
+        # Adaptive rounds and dealt options are re-drawn, so a saved answer
+        # only still applies to a fixed question and option order
+        if position.selected is not None and position.state == PLAYING and self.scheduler is None and self.deck is None:
+            self.selected = position.selected
+            self.is_correct = self.bank.is_correct(self.qid, position.selected)
+        return True
+
+    def next_level(self):
+        self._expect(LEVEL_COMPLETE)
+        self.level += 1
+        self._enter_level()
+        self.state = PLAYING
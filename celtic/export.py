@@ -0,0 +1,184 @@
+"""Export levels as a self-contained offline quiz page.
+
+    python -m celtic.export quiz.html --levels ga cy 6
+
+writes one HTML file with the app's styles, the questions and a small
+script that runs the same flow in the browser: answer, explanation, next
+question, level complete and the final score band. Nothing is fetched
+once the page is open, so it can be copied to machines with no
+connection. ``--levels`` takes level numbers as shown on the start
+screen and/or language codes; the default is every level.
+
+Every distinct string (questions, options, explanations, level names) is
+stored once in a table that the questions refer to by index.
+"""
+import argparse
+import json
+import re
+import sys
+from html import escape
+from pathlib import Path
+
+from celtic.content import load_fun_facts, load_questions
+from celtic.engine import SCORE_BANDS
+from celtic.question_bank import BankError
+from celtic.theme import CSS, FOOTER, HEADER, header
+
+CONTENT_DIR = Path(__file__).resolve().parent.parent / "content"
+
+
+def minify_css(css):
+    """Strip the ``<style>`` wrapper, comments and optional whitespace."""
+    css = re.sub(r"</?style>", "", css)
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+class _Strings:
+    __slots__ = ("table", "_ids")
+
+    def __init__(self):
+        self.table = []
+        self._ids = {}
+
+    def __call__(self, text):
+        sid = self._ids.get(text)
+        if sid is None:
+            sid = self._ids[text] = len(self.table)
+            self.table.append(text)
+        return sid
+
+
+def select_levels(catalog, wanted):
+    """Level indexes for level numbers (1-based) and language codes, in play order."""
+    if not wanted:
+        return list(range(len(catalog.levels)))
+    chosen = set()
+    for item in wanted:
+        if item.isdigit() and 1 <= int(item) <= len(catalog.levels):
+            chosen.add(int(item) - 1)
+        elif item in catalog.languages:
+            chosen.update(level.index for level in catalog.levels if level.language == item)
+        else:
+            raise BankError(f"no level or language {item!r}")
+    return sorted(chosen)
+
+
+def payload(catalog, levels, fun_facts):
+    strings = _Strings()
+    exported = []
+    for index in levels:
+        level = catalog.levels[index]
+        bank = catalog.bank_for(index)
+        questions = [
+            [
+                strings(bank.question(qid)),
+                [strings(option) for option in bank.options[qid]],
+                bank.correct_index(qid),
+                strings(bank.explanation(qid)),
+            ]
+            for qid in bank.level_questions(index)
+        ]
+        exported.append([strings(level.name), strings(level.flag), strings(level.description), questions])
+    return {
+        "s": strings.table,
+        "l": exported,
+        "b": [list(band) for band in SCORE_BANDS],
+        "f": [strings(fact) for fact in fun_facts],
+    }
+
+
+# Mirrors the Streamlit screens; all text is set with textContent
+SCRIPT = """
+const D=JSON.parse(document.getElementById("quiz-data").textContent),S=D.s,L=D.l,app=document.getElementById("app");
+const total=L.reduce((n,l)=>n+l[3].length,0);
+let level=0,question=0,score=0,picked=null;
+function el(tag,cls,text,parent){const e=document.createElement(tag);if(cls)e.className=cls;if(text!=null)e.textContent=text;(parent||app).appendChild(e);return e}
+function button(label,onclick,parent){const w=el("div","stButton",null,parent);el("button",null,label,w).onclick=onclick}
+function fact(box){if(!D.f.length)return;const f=el("div","fun-fact",null,box);el("strong",null,"Did you know?",f);el("p",null,S[D.f[Math.floor(Math.random()*D.f.length)]],f)}
+function soFar(){let n=0;for(let i=0;i<=level;i++)n+=L[i][3].length;return n}
+function band(){const pct=total?score/total*100:0;for(const [min,msg] of D.b)if(pct>=min)return msg;return D.b[D.b.length-1][1]}
+function restart(){level=question=score=0;picked=null;render("playing")}
+function render(state){
+  app.textContent="";const box=el("div","game-container");
+  if(state==="start"){
+    el("h2",null,"Welcome to the Celtic Language Explorer!",box);el("h3",null,"Game Levels:",box);
+    L.forEach((l,i)=>el("p",null,`${i+1}. ${S[l[1]]} ${S[l[0]]}: ${S[l[2]]}`,box));
+    el("p",null,`Total questions: ${total}`,box);button("Start Learning",restart,box);
+  }else if(state==="playing"){
+    const l=L[level],q=l[3][question];
+    el("span","level-title",`${S[l[1]]} Level: ${S[l[0]]}`,box);
+    el("div","question-counter",`Question ${question+1} of ${l[3].length}`,box);
+    el("div","score-display",`Score: ${score}/${total}`,box);el("h3",null,S[q[0]],box);
+    if(picked===null){q[1].forEach((o,i)=>button(S[o],()=>{picked=i;if(i===q[2])score++;render("playing")},box))}
+    else{
+      q[1].forEach((o,i)=>el("div",i===q[2]?"correct-answer":i===picked?"incorrect-answer":"option-button",S[o]+(i===q[2]?" ✓":i===picked?" ✗":""),box));
+      el("div","explanation",S[q[3]],box);
+      button("Next Question",()=>{picked=null;if(question<l[3].length-1){question++;render("playing")}else render(level<L.length-1?"level_complete":"game_complete")},box);
+    }
+  }else if(state==="level_complete"){
+    const done=L[level],next=L[level+1];
+    el("h2",null,`${S[done[1]]} Level Complete: ${S[done[0]]}`,box);
+    el("div","score-display",`Current Score: ${score}/${soFar()}`,box);
+    el("h3",null,`Next Level: ${S[next[1]]} ${S[next[0]]}`,box);el("p",null,S[next[2]],box);
+    button("Continue to Next Level",()=>{level++;question=0;render("playing")},box);button("Restart Game",restart,box);
+  }else{
+    el("h2",null,"🎉 Congratulations! Game Complete!",box);
+    el("div","score-display",`Final Score: ${score}/${total}`,box);el("h3",null,band(),box);
+    fact(box);button("Play Again",restart,box);
+  }
+}
+render("start");
+"""
+
+
+def build_page(catalog, levels, fun_facts, languages=()):
+    data = json.dumps(payload(catalog, levels, fun_facts), ensure_ascii=False, separators=(",", ":"))
+    # Keep the payload from closing its own <script> element
+    data = data.replace("</", "<\\/")
+    title = "Celtic Language Explorer"
+    return "".join((
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\">",
+        "<meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">",
+        f"<title>{escape(title)}</title>",
+        "<style>body{margin:0 auto;max-width:730px;padding:1rem;font-family:sans-serif}",
+        minify_css(CSS),
+        "</style></head><body class=\"main\">",
+        (header(languages) if languages else HEADER).strip(),
+        "<div id=\"app\"></div>",
+        FOOTER.strip(),
+        f"<script type=\"application/json\" id=\"quiz-data\">{data}</script>",
+        f"<script>{SCRIPT.strip()}</script>",
+        "</body></html>\n",
+    ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export levels as an offline quiz page.")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--levels", nargs="*", default=(), help="level numbers and/or language codes")
+    parser.add_argument("--questions", type=Path, default=CONTENT_DIR / "manifest.json",
+                        help="pack manifest or single-file question bank")
+    parser.add_argument("--fun-facts", type=Path, default=CONTENT_DIR / "fun_facts.json")
+    args = parser.parse_args(argv)
+
+    try:
+        catalog = load_questions(args.questions)
+        levels = select_levels(catalog, args.levels)
+        fun_facts = load_fun_facts(args.fun_facts)
+    except (OSError, BankError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    codes = {catalog.levels[index].language for index in levels}
+    languages = tuple((pack.name, pack.flag) for pack in getattr(catalog, "packs", ()) if pack.code in codes)
+    page = build_page(catalog, levels, fun_facts, languages)
+    args.output.write_text(page, encoding="utf-8")
+    questions = sum(catalog.level_size(index) for index in levels)
+    print(f"Wrote {len(levels)} levels, {questions} questions to {args.output} ({len(page.encode('utf-8')) / 1024:.1f} KiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
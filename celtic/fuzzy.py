@@ -0,0 +1,135 @@
+"""Typed-answer matching.
+
+Answers are folded (accents stripped, case and punctuation ignored), so
+"slainte" matches "Sláinte" exactly. Remaining typos are tolerated up to
+an edit distance that grows with the answer's length. Candidates come
+from a trigram index over every accepted answer in the bank: by the
+q-gram lemma, a string within ``k`` edits of the query shares at least
+``len(trigrams) - 3k`` of its trigrams, so only answers that clear that
+bar are checked with the (banded) edit distance.
+"""
+import unicodedata
+from collections import Counter
+
+# Longest folded answer length allowed each number of typos
+TOLERANCE = ((4, 0), (8, 1), (16, 2))
+MAX_TOLERANCE = 3
+
+
+def fold(text):
+    """Lowercase, strip diacritics and collapse everything but letters and digits."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    words = "".join(ch if ch.isalnum() else " " for ch in stripped.casefold())
+    return " ".join(words.split())
+
+
+def tolerance(length):
+    for longest, typos in TOLERANCE:
+        if length <= longest:
+            return typos
+    return MAX_TOLERANCE
+
+
+def trigrams(folded):
+    padded = f"  {folded} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, or ``limit + 1`` once it is known to exceed ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) > len(b):
+        a, b = b, a
+    previous = list(range(len(a) + 1))
+    for j, cb in enumerate(b, 1):
+        current = [j] + [0] * len(a)
+        # Only cells within ``limit`` of the diagonal can stay under the limit
+        low = max(1, j - limit)
+        high = min(len(a), j + limit)
+        if low > 1:
+            current[low - 1] = limit + 1
+        for i in range(low, high + 1):
+            cost = 0 if a[i - 1] == cb else 1
+            current[i] = min(previous[i] + 1, current[i - 1] + 1, previous[i - 1] + cost)
+        if high < len(a):
+            current[high + 1:] = [limit + 1] * (len(a) - high)
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    # The last cell can still exceed the limit when others in the row do not
+    return min(previous[-1], limit + 1)
+
+
+class Match:
+    __slots__ = ("accepted", "answer", "distance")
+
+    def __init__(self, accepted, answer, distance):
+        self.accepted = accepted
+        self.answer = answer
+        self.distance = distance
+
+
+class AnswerIndex:
+    """Trigram index over the correct answer and accepted variants of every question."""
+
+    def __init__(self, bank):
+        self.bank = bank
+        self._entries = []       # folded answer strings
+        self._accepts = []       # entry -> question ids that accept it
+        self._postings = {}      # trigram -> entry ids
+        ids = {}
+        for qid in range(len(bank)):
+            for answer in (bank.correct_answer(qid), *bank.accepted[qid]):
+                folded = fold(answer)
+                if not folded:
+                    continue
+                entry = ids.get(folded)
+                if entry is None:
+                    entry = ids[folded] = len(self._entries)
+                    self._entries.append(folded)
+                    self._accepts.append(set())
+                    for gram in set(trigrams(folded)):
+                        self._postings.setdefault(gram, []).append(entry)
+                self._accepts[entry].add(qid)
+
+    def candidates(self, text):
+        """``(folded answer, distance, question ids)`` for every indexed answer close to ``text``."""
+        folded = fold(text)
+        if not folded:
+            return []
+        grams = Counter(trigrams(folded))
+        limit = tolerance(len(folded))
+        needed = sum(grams.values()) - 3 * limit
+        shared = Counter()
+        for gram, count in grams.items():
+            for entry in self._postings.get(gram, ()):
+                shared[entry] += count
+        found = []
+        for entry, count in shared.items():
+            if count < needed:
+                continue
+            answer = self._entries[entry]
+            # A short answer tolerates fewer typos than a long query would
+            allowed = min(limit, tolerance(len(answer)))
+            distance = edit_distance(folded, answer, allowed)
+            if distance <= allowed:
+                found.append((answer, distance, self._accepts[entry]))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def match(self, text, qid):
+        """Whether ``text`` is an acceptable answer to question ``qid``."""
+        candidates = self.candidates(text)
+        for answer, distance, qids in candidates:
+            if qid in qids:
+                return Match(True, answer, distance)
+        # Queries too short for the trigram bound: compare with this question's own answers
+        folded = fold(text)
+        if folded and len(folded) - 3 * tolerance(len(folded)) <= 0:
+            for answer in (self.bank.correct_answer(qid), *self.bank.accepted[qid]):
+                if fold(answer) == folded:
+                    return Match(True, folded, 0)
+        closest = candidates[0] if candidates else (None, None, ())
+        return Match(False, closest[0], closest[1])
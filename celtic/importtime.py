@@ -0,0 +1,130 @@
+"""Import-time report for the app's first render.
+
+Runs the imports made at the top of the Streamlit entry point in a fresh
+interpreter under ``python -X importtime`` and summarises the cost:
+
+    python -m celtic.importtime
+    python -m celtic.importtime --budget-ms 800   # exit 1 if over budget
+    python -m celtic.importtime --json
+
+The module list is read from the entry point itself, so a new top-level
+import shows up in the report without touching this file.
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from importlib.machinery import PathFinder
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent.parent / "celtic-streamlit-app.py"
+
+
+def startup_modules(app_path=APP_PATH):
+    """Modules imported at module level by the app script."""
+    tree = ast.parse(Path(app_path).read_text(encoding="utf-8"))
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+            # ``from celtic import metrics`` imports the submodule too
+            modules.extend(
+                f"{node.module}.{alias.name}" for alias in node.names
+                if _is_submodule(f"{node.module}.{alias.name}", Path(app_path).parent)
+            )
+    return list(dict.fromkeys(modules))
+
+
+def _is_submodule(name, root):
+    """Whether ``name`` is a module file under ``root`` or ``sys.path``; nothing is imported."""
+    path = [str(root), *sys.path]
+    for part in name.split("."):
+        if path is None:
+            return False
+        spec = PathFinder.find_spec(part, path)
+        if spec is None:
+            return False
+        path = spec.submodule_search_locations
+    return True
+
+
+def parse_importtime(stderr):
+    """Parse ``-X importtime`` output into ``(depth, name, self_us, cumulative_us)``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|", 2)
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        label = parts[2][1:]
+        name = label.lstrip(" ")
+        depth = (len(label) - len(name)) // 2
+        rows.append((depth, name, int(parts[0]), int(parts[1])))
+    return rows
+
+
+def measure(modules, cwd=None):
+    code = "".join(f"import {name}\n" for name in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd or APP_PATH.parent,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode:
+        raise RuntimeError(f"importing startup modules failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def report(modules, rows, top=15):
+    roots = [row for row in rows if row[0] == 0]
+    total_us = sum(row[3] for row in roots)
+    wanted = set(modules)
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "modules": {
+            name: round(cumulative / 1000, 1)
+            for depth, name, _, cumulative in rows
+            if name in wanted
+        },
+        "slowest_self": [
+            {"module": name, "self_ms": round(self_us / 1000, 1)}
+            for _, name, self_us, _ in sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+        ],
+        "module_count": len(rows),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=APP_PATH, type=Path, help="Streamlit entry point to inspect")
+    parser.add_argument("--budget-ms", type=float, help="fail if total import time exceeds this")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules to list")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    modules = startup_modules(args.app)
+    result = report(modules, measure(modules, cwd=args.app.parent), top=args.top)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"Startup imports: {result['total_ms']} ms across {result['module_count']} modules")
+        for name, ms in result["modules"].items():
+            print(f"  {name:<45} {ms:>9.1f} ms")
+        print("Slowest modules (self time):")
+        for row in result["slowest_self"]:
+            print(f"  {row['module']:<45} {row['self_ms']:>9.1f} ms")
+
+    if args.budget_ms is not None and result["total_ms"] > args.budget_ms:
+        print(f"Import time {result['total_ms']} ms is over the {args.budget_ms} ms budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
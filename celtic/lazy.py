@@ -0,0 +1,24 @@
+"""Deferred imports for optional, heavy dependencies.
+
+The core app only needs Streamlit. Features that rely on larger packages
+import them through ``optional_import`` at the point of use, so they add
+nothing to cold start unless a session actually exercises the feature.
+Each optional package belongs to an extras group with its own
+``requirements-<extra>.txt`` file.
+"""
+import importlib
+
+
+class MissingExtra(ImportError):
+    pass
+
+
+def optional_import(name, extra):
+    """Import ``name`` or explain which extras group provides it."""
+    try:
+        return importlib.import_module(name)
+    except ImportError as exc:
+        raise MissingExtra(
+            f"{name!r} is needed for this feature; install it with "
+            f"`pip install -r requirements-{extra}.txt`"
+        ) from exc
@@ -0,0 +1,98 @@
+"""Server-wide leaderboards.
+
+One board for whole games plus one per level. Each board keeps its
+results in a ``SortedList`` ordered best first, so adding a result is
+O(log n), the top of the board is a slice, and a player's percentile is
+two bisections rather than a sort. All sessions share a single
+``Leaderboard``; a lock makes it safe across Streamlit's script threads.
+"""
+import threading
+import time
+
+from sortedcontainers import SortedList
+
+GAME = "game"
+
+
+def level_board(level):
+    return f"level-{level}"
+
+
+class Result:
+    __slots__ = ("player", "name", "score", "total", "finished_at")
+
+    def __init__(self, player, name, score, total, finished_at):
+        self.player = player
+        self.name = name
+        self.score = score
+        self.total = total
+        self.finished_at = finished_at
+
+    @property
+    def percentage(self):
+        return (self.score / self.total) * 100 if self.total else 0.0
+
+
+class Board:
+    __slots__ = ("_entries",)
+
+    def __init__(self):
+        # (-percentage, finished_at, tiebreak, result): best first, earliest wins ties
+        self._entries = SortedList()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, result):
+        self._entries.add((-result.percentage, result.finished_at, id(result), result))
+
+    def top(self, n):
+        return [entry[3] for entry in self._entries.islice(0, n)]
+
+    def percentile(self, percentage):
+        """Share of results strictly below ``percentage``, as 0-100."""
+        total = len(self._entries)
+        if not total:
+            return 100.0
+        at_or_above = self._entries.bisect_left((-percentage, float("inf")))
+        return (total - at_or_above) / total * 100
+
+    def rank(self, percentage):
+        """1-based position a result with ``percentage`` would hold."""
+        return self._entries.bisect_left((-percentage, float("-inf"))) + 1
+
+
+class Leaderboard:
+    def __init__(self, results=()):
+        self._lock = threading.Lock()
+        self._boards = {}
+        for board, result in results:
+            self._board(board).add(result)
+
+    def _board(self, board):
+        found = self._boards.get(board)
+        if found is None:
+            found = self._boards[board] = Board()
+        return found
+
+    def submit(self, board, player, name, score, total, finished_at=None):
+        result = Result(player, name, score, total, finished_at or time.time())
+        self.add(board, result)
+        return result
+
+    def add(self, board, result):
+        with self._lock:
+            self._board(board).add(result)
+
+    def top(self, board=GAME, n=10):
+        with self._lock:
+            found = self._boards.get(board)
+            return found.top(n) if found else []
+
+    def standing(self, board, percentage):
+        """``(rank, percentile, board size)`` for a result with ``percentage``."""
+        with self._lock:
+            found = self._boards.get(board)
+            if not found:
+                return 1, 100.0, 0
+            return found.rank(percentage), found.percentile(percentage), len(found)
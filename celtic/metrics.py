@@ -0,0 +1,300 @@
+"""Timing spans, session gauges and an optional sampling profiler.
+
+Spans are off unless ``enable()`` is called (the app does so when
+``CELTIC_SPANS`` is set). While off, ``span(name)`` hands back one shared
+do-nothing context manager and ``timed(name)`` returns the function
+undecorated, so instrumented code pays for one function call at most.
+
+While on, every span feeds a latency histogram per name: cumulative
+buckets for the Prometheus export, plus a ring of per-minute windows
+for the rolling view on the diagnostics page.
+"""
+import sys
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import Counter, deque
+from functools import wraps
+
+# Histogram bucket upper bounds in seconds, Prometheus-style
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WINDOW_SECONDS = 60
+WINDOWS = 15
+# A session counts as active if it reran within this many seconds
+ACTIVE_SECONDS = 300
+
+_enabled = False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count", "windows", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        # (window start, bucket counts) for the last WINDOWS minutes
+        self.windows = deque(maxlen=WINDOWS)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, now=None):
+        bucket = bisect_left(BUCKETS, seconds)
+        start = int(time.time() if now is None else now) // WINDOW_SECONDS * WINDOW_SECONDS
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += seconds
+            self.count += 1
+            if not self.windows or self.windows[-1][0] != start:
+                self.windows.append((start, [0] * len(self.counts)))
+            self.windows[-1][1][bucket] += 1
+
+    def recent(self, now=None):
+        """Bucket counts over the windows still inside the rolling period."""
+        cutoff = (time.time() if now is None else now) - WINDOW_SECONDS * WINDOWS
+        counts = [0] * len(self.counts)
+        with self._lock:
+            for start, window in self.windows:
+                if start >= cutoff:
+                    counts = [a + b for a, b in zip(counts, window)]
+        return counts
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(name):
+    found = _histograms.get(name)
+    if found is None:
+        with _histograms_lock:
+            found = _histograms.setdefault(name, Histogram())
+    return found
+
+
+class Span:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def enabled():
+    return _enabled
+
+
+def span(name):
+    """Context manager timing the enclosed block under ``name``."""
+    if not _enabled:
+        return NULL_SPAN
+    return Span(histogram(name))
+
+
+def timed(name):
+    """Decorator timing every call; a no-op unless spans were enabled beforehand."""
+    def decorate(func):
+        if not _enabled:
+            return func
+        hist = histogram(name)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def quantile(counts, q):
+    """Upper bucket bound holding the ``q`` quantile of ``counts`` (inf past the last bound)."""
+    total = sum(counts)
+    if not total:
+        return None
+    seen = 0
+    for bound, count in zip((*BUCKETS, float("inf")), counts):
+        seen += count
+        if seen >= q * total:
+            return bound
+    return float("inf")
+
+
+def snapshot(now=None):
+    """Per span name: rolling bucket counts, p50/p99 and the all-time count and sum."""
+    rows = {}
+    for name, hist in sorted(_histograms.items()):
+        recent = hist.recent(now)
+        rows[name] = {
+            "recent": recent,
+            "p50": quantile(recent, 0.5),
+            "p99": quantile(recent, 0.99),
+            "count": hist.count,
+            "total": hist.total,
+        }
+    return rows
+
+
+# Sessions
+class SessionTracker:
+    """Last rerun time per session, and the live game sessions for memory estimates."""
+
+    def __init__(self):
+        self._seen = {}
+        self._games = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def touch(self, session_id, game, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._seen[session_id] = now
+            self._games[session_id] = game
+
+    def active(self, now=None):
+        cutoff = (time.time() if now is None else now) - ACTIVE_SECONDS
+        with self._lock:
+            for session_id in [sid for sid, seen in self._seen.items() if seen < cutoff]:
+                del self._seen[session_id]
+            return len(self._seen)
+
+    def state_bytes(self):
+        with self._lock:
+            games = list(self._games.values())
+        return sum(session_bytes(game) for game in games)
+
+
+SESSIONS = SessionTracker()
+
+
+def session_bytes(game):
+    """Approximate bytes held by one game session, excluding shared content."""
+    shared = {"catalog", "bank", "fun_facts", "rng", "dealer", "clock", "__weakref__"}
+    total = sys.getsizeof(game)
+    for name in type(game).__slots__:
+        if name not in shared:
+            total += sys.getsizeof(getattr(game, name, None))
+    total += sum(sys.getsizeof(item) for item in game.history)
+    return total
+
+
+# Sampling profiler
+class SamplingProfiler:
+    """Counts thread stacks every ``interval`` seconds.
+
+    Only threads whose name starts with ``thread_prefix`` are sampled when
+    it is given (Streamlit names script threads ``ScriptRunner...``), so
+    idle server threads do not drown out the app.
+    """
+
+    def __init__(self, interval=0.01, max_depth=40, thread_prefix=None):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.thread_prefix = thread_prefix
+        self.samples = 0
+        self.stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_prefix:
+                sampled = {t.ident for t in threading.enumerate() if t.name.startswith(self.thread_prefix)}
+            else:
+                sampled = frames.keys() - {own}
+            stacks = []
+            for ident, frame in frames.items():
+                if ident not in sampled:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(stack)))
+            del frames
+            with self._lock:
+                self.samples += 1
+                self.stacks.update(stacks)
+
+    def top_functions(self, n=20):
+        """``(function, samples it was on the stack)``, most frequent first."""
+        counts = Counter()
+        with self._lock:
+            for stack, count in self.stacks.items():
+                for function in set(stack.split(";")):
+                    counts[function] += count
+        return counts.most_common(n)
+
+    def collapsed(self):
+        """Samples in collapsed-stack format, for flame graph tools."""
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+# Export
+def prometheus_text(sessions=SESSIONS, profiler=None):
+    """Spans and session gauges in the Prometheus text exposition format."""
+    lines = [
+        "# HELP celtic_span_seconds Time spent in instrumented sections.",
+        "# TYPE celtic_span_seconds histogram",
+    ]
+    for name, hist in sorted(_histograms.items()):
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), hist.counts):
+            cumulative += count
+            lines.append(f'celtic_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'celtic_span_seconds_sum{{span="{name}"}} {hist.total}')
+        lines.append(f'celtic_span_seconds_count{{span="{name}"}} {hist.count}')
+    lines += [
+        "# HELP celtic_active_sessions Sessions that reran in the last five minutes.",
+        "# TYPE celtic_active_sessions gauge",
+        f"celtic_active_sessions {sessions.active()}",
+        "# HELP celtic_session_state_bytes Approximate memory held by game sessions.",
+        "# TYPE celtic_session_state_bytes gauge",
+        f"celtic_session_state_bytes {sessions.state_bytes()}",
+    ]
+    if profiler is not None:
+        lines += [
+            "# HELP celtic_profiler_samples_total Stack samples taken by the sampling profiler.",
+            "# TYPE celtic_profiler_samples_total counter",
+            f"celtic_profiler_samples_total {profiler.samples}",
+        ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,306 @@
+"""Per-language content packs, loaded when a player reaches them.
+
+A manifest lists the languages in play order, each with its levels and
+the JSONL pack holding its questions::
+
+    {"languages": [
+        {"code": "ga", "name": "Irish", "flag": "🇮🇪", "pack": "packs/ga.jsonl",
+         "levels": [{"name": "...", "flag": "🇮🇪", "description": "...", "questions": 3}]}
+    ]}
+
+Only the manifest is read up front; it carries everything the start
+screen, leaderboards and score totals need. A pack is parsed the first
+time any session enters one of its levels, and compiled packs are kept
+in a ``PackCache`` shared by the whole process that evicts the least
+recently used packs once they hold more than ``capacity`` questions.
+Sessions keep the pack they are playing, so an evicted pack is freed
+once the last of them moves on.
+
+A pack with a fresh ``.bank`` snapshot beside it (written by
+``python -m celtic.validate --snapshot``) is read from the snapshot
+instead of being parsed.
+
+Questions in a pack name their level by its index within the language,
+and the manifest's question counts must match the pack; check and update
+them with::
+
+    python -m celtic.packs content/manifest.json [--update]
+"""
+import argparse
+import itertools
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from celtic.question_bank import BankError, Level, QuestionBank, read_jsonl
+from celtic.snapshot import fresh_snapshot, read_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Compiled questions kept across all packs before the oldest are evicted
+CACHE_CAPACITY = 50_000
+
+_serials = itertools.count()
+
+
+class PackCache:
+    """Process-wide LRU of compiled packs, bounded by their total question count."""
+
+    def __init__(self, capacity=CACHE_CAPACITY):
+        self.capacity = capacity
+        self.size = 0
+        self._banks = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._banks)
+
+    def _lookup(self, key):
+        bank = self._banks.get(key)
+        if bank is not None:
+            self._banks.move_to_end(key)
+        return bank
+
+    def get(self, key, load):
+        """The cached bank for ``key``, calling ``load()`` at most once per key at a time."""
+        with self._lock:
+            bank = self._lookup(key)
+            if bank is not None:
+                return bank
+            loading = self._loading.setdefault(key, threading.Lock())
+        # Other packs stay available while this one is parsed
+        with loading:
+            with self._lock:
+                bank = self._lookup(key)
+                if bank is not None:
+                    return bank
+            try:
+                bank = load()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+            with self._lock:
+                self._banks[key] = bank
+                self.size += len(bank)
+                while self.size > self.capacity and len(self._banks) > 1:
+                    _, evicted = self._banks.popitem(last=False)
+                    self.size -= len(evicted)
+            return bank
+
+    def peek(self, key):
+        with self._lock:
+            return self._banks.get(key)
+
+    def clear(self):
+        with self._lock:
+            self._banks.clear()
+            self.size = 0
+
+
+SHARED_CACHE = PackCache()
+
+
+class Pack:
+    __slots__ = ("code", "name", "flag", "path", "first", "count")
+
+    def __init__(self, code, name, flag, path, first, count):
+        self.code = code
+        self.name = name
+        self.flag = flag
+        self.path = path
+        # Global index of the pack's first level, and how many it has
+        self.first = first
+        self.count = count
+
+
+class Catalog:
+    """Every level in play order, with each level's questions in a lazily loaded pack.
+
+    Offers the parts of the ``QuestionBank`` interface the game engine
+    needs across levels; ``bank_for(level)`` returns the compiled pack
+    for a level, whose level indexes match the catalog's.
+    """
+
+    def __init__(self, packs, levels, sizes, source="<manifest>", cache=None, check_interval=1.0):
+        self.packs = tuple(packs)
+        self.levels = tuple(levels)
+        self.languages = tuple(pack.code for pack in self.packs)
+        self.sizes = tuple(sizes)
+        self.source = source
+        self.cache = SHARED_CACHE if cache is None else cache
+        self.serial = next(_serials)
+        self.check_interval = check_interval
+        self._pack_of = [pack for pack in self.packs for _ in range(pack.count)]
+        self._offsets = tuple(itertools.accumulate(self.sizes))
+        self._loaded = {}
+        # pack code -> (checked at, mtime), so pack files are checked at most once per interval
+        self._mtimes = {}
+
+    def __len__(self):
+        return self._offsets[-1] if self._offsets else 0
+
+    def level_size(self, level):
+        return self.sizes[level]
+
+    def questions_through(self, level):
+        """Number of questions in levels ``0..level`` inclusive."""
+        return self._offsets[level]
+
+    def bank_for(self, level):
+        """The compiled pack holding ``level``, loading it if needed."""
+        pack = self._pack_of[level]
+        try:
+            key = (self.serial, pack.code, self._mtime(pack))
+            bank = self.cache.get(key, lambda: self._load(pack))
+        except (OSError, ValueError) as exc:
+            # Keep serving the last good copy of a pack that was broken by an edit
+            previous = self._loaded.get(pack.code)
+            bank = previous and self.cache.peek(previous)
+            if bank is None:
+                raise
+            logger.warning("Pack reload failed, keeping current pack: %s", exc)
+            return bank
+        self._loaded[pack.code] = key
+        return bank
+
+    def _mtime(self, pack):
+        now = time.monotonic()
+        checked = self._mtimes.get(pack.code)
+        if checked is None or now - checked[0] >= self.check_interval:
+            checked = self._mtimes[pack.code] = (now, pack.path.stat().st_mtime_ns)
+        return checked[1]
+
+    def _load(self, pack):
+        bank = None
+        snapshot = fresh_snapshot(pack.path)
+        if snapshot is not None:
+            try:
+                bank = read_snapshot(snapshot, self.levels, pack.first)
+            except (OSError, BankError) as exc:
+                logger.warning("Ignoring snapshot, parsing %s: %s", pack.path, exc)
+        if bank is None:
+            levels, questions = read_jsonl(pack.path)
+            if levels:
+                raise BankError(f"{pack.path}: levels belong in the manifest, not in a pack")
+            bank = QuestionBank.compile(
+                self.levels,
+                (
+                    (location, _in_catalog(record, pack, location))
+                    for location, record in questions
+                ),
+                source=str(pack.path),
+            )
+        for level in range(pack.first, pack.first + pack.count):
+            found = bank.level_size(level)
+            if found != self.sizes[level]:
+                raise BankError(
+                    f"{pack.path}: level {self.levels[level].name!r} has {found} questions "
+                    f"but {self.source} lists {self.sizes[level]}; "
+                    "run `python -m celtic.packs --update` after editing a pack"
+                )
+        logger.info("Loaded %s pack (%d questions)", pack.name, len(bank))
+        return bank
+
+
+def _in_catalog(record, pack, location):
+    """``record`` with its pack-local level replaced by the catalog's level index."""
+    level = record.get("level")
+    if not isinstance(level, int) or not 0 <= level < pack.count:
+        raise BankError(f"{location}: question refers to unknown {pack.name} level {level!r}")
+    return {**record, "level": pack.first + level}
+
+
+def load_catalog(path, cache=None):
+    """Read a manifest; no pack is opened until one of its levels is played."""
+    path = Path(path)
+    try:
+        with path.open(encoding="utf-8") as f:
+            manifest = json.load(f)
+    except json.JSONDecodeError as exc:
+        raise BankError(f"{path}: {exc}") from None
+    packs = []
+    levels = []
+    sizes = []
+    codes = set()
+    for i, language in enumerate(manifest.get("languages") or ()):
+        location = f"{path}:languages[{i}]"
+        try:
+            code = language["code"]
+            if code in codes:
+                raise BankError(f"duplicate language {code!r}")
+            codes.add(code)
+            pack = Pack(code, language["name"], language["flag"], path.parent / language["pack"],
+                        len(levels), len(language["levels"]))
+            if not pack.count:
+                raise BankError(f"language {code!r} has no levels")
+            for lv in language["levels"]:
+                size = lv["questions"]
+                if not isinstance(size, int) or size < 1:
+                    raise BankError(f"level {lv['name']!r} needs a positive question count")
+                levels.append(Level(len(levels), lv["name"], lv["flag"], lv["description"], code))
+                sizes.append(size)
+        except (KeyError, TypeError) as exc:
+            raise BankError(f"{location}: {exc}") from None
+        except BankError as exc:
+            raise BankError(f"{location}: {exc}") from None
+        packs.append(pack)
+    if not packs:
+        raise BankError(f"{path}: manifest lists no languages")
+    return Catalog(packs, levels, sizes, source=str(path), cache=cache)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check a content manifest against its packs.")
+    parser.add_argument("manifest", type=Path)
+    parser.add_argument("--update", action="store_true", help="rewrite the manifest's question counts")
+    args = parser.parse_args(argv)
+
+    try:
+        return check(args.manifest, args.update)
+    except BankError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+
+def check(manifest_path, update=False):
+    """Compare the manifest's question counts with its packs, optionally fixing them."""
+    catalog = load_catalog(manifest_path, cache=PackCache())
+    counts = []
+    for pack in catalog.packs:
+        levels, questions = read_jsonl(pack.path)
+        if levels:
+            raise BankError(f"{pack.path}: levels belong in the manifest, not in a pack")
+        found = [0] * pack.count
+        for location, record in questions:
+            found[_in_catalog(record, pack, location)["level"] - pack.first] += 1
+        counts.append(found)
+        print(f"{pack.code}: {sum(found)} questions in {pack.count} levels ({pack.path})")
+
+    sizes = [size for found in counts for size in found]
+    if sizes == list(catalog.sizes):
+        # Counts agree, so every pack can be compiled as the app would
+        for pack in catalog.packs:
+            catalog.bank_for(pack.first)
+        return 0
+    if not update:
+        print(f"{manifest_path}: question counts are out of date; rerun with --update", file=sys.stderr)
+        return 1
+    with manifest_path.open(encoding="utf-8") as f:
+        manifest = json.load(f)
+    for language, found in zip(manifest["languages"], counts):
+        for level, size in zip(language["levels"], found):
+            level["questions"] = size
+    with manifest_path.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"Updated question counts in {manifest_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
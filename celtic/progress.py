@@ -0,0 +1,281 @@
+"""Persistent player progress.
+
+``ProgressStore`` is the backend interface: answer events plus each
+player's saved position so a game can be resumed after a disconnect.
+``SQLiteProgressStore`` is the default; it keeps a local database in WAL
+mode and does all writes on a background thread, so recording an answer
+is only a queue put on the request path.
+"""
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from celtic.engine import Position
+from celtic.leaderboard import Result
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    player TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    answered_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_player ON answers (player, answered_at);
+CREATE TABLE IF NOT EXISTS positions (
+    player TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    question INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    selected INTEGER,
+    updated_at REAL NOT NULL,
+    level_base INTEGER,
+    question_order TEXT,
+    answer_mode TEXT,
+    time_limit REAL,
+    points INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    board TEXT NOT NULL,
+    player TEXT NOT NULL,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+"""
+
+# Position columns added after the table was first released, as
+# (name, type); databases created before gain them when opened
+POSITION_UPGRADES = (
+    ("level_base", "INTEGER"),
+    ("question_order", "TEXT"),
+    ("answer_mode", "TEXT"),
+    ("time_limit", "REAL"),
+    ("points", "INTEGER"),
+)
+
+
+def _upgrade(conn):
+    """Add any ``POSITION_UPGRADES`` columns the positions table lacks."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(positions)")}
+    for name, kind in POSITION_UPGRADES:
+        if name in columns:
+            continue
+        try:
+            conn.execute(f"ALTER TABLE positions ADD COLUMN {name} {kind}")
+        except sqlite3.OperationalError:
+            # Another process opening the same database may have added it first
+            if name not in {row[1] for row in conn.execute("PRAGMA table_info(positions)")}:
+                raise
+
+
+class ProgressStore:
+    """Interface for progress backends."""
+
+    def record_answer(self, player, question_key, answer, correct):
+        raise NotImplementedError
+
+    def save_position(self, player, position):
+        raise NotImplementedError
+
+    def load_position(self, player):
+        raise NotImplementedError
+
+    def answer_history(self, player):
+        """``(question_key, correct, answered_at)`` rows, oldest first."""
+        raise NotImplementedError
+
+    def record_result(self, board, result):
+        raise NotImplementedError
+
+    def results(self):
+        """``(board, Result)`` pairs for every finished game and level."""
+        raise NotImplementedError
+
+    def flush(self, timeout=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class NullProgressStore(ProgressStore):
+    """Keeps nothing; used when persistence is switched off."""
+
+    def record_answer(self, player, question_key, answer, correct):
+        pass
+
+    def save_position(self, player, position):
+        pass
+
+    def load_position(self, player):
+        return None
+
+    def answer_history(self, player):
+        return []
+
+    def record_result(self, board, result):
+        pass
+
+    def results(self):
+        return []
+
+
+class SQLiteProgressStore(ProgressStore):
+    def __init__(self, path, batch_size=500, flush_interval=0.25):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        _upgrade(conn)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="progress-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # Request path: enqueue only
+    def record_answer(self, player, question_key, answer, correct):
+        self._queue.put(("answer", (player, question_key, answer, int(correct), time.time())))
+
+    def save_position(self, player, position):
+        self._queue.put((
+            "position",
+            (player, position.state, position.level, position.question, position.score,
+             position.selected, time.time(), position.level_base, position.order,
+             position.answer_mode, position.time_limit, position.points),
+        ))
+
+    def record_result(self, board, result):
+        self._queue.put((
+            "result",
+            (board, result.player, result.name, result.score, result.total, result.finished_at),
+        ))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been written."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(("stop", None))
+        self._writer.join(timeout=10)
+
+    # Reads happen once per session, on their own short-lived connection
+    def load_position(self, player):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT state, level, question, score, selected, level_base, question_order, answer_mode, "
+                "time_limit, points FROM positions WHERE player = ?",
+                (player,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return Position(*row) if row else None
+
+    def answer_history(self, player):
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT question, correct, answered_at FROM answers WHERE player = ? ORDER BY answered_at",
+                (player,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def results(self):
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT board, player, name, score, total, finished_at FROM results"
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(board, Result(*row)) for board, *row in rows]
+
+    # Background writer
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                answers, positions, results, waiters, stop = self._next_batch()
+                if answers or positions or results:
+                    try:
+                        with conn:
+                            conn.executemany("INSERT INTO answers VALUES (?, ?, ?, ?, ?)", answers)
+                            conn.executemany(
+                                "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                positions.values(),
+                            )
+                            conn.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)", results)
+                    except sqlite3.Error as exc:
+                        dropped = len(answers) + len(positions) + len(results)
+                        logger.warning("Dropped %d progress events: %s", dropped, exc)
+                for done in waiters:
+                    done.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _next_batch(self):
+        answers = []
+        positions = {}
+        results = []
+        waiters = []
+        kind, item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if kind == "answer":
+                answers.append(item)
+            elif kind == "position":
+                # Only the latest position per player needs writing
+                positions[item[0]] = item
+            elif kind == "result":
+                results.append(item)
+            elif kind == "flush":
+                waiters.append(item)
+                return answers, positions, results, waiters, False
+            elif kind == "stop":
+                return answers, positions, results, waiters, True
+            if len(answers) + len(positions) + len(results) >= self.batch_size:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                kind, item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+        return answers, positions, results, waiters, False
+
+
+def open_progress_store(spec):
+    """Open the backend named by ``spec``: a SQLite path, or ``none`` to disable."""
+    if not spec or str(spec).lower() == "none":
+        return NullProgressStore()
+    return SQLiteProgressStore(spec)
@@ -0,0 +1,294 @@
+"""Compiled, indexed question bank.
+
+Questions are read once from a JSONL or SQLite source and compiled into
+flat arrays addressed by integer question ids, so looking up a question
+or checking an answer costs the same no matter how large the bank is.
+"""
+import json
+import logging
+import sqlite3
+from array import array
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class BankError(ValueError):
+    pass
+
+
+class Level:
+    __slots__ = ("index", "name", "flag", "description", "language")
+
+    def __init__(self, index, name, flag, description, language):
+        self.index = index
+        self.name = name
+        self.flag = flag
+        self.description = description
+        self.language = language
+
+
+class QuestionBank:
+    __slots__ = (
+        "levels",
+        "languages",
+        "keys",
+        "texts",
+        "options",
+        "correct",
+        "explanations",
+        "accepted",
+        "level_of",
+        "language_of",
+        "pools",
+        "pool_of",
+        "_by_key",
+        "_by_level",
+        "_by_language",
+        "_by_tag",
+        "_level_offsets",
+        "_pool_ids",
+        "_derived",
+    )
+
+    def __init__(self, levels):
+        self.levels = tuple(levels)
+        self.languages = tuple(sorted({level.language for level in self.levels}))
+        self.keys = []
+        self.texts = []
+        self.options = []
+        self.correct = array("B")
+        self.explanations = []
+        # Other spellings accepted for typed answers, usually empty
+        self.accepted = []
+        self.level_of = array("H")
+        self.language_of = array("B")
+        # Answer kinds, (answer language, part of speech), for distractor pools
+        self.pools = []
+        self.pool_of = array("I")
+        self._pool_ids = {}
+        self._by_key = {}
+        self._by_level = [array("I") for _ in self.levels]
+        self._by_language = {code: array("I") for code in self.languages}
+        self._by_tag = {}
+        self._level_offsets = array("I")
+        self._derived = {}
+
+    @classmethod
+    def compile(cls, levels, questions, source="<bank>"):
+        """Build a bank from level and question records.
+
+        ``levels`` is a sequence of dicts with ``name``, ``flag``,
+        ``description`` and ``language``; each question dict names its
+        ``level`` by index. Levels may also be given as ``Level`` objects
+        to share them with a ``celtic.packs.Catalog``. ``questions`` may yield ``(location, record)``
+        pairs so errors can point back at the source line.
+        """
+        bank = cls(
+            lv if isinstance(lv, Level) else Level(i, lv["name"], lv["flag"], lv["description"], lv["language"])
+            for i, lv in enumerate(levels)
+        )
+        for item in questions:
+            location, record = item if isinstance(item, tuple) else (source, item)
+            try:
+                bank._add(record)
+            except (KeyError, TypeError, ValueError) as exc:
+                raise BankError(f"{location}: {exc}") from None
+        bank._finish()
+        return bank
+
+    def _add(self, record):
+        key = record["id"]
+        if key in self._by_key:
+            raise BankError(f"duplicate question id {key!r}")
+        level = record["level"]
+        if not 0 <= level < len(self.levels):
+            raise BankError(f"question {key!r} refers to unknown level {level}")
+        options = tuple(record["options"])
+        try:
+            correct = options.index(record["correct_answer"])
+        except ValueError:
+            raise BankError(f"question {key!r}: correct_answer is not one of the options") from None
+
+        qid = len(self.keys)
+        language = self.levels[level].language
+        self.keys.append(key)
+        self.texts.append(record["question"])
+        self.options.append(options)
+        self.correct.append(correct)
+        self.explanations.append(record.get("explanation", ""))
+        self.accepted.append(tuple(record.get("accepted") or ()))
+        self.level_of.append(level)
+        self.language_of.append(self.languages.index(language))
+        pool = (record.get("answer_language") or language, record.get("pos") or "")
+        pool_id = self._pool_ids.get(pool)
+        if pool_id is None:
+            pool_id = self._pool_ids[pool] = len(self.pools)
+            self.pools.append(pool)
+        self.pool_of.append(pool_id)
+        self._by_key[key] = qid
+        self._by_level[level].append(qid)
+        self._by_language[language].append(qid)
+        for tag in record.get("tags", ()):
+            self._by_tag.setdefault(tag, array("I")).append(qid)
+
+    def _finish(self):
+        # Running totals so "questions answered up to level n" is a lookup
+        total = 0
+        for qids in self._by_level:
+            total += len(qids)
+            self._level_offsets.append(total)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self._by_key
+
+    # Lookups
+    def qid(self, key):
+        return self._by_key[key]
+
+    def question(self, qid):
+        return self.texts[qid]
+
+    def correct_index(self, qid):
+        return self.correct[qid]
+
+    def correct_answer(self, qid):
+        return self.options[qid][self.correct[qid]]
+
+    def explanation(self, qid):
+        return self.explanations[qid]
+
+    def is_correct(self, qid, option_index):
+        return self.correct[qid] == option_index
+
+    # Indexes
+    def level_questions(self, level):
+        return self._by_level[level]
+
+    def language_questions(self, language):
+        return self._by_language.get(language, array("I"))
+
+    def tag_questions(self, tag):
+        return self._by_tag.get(tag, array("I"))
+
+    def tags(self):
+        return sorted(self._by_tag)
+
+    def questions_through(self, level):
+        """Number of questions in levels ``0..level`` inclusive."""
+        return self._level_offsets[level]
+
+    def level_size(self, level):
+        return len(self._by_level[level])
+
+    def bank_for(self, level):
+        # A single-file bank holds every level; see ``celtic.packs.Catalog``
+        return self
+
+    def derived(self, name, build):
+        """``build(bank)``, computed once per bank (distractor pools, answer index).
+
+        Derived structures live and die with the bank, so they are dropped
+        when a content pack is evicted or reloaded.
+        """
+        try:
+            return self._derived[name]
+        except KeyError:
+            return self._derived.setdefault(name, build(self))
+
+
+def read_jsonl(path):
+    """``(levels, questions)`` records from a JSONL file, questions with their locations."""
+    path = Path(path)
+    levels = []
+    questions = []
+    with path.open(encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            location = f"{path}:{lineno}"
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise BankError(f"{location}: {exc}") from None
+            kind = record.get("kind", "question")
+            if kind == "level":
+                levels.append(record)
+            elif kind == "question":
+                questions.append((location, record))
+            else:
+                raise BankError(f"{location}: unknown record kind {kind!r}")
+    return levels, questions
+
+
+def load_jsonl(path):
+    """Compile a bank from a JSONL file of ``level`` and ``question`` records."""
+    levels, questions = read_jsonl(path)
+    return QuestionBank.compile(levels, questions, source=str(path))
+
+
+def load_sqlite(path):
+    """Compile a bank from a SQLite database with ``levels`` and ``questions`` tables."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        levels = [
+            {"name": name, "flag": flag, "description": description, "language": language}
+            for name, flag, description, language in conn.execute(
+                "SELECT name, flag, description, language FROM levels ORDER BY id"
+            )
+        ]
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(questions)")}
+        optional = ", ".join(
+            name if name in columns else "NULL" for name in ("pos", "answer_language", "accepted")
+        )
+        rows = conn.execute(
+            "SELECT id, level, question, options, correct_answer, explanation, tags, "
+            f"{optional} FROM questions ORDER BY rowid"
+        )
+        questions = (
+            (
+                f"{path}:questions[{key}]",
+                {
+                    "id": key,
+                    "level": level,
+                    "question": question,
+                    "options": json.loads(options),
+                    "correct_answer": correct_answer,
+                    "explanation": explanation or "",
+                    "tags": json.loads(tags) if tags else (),
+                    "pos": pos,
+                    "answer_language": answer_language,
+                    "accepted": json.loads(accepted) if accepted else (),
+                },
+            )
+            for key, level, question, options, correct_answer, explanation, tags, pos, answer_language, accepted
+            in rows
+        )
+        return QuestionBank.compile(levels, questions, source=str(path))
+    finally:
+        conn.close()
+
+
+def load_bank(path):
+    """Compile a bank from JSONL or SQLite, or read a snapshot (``.bank``, see ``celtic.snapshot``).
+
+    A JSONL bank with a fresh snapshot beside it is read from the snapshot,
+    or parsed as usual if the snapshot is damaged.
+    """
+    from celtic.snapshot import SUFFIX, SnapshotError, fresh_snapshot, read_snapshot
+
+    path = Path(path)
+    if path.suffix == SUFFIX:
+        return read_snapshot(path)
+    if path.suffix in (".db", ".sqlite", ".sqlite3"):
+        return load_sqlite(path)
+    snapshot = fresh_snapshot(path)
+    if snapshot is not None:
+        try:
+            return read_snapshot(snapshot)
+        except (OSError, SnapshotError) as exc:
+            logger.warning("Ignoring snapshot, parsing %s: %s", path, exc)
+    return load_jsonl(path)
@@ -0,0 +1,89 @@
+"""Memoized markup for the quiz screens.
+
+The HTML for an answered question depends only on its options, in the
+order shown, and the option the player picked, so it is built (and
+escaped) once per combination and served from a bounded LRU afterwards.
+The start screen's level list is cached the same way. Entries are keyed
+on text, never on a bank, so the caches do not keep evicted or reloaded
+content packs alive.
+"""
+import math
+from functools import lru_cache
+from html import escape
+
+CARD_CACHE_SIZE = 4096
+LEVEL_CACHE_SIZE = 256
+
+
+def _text(value):
+    return escape(value, quote=False)
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def answered_options(options, correct, selected):
+    """One ``<div>`` per option, marking the correct and the chosen answer."""
+    rows = []
+    for i, option in enumerate(options):
+        if i == correct:
+            rows.append(f'<div class="correct-answer">{_text(option)} ✓</div>')
+        elif i == selected:
+            rows.append(f'<div class="incorrect-answer">{_text(option)} ✗</div>')
+        else:
+            rows.append(f'<div class="option-button">{_text(option)}</div>')
+    return tuple(rows)
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def explanation(text):
+    return f'<div class="explanation">{_text(text)}</div>'
+
+
+@lru_cache(maxsize=LEVEL_CACHE_SIZE)
+def level_title(flag, name):
+    return f'<span class="level-title">{flag} Level: {_text(name)}</span>'
+
+
+def level_list(levels):
+    """Markdown lines for the start screen's list of levels."""
+    return _level_list(tuple((level.flag, level.name, level.description) for level in levels))
+
+
+@lru_cache(maxsize=16)
+def _level_list(levels):
+    return tuple(
+        f"**{i}. {flag} {name}:** {description}"
+        for i, (flag, name, description) in enumerate(levels, 1)
+    )
+
+
+def typed_answer(typed, correct_answer, is_correct):
+    """Result rows for a typed answer; not cached since ``typed`` is free text."""
+    if is_correct:
+        return (f'<div class="correct-answer">{_text(typed)} ✓</div>',)
+    return (
+        f'<div class="incorrect-answer">{_text(typed)} ✗</div>',
+        f'<div class="correct-answer">{_text(correct_answer)} ✓</div>',
+    )
+
+
+def countdown(seconds_left, limit):
+    """Time bar for a timed question; not cached since it changes every second."""
+    width = 100 * seconds_left / limit if limit else 0
+    urgent = " countdown-urgent" if seconds_left <= 5 else ""
+    return (
+        f'<div class="countdown{urgent}"><div class="countdown-bar" style="width: {width:.0f}%"></div>'
+        f'<span>{math.ceil(seconds_left)} s</span></div>'
+    )
+
+
+def clear():
+    for cached in (answered_options, explanation, level_title, _level_list):
+        cached.cache_clear()
+
+
+def leaderboard_rows(results):
+    """Table rows for a board's top results, shown as data: names are user input."""
+    return [
+        {"Rank": rank, "Player": result.name, "Score": f"{result.score}/{result.total} ({result.percentage:.0f}%)"}
+        for rank, result in enumerate(results, 1)
+    ]
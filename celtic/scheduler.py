@@ -0,0 +1,120 @@
+"""Spaced-repetition ordering for adaptive review.
+
+Cards follow the SM-2 algorithm: every answer is graded, which updates
+the card's easiness factor and review interval and sets the time it is
+next due. Due times live in a binary heap, so picking the next question
+is O(log n) however many cards a learner has. Stale heap entries left by
+re-graded cards are skipped lazily when they reach the top.
+"""
+import heapq
+
+DAY = 86400.0
+# A missed card comes back after this many seconds, i.e. later in the same round
+RELEARN_DELAY = 60.0
+MIN_EASINESS = 1.3
+
+# SM-2 grades used for quiz answers
+GRADE_CORRECT = 4
+GRADE_INCORRECT = 1
+
+
+class Card:
+    __slots__ = ("qid", "easiness", "interval", "repetitions", "due")
+
+    def __init__(self, qid, due=0.0):
+        self.qid = qid
+        self.easiness = 2.5
+        self.interval = 0.0
+        self.repetitions = 0
+        self.due = due
+
+
+def sm2(card, grade, now):
+    """Apply one SM-2 review with ``grade`` (0-5) at time ``now``."""
+    if grade >= 3:
+        if card.repetitions == 0:
+            card.interval = 1.0
+        elif card.repetitions == 1:
+            card.interval = 6.0
+        else:
+            card.interval = round(card.interval * card.easiness)
+        card.repetitions += 1
+        card.due = now + card.interval * DAY
+    else:
+        card.repetitions = 0
+        card.interval = 0.0
+        card.due = now + RELEARN_DELAY
+    miss = 5 - grade
+    card.easiness = max(MIN_EASINESS, card.easiness + 0.1 - miss * (0.08 + miss * 0.02))
+    return card
+
+
+class ReviewScheduler:
+    """Orders a pool of question ids by when each is next due.
+
+    New cards are all due immediately and keep their given order, so a
+    learner with no history sees questions in the usual sequence.
+    """
+
+    def __init__(self, qids):
+        self._cards = {}
+        # The heap entry for each card that is still current, by sequence number
+        self._live = {}
+        self._heap = []
+        self._seq = 0
+        for qid in qids:
+            self._cards[qid] = Card(qid)
+            self._live[qid] = self._seq
+            self._heap.append((0.0, self._seq, qid))
+            self._seq += 1
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __contains__(self, qid):
+        return qid in self._cards
+
+    def card(self, qid):
+        return self._cards[qid]
+
+    def review(self, qid, grade, now):
+        card = sm2(self._cards[qid], grade, now)
+        self._push(card)
+        return card
+
+    def seed(self, events):
+        """Replay past ``(qid, correct, answered_at)`` answers for cards in this pool."""
+        for qid, correct, answered_at in events:
+            if qid in self._cards:
+                self.review(qid, GRADE_CORRECT if correct else GRADE_INCORRECT, answered_at)
+
+    def next_due(self, exclude=None):
+        """The card due soonest, avoiding ``exclude`` when another card exists."""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        top = self._heap[0]
+        if top[2] != exclude or len(self._cards) == 1:
+            return top[2]
+        # Look past the excluded card without losing it
+        heapq.heappop(self._heap)
+        self._drop_stale()
+        qid = self._heap[0][2] if self._heap else exclude
+        heapq.heappush(self._heap, top)
+        return qid
+
+    def _push(self, card):
+        self._live[card.qid] = self._seq
+        heapq.heappush(self._heap, (card.due, self._seq, card.qid))
+        self._seq += 1
+        # Rebuild once superseded entries outnumber live ones
+        if len(self._heap) > 2 * len(self._cards) + 64:
+            self._heap = [entry for entry in self._heap if self._live[entry[2]] == entry[1]]
+            heapq.heapify(self._heap)
+
+    def _drop_stale(self):
+        heap = self._heap
+        live = self._live
+        while heap and live[heap[0][2]] != heap[0][1]:
+            heapq.heappop(heap)
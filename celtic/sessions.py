@@ -0,0 +1,330 @@
+"""Game sessions kept outside the Streamlit process.
+
+Streamlit holds ``st.session_state`` in the memory of the worker that
+owns the websocket, so a player whose connection lands on another worker
+would start over. With a ``SessionStore`` every state change is written
+under the player's token and each rerun picks up a newer copy written by
+any other worker, so several app processes can sit behind a load
+balancer without sticky sessions.
+
+Sessions are encoded with ``dumps``, a versioned little-endian format of
+about a hundred bytes plus the answers given in the current level,
+compressed once it grows past ``COMPRESS_OVER`` bytes. Earlier answers
+are the progress store's to keep: ``loads`` takes them as ``history``. ``SQLiteSessionStore`` shares one
+WAL-mode database between the processes on a host; each save bumps a
+per-player revision so a rerun only reads state that is newer than its
+own.
+"""
+import math
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from celtic.engine import ADAPTIVE, CHOICE, GAME_COMPLETE, LEVEL_COMPLETE, LINEAR, PLAYING, START, TYPED, GameSession
+
+MAGIC = b"CS"
+VERSION = 4
+COMPRESSED = 1
+COMPRESS_OVER = 512
+
+STATES = (START, PLAYING, LEVEL_COMPLETE, GAME_COMPLETE)
+ORDERS = (LINEAR, ADAPTIVE)
+ANSWER_MODES = (CHOICE, TYPED)
+
+HEADER = struct.Struct("<2sBB")
+FIELDS = struct.Struct("<BBBHIIIhbdidI")
+HISTORY_ENTRY = struct.Struct("<IBd")
+NO_SELECTION = -32768
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    player TEXT PRIMARY KEY,
+    rev INTEGER NOT NULL,
+    state BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class SessionFormatError(ValueError):
+    pass
+
+
+class _Writer:
+    __slots__ = ("parts",)
+
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, fmt, *values):
+        self.parts.append(fmt.pack(*values))
+
+    def text(self, value):
+        data = value.encode("utf-8")
+        self.parts.append(struct.pack("<I", len(data)) + data)
+
+    def raw(self, data):
+        self.parts.append(struct.pack("<I", len(data)))
+        self.parts.append(data)
+
+    def getvalue(self):
+        return b"".join(self.parts)
+
+
+class _Reader:
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def unpack(self, fmt):
+        values = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def raw(self):
+        (length,) = struct.unpack_from("<I", self.data, self.pos)
+        start = self.pos + 4
+        self.pos = start + length
+        if self.pos > len(self.data):
+            raise SessionFormatError("truncated session")
+        return self.data[start:self.pos]
+
+    def text(self):
+        return bytes(self.raw()).decode("utf-8")
+
+
+def _level_answers(game):
+    """The run of answers at the end of the history given in the current level."""
+    if game.state == START:
+        return []
+    bank = game.bank
+    start = len(game.history)
+    while start:
+        key = game.history[start - 1][0]
+        if key not in bank or bank.level_of[bank.qid(key)] != game.level:
+            break
+        start -= 1
+    return game.history[start:]
+
+
+def _merge_history(stored, carried):
+    """``stored`` answers followed by ``carried``, dropping the store's own copies of them."""
+    if not carried:
+        return list(stored)
+    # The store stamps an answer just after the engine does, so its copies
+    # of the carried answers are the rows from the first carried one on
+    first = carried[0][2]
+    return [row for row in stored if row[2] < first] + carried
+
+
+def dumps(game):
+    """Encode everything needed to continue ``game`` in another process."""
+    out = _Writer()
+    fun_fact = game.fun_facts.index(game.fun_fact) if game.fun_fact in game.fun_facts else -1
+    out.pack(
+        FIELDS,
+        STATES.index(game.state),
+        ORDERS.index(game.order),
+        ANSWER_MODES.index(game.answer_mode),
+        game.level,
+        game.question,
+        game.score,
+        game.level_base,
+        NO_SELECTION if game.selected is None else game.selected,
+        -1 if game.is_correct is None else int(game.is_correct),
+        math.nan if game.shown_at is None else game.shown_at,
+        fun_fact,
+        game.time_limit or 0.0,
+        game.points,
+    )
+    has_current = game.scheduler is not None and game.current is not None
+    out.text(game.bank.keys[game.current] if has_current else "")
+    out.text("" if game.typed is None else game.typed)
+    options, correct = game.deck.dump() if game.deck is not None else (b"", b"")
+    out.raw(options)
+    out.raw(correct)
+
+    # This level's answers with each question key written once
+    keys = {}
+    entries = []
+    for key, is_correct, answered_at in _level_answers(game):
+        index = keys.setdefault(key, len(keys))
+        entries.append(HISTORY_ENTRY.pack(index, int(is_correct), answered_at))
+    out.raw("\n".join(keys).encode("utf-8"))
+    out.raw(b"".join(entries))
+
+    payload = out.getvalue()
+    flags = 0
+    if len(payload) > COMPRESS_OVER:
+        payload = zlib.compress(payload, 1)
+        flags |= COMPRESSED
+    return HEADER.pack(MAGIC, VERSION, flags) + payload
+
+
+def loads(data, catalog, fun_facts=(), dealer=None, rng=None, history=()):
+    """A ``GameSession`` continued from ``dumps`` output.
+
+    ``history`` is the player's stored answers (``ProgressStore.answer_history``),
+    which the session's own answers for the current level complete.
+
+    Raises ``SessionFormatError`` if the data is damaged or no longer
+    fits the content (for instance after a level was removed).
+    """
+    try:
+        magic, version, flags = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise SessionFormatError("not a session of this version")
+        payload = data[HEADER.size:]
+        if flags & COMPRESSED:
+            payload = zlib.decompress(payload)
+        src = _Reader(memoryview(payload))
+        (state, order, answer_mode, level, question, score, level_base,
+         selected, is_correct, shown_at, fun_fact, time_limit, points) = src.unpack(FIELDS)
+        current = src.text()
+        typed = src.text()
+        options = bytes(src.raw())
+        correct = bytes(src.raw())
+        keys = bytes(src.raw()).decode("utf-8").split("\n")
+        carried = [
+            (keys[index], bool(answered), answered_at)
+            for index, answered, answered_at in HISTORY_ENTRY.iter_unpack(src.raw())
+        ]
+        state = STATES[state]
+        order = ORDERS[order]
+        answer_mode = ANSWER_MODES[answer_mode]
+    except (struct.error, zlib.error, IndexError, UnicodeDecodeError) as exc:
+        raise SessionFormatError(f"damaged session: {exc}") from None
+
+    history = _merge_history(history, carried)
+    game = GameSession(catalog, fun_facts, rng, order=order, history=history, dealer=dealer)
+    game.answer_mode = answer_mode
+    game.time_limit = time_limit or None
+    if 0 <= fun_fact < len(fun_facts):
+        game.fun_fact = fun_facts[fun_fact]
+    if state == START:
+        return game
+    if not 0 <= level < len(catalog.levels) or not 0 <= question < catalog.level_size(level):
+        raise SessionFormatError("session no longer fits the content")
+    # A finished level needs a next one to continue to
+    if state == LEVEL_COMPLETE and level + 1 >= len(catalog.levels):
+        raise SessionFormatError("session no longer fits the content")
+
+    game.state = state
+    game.level = level
+    game.score = level_base
+    # The level is rebuilt from content that may have changed since the
+    # save: a pack that no longer loads, dealt options or a current
+    # question that no longer fit all mean the session cannot continue
+    try:
+        game._enter_level()
+        if options:
+            deck_dealer = game.level_dealer()
+            if deck_dealer is not None:
+                game.deck = deck_dealer.load_deck(game.bank.level_questions(level), options, correct)
+        if game.scheduler is not None and current:
+            game.current = game.bank.qid(current)
+    except (KeyError, IndexError, ValueError, OSError) as exc:
+        raise SessionFormatError(f"session no longer fits the content: {exc}") from None
+    game.score = score
+    game.points = points
+    game.question = question
+    if selected != NO_SELECTION:
+        game.selected = selected
+        game.is_correct = bool(is_correct)
+        game.typed = typed if answer_mode == TYPED else None
+    if not math.isnan(shown_at):
+        game.shown_at = shown_at
+    return game
+
+
+class SessionStore:
+    """Interface for session backends."""
+
+    def load(self, player, newer_than=0):
+        """``(rev, data)`` for the player's saved session if its revision is above ``newer_than``."""
+        raise NotImplementedError
+
+    def save(self, player, data):
+        """Store ``data`` and return its new revision."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class NullSessionStore(SessionStore):
+    """Sessions stay in this process's memory only (the default)."""
+
+    def load(self, player, newer_than=0):
+        return None
+
+    def save(self, player, data):
+        return 0
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store, for tests and single-worker runs."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def load(self, player, newer_than=0):
+        with self._lock:
+            saved = self._sessions.get(player)
+        return saved if saved is not None and saved[0] > newer_than else None
+
+    def save(self, player, data):
+        with self._lock:
+            rev = self._sessions.get(player, (0,))[0] + 1
+            self._sessions[player] = (rev, data)
+        return rev
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite file shared by every worker process on the host."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection per script thread; the writes are tiny and synchronous
+        # because the player's next click may be served by another process
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, player, newer_than=0):
+        return self._connect().execute(
+            "SELECT rev, state FROM sessions WHERE player = ? AND rev > ?", (player, newer_than)
+        ).fetchone()
+
+    def save(self, player, data):
+        (rev,) = self._connect().execute(
+            "INSERT INTO sessions VALUES (?, 1, ?, ?) "
+            "ON CONFLICT (player) DO UPDATE SET rev = rev + 1, state = excluded.state, "
+            "updated_at = excluded.updated_at RETURNING rev",
+            (player, data, time.time()),
+        ).fetchone()
+        return rev
+
+
+def open_session_store(spec):
+    """The backend named by ``spec``: a SQLite path, ``memory``, or ``none`` to keep sessions in-process."""
+    if not spec or str(spec).lower() == "none":
+        return NullSessionStore()
+    if str(spec).lower() == "memory":
+        return MemorySessionStore()
+    return SQLiteSessionStore(spec)
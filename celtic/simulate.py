@@ -0,0 +1,90 @@
+"""Simulate complete games in-process with the headless engine.
+
+    python -m celtic.simulate --sessions 100000 --accuracy 0.7
+
+Each simulated player answers every question, picking the right option
+with probability ``accuracy``. The run reports throughput and checks
+that the engine's final score matches an independent tally.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from celtic.content import load_content
+from celtic.distractors import DistractorEngine
+from celtic.engine import GAME_COMPLETE, LEVEL_COMPLETE, GameSession
+
+CONTENT_DIR = Path(__file__).resolve().parent.parent / "content"
+
+
+def play(session, rng, accuracy):
+    """Play one full game and return the number of correct answers given."""
+    expected = 0
+    session.start()
+    while True:
+        qid = session.qid
+        correct_index = session.correct_index(qid)
+        if rng.random() < accuracy:
+            choice = correct_index
+        else:
+            wrong = [i for i in range(len(session.options(qid))) if i != correct_index]
+            choice = rng.choice(wrong) if wrong else correct_index
+        expected += choice == correct_index
+        session.check_answer(choice)
+        state = session.next_question()
+        if state == GAME_COMPLETE:
+            return expected
+        if state == LEVEL_COMPLETE:
+            session.next_level()
+
+
+def simulate(content, sessions, accuracy=0.7, seed=0, shuffle=False):
+    rng = random.Random(seed)
+    dealer = (lambda bank: bank.derived("distractors", DistractorEngine)) if shuffle else None
+    mismatches = 0
+    answered = 0
+    started = time.perf_counter()
+    for _ in range(sessions):
+        session = GameSession(content.bank, content.fun_facts, rng, dealer=dealer)
+        expected = play(session, rng, accuracy)
+        answered += session.total_questions
+        if session.score != expected:
+            mismatches += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "sessions": sessions,
+        "answers": answered,
+        "seconds": elapsed,
+        "sessions_per_second": sessions / elapsed if elapsed else float("inf"),
+        "answers_per_second": answered / elapsed if elapsed else float("inf"),
+        "score_mismatches": mismatches,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--accuracy", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--shuffle", action="store_true", help="deal shuffled options with distractors (needs NumPy)")
+    parser.add_argument("--questions", type=Path, default=CONTENT_DIR / "manifest.json",
+                        help="pack manifest or single-file question bank")
+    parser.add_argument("--fun-facts", type=Path, default=CONTENT_DIR / "fun_facts.json")
+    args = parser.parse_args(argv)
+
+    content = load_content(args.questions, args.fun_facts)
+    result = simulate(content, args.sessions, args.accuracy, args.seed, args.shuffle)
+    print(
+        f"{result['sessions']} sessions, {result['answers']} answers in {result['seconds']:.2f}s "
+        f"({result['sessions_per_second']:.0f} sessions/s, {result['answers_per_second']:.0f} answers/s)"
+    )
+    if result["score_mismatches"]:
+        print(f"{result['score_mismatches']} sessions finished with a wrong score", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""Precompiled question bank snapshots.
+
+Parsing JSON and compiling a bank costs several seconds per million
+questions. ``python -m celtic.validate --snapshot`` writes the compiled
+columns of a validated bank (or of each pack) to a ``.bank`` file next
+to the source, and loaders use it instead of the JSONL while it is
+fresh, i.e. while the source still has the size and modification time
+recorded in the snapshot. Copying content to another machine usually
+changes modification times, so rebuild snapshots after deploying.
+
+Layout: the magic ``CLTBNK01``, a u32 header length and a JSON header
+(levels, languages, answer pools, tags and the size of every section),
+then the sections back to back. Text columns are UTF-8 joined with NUL,
+so each column is read back with one ``split``; index columns are
+little-endian arrays loaded with ``frombytes``.
+"""
+import json
+import struct
+import sys
+from array import array
+from itertools import islice, repeat
+from pathlib import Path
+
+from celtic.question_bank import BankError, Level, QuestionBank
+
+MAGIC = b"CLTBNK01"
+VERSION = 1
+SUFFIX = ".bank"
+SEP = "\0"
+LENGTH = struct.Struct("<I")
+
+_SWAP = sys.byteorder == "big"
+
+
+class SnapshotError(BankError):
+    pass
+
+
+def _join(strings):
+    return SEP.join(strings).encode("utf-8")
+
+
+def _split(data, count):
+    if not count:
+        return []
+    strings = bytes(data).decode("utf-8").split(SEP)
+    if len(strings) != count:
+        raise SnapshotError(f"text column holds {len(strings)} entries, expected {count}")
+    return strings
+
+
+def _le(values):
+    if _SWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _array(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if _SWAP:
+        values.byteswap()
+    return values
+
+
+def snapshot_path(source):
+    return Path(source).with_suffix(SUFFIX)
+
+
+def source_stamp(source):
+    """Size and modification time identifying the version of ``source`` a snapshot was built from."""
+    stat = Path(source).stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+# Writing
+def encode_chunk(records):
+    """Columns for a run of validated question records, to pass to ``SnapshotBuilder.add``.
+
+    Answer pools and tags are numbered within the chunk; a pool whose
+    answer language is not given is resolved from the level when written.
+    """
+    pools = {}
+    pool_of = array("I")
+    tags = {}
+    for i, record in enumerate(records):
+        pool = (record.get("answer_language") or None, record.get("pos") or "")
+        pool_of.append(pools.setdefault(pool, len(pools)))
+        for tag in record.get("tags") or ():
+            tags.setdefault(tag, array("I")).append(i)
+    options = [record["options"] for record in records]
+    accepted = [record.get("accepted") or () for record in records]
+    return {
+        "count": len(records),
+        "keys": _join(record["id"] for record in records),
+        "texts": _join(record["question"] for record in records),
+        "explanations": _join(record.get("explanation") or "" for record in records),
+        "option_counts": bytes(len(opts) for opts in options),
+        "options": _join(option for opts in options for option in opts),
+        "accepted_counts": bytes(len(acc) for acc in accepted),
+        "accepted": _join(text for acc in accepted for text in acc),
+        "correct": bytes(opts.index(record["correct_answer"]) for opts, record in zip(options, records)),
+        "level_of": _le(array("H", (record["level"] for record in records))),
+        "pools": list(pools),
+        "pool_of": pool_of,
+        "tags": tags,
+    }
+
+
+class SnapshotBuilder:
+    """Collects encoded chunks in question order and writes them as one snapshot.
+
+    ``stamp`` is the ``source_stamp`` of the source taken before it was
+    read, so an edit made while it is checked leaves the snapshot stale.
+    """
+
+    def __init__(self, stamp=None):
+        self.stamp = stamp
+        self.chunks = []
+        self.count = 0
+
+    def add(self, chunk):
+        if chunk["count"]:
+            self.chunks.append(chunk)
+            self.count += chunk["count"]
+
+    def keys(self):
+        return [key for chunk in self.chunks for key in _split(chunk["keys"], chunk["count"])]
+
+    def level_of(self):
+        return _array("H", b"".join(chunk["level_of"] for chunk in self.chunks))
+
+    def _text(self, name, counts=None):
+        parts = []
+        for chunk in self.chunks:
+            count = chunk["count"] if counts is None else sum(chunk[counts])
+            if count:
+                parts.append(chunk[name])
+        return b"\0".join(parts)
+
+    def write(self, path, levels):
+        """Write the snapshot; ``levels`` are dicts with name, flag, description and language."""
+        n = self.count
+        levels = [{name: lv[name] for name in ("name", "flag", "description", "language")} for lv in levels]
+        languages = sorted({lv["language"] for lv in levels})
+        level_lang = [lv["language"] for lv in levels]
+        level_of = self.level_of()
+
+        by_level = [array("I") for _ in levels]
+        for qid, level in enumerate(level_of):
+            by_level[level].append(qid)
+        if len(languages) == 1:
+            language_of = bytes(n)
+            by_language = {languages[0]: array("I", range(n))}
+        else:
+            lang_index = [languages.index(code) for code in level_lang]
+            language_of = bytes(lang_index[level] for level in level_of)
+            by_language = {
+                code: array("I", sorted(qid for lv, qids in enumerate(by_level) if level_lang[lv] == code for qid in qids))
+                for code in languages
+            }
+
+        # Renumber the chunks' pools and tags for the whole bank
+        pools = {}
+        pool_of = array("I")
+        tags = {}
+        base = 0
+        for chunk in self.chunks:
+            if len(languages) == 1 or all(lang is not None for lang, _ in chunk["pools"]):
+                local = [pools.setdefault((lang or languages[0], pos), len(pools)) for lang, pos in chunk["pools"]]
+                pool_of.extend(local[p] for p in chunk["pool_of"])
+            else:
+                chunk_levels = level_of[base:base + chunk["count"]]
+                for p, level in zip(chunk["pool_of"], chunk_levels):
+                    lang, pos = chunk["pools"][p]
+                    pool_of.append(pools.setdefault((lang or level_lang[level], pos), len(pools)))
+            for tag, qids in chunk["tags"].items():
+                tags.setdefault(tag, array("I")).extend(qid + base for qid in qids)
+            base += chunk["count"]
+
+        tag_names = sorted(tags)
+        sections = [
+            ("keys", self._text("keys")),
+            ("texts", self._text("texts")),
+            ("explanations", self._text("explanations")),
+            ("option_counts", b"".join(chunk["option_counts"] for chunk in self.chunks)),
+            ("options", self._text("options", "option_counts")),
+            ("accepted_counts", b"".join(chunk["accepted_counts"] for chunk in self.chunks)),
+            ("accepted", self._text("accepted", "accepted_counts")),
+            ("correct", b"".join(chunk["correct"] for chunk in self.chunks)),
+            ("level_of", _le(level_of)),
+            ("language_of", language_of),
+            ("pool_of", _le(pool_of)),
+        ]
+        sections += [(f"level_{i}", _le(qids)) for i, qids in enumerate(by_level)]
+        sections += [(f"language_{code}", _le(by_language[code])) for code in languages]
+        sections += [(f"tag_{i}", _le(tags[tag])) for i, tag in enumerate(tag_names)]
+        header = {
+            "version": VERSION,
+            "count": n,
+            "levels": levels,
+            "languages": languages,
+            "pools": list(pools),
+            "tags": tag_names,
+            "source": self.stamp,
+            "sections": [[name, len(data)] for name, data in sections],
+        }
+        header = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            f.write(MAGIC + LENGTH.pack(len(header)) + header)
+            for _, data in sections:
+                f.write(data)
+        tmp_path.replace(path)
+        return path
+
+
+# Reading
+def _header(data, path):
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise SnapshotError(f"{path}: not a question bank snapshot")
+    (length,) = LENGTH.unpack_from(data, len(MAGIC))
+    start = len(MAGIC) + LENGTH.size
+    try:
+        header = json.loads(bytes(data[start:start + length]).decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise SnapshotError(f"{path}: damaged header: {exc}") from None
+    if header.get("version") != VERSION:
+        raise SnapshotError(f"{path}: snapshot version {header.get('version')} is not supported")
+    return header, start + length
+
+
+def fresh_snapshot(source):
+    """The snapshot beside ``source`` if it was built from the current file, else None."""
+    path = snapshot_path(source)
+    try:
+        with path.open("rb") as f:
+            head = f.read(len(MAGIC) + LENGTH.size)
+            if len(head) < len(MAGIC) + LENGTH.size:
+                return None
+            header, _ = _header(head + f.read(LENGTH.unpack_from(head, len(MAGIC))[0]), path)
+        return path if header["source"] == source_stamp(source) else None
+    except (OSError, SnapshotError):
+        return None
+
+
+def read_snapshot(path, levels=None, first=0):
+    """A ``QuestionBank`` from a snapshot.
+
+    Pack snapshots hold their own levels only: pass the catalog's
+    ``levels`` and the pack's ``first`` level index to place them.
+    """
+    path = Path(path)
+    data = memoryview(path.read_bytes())
+    header, pos = _header(data, path)
+    sections = {}
+    for name, size in header["sections"]:
+        sections[name] = data[pos:pos + size]
+        pos += size
+    if pos != len(data):
+        raise SnapshotError(f"{path}: truncated or padded snapshot")
+
+    n = header["count"]
+    stored = header["levels"]
+    if levels is None:
+        levels = [Level(i, lv["name"], lv["flag"], lv["description"], lv["language"]) for i, lv in enumerate(stored)]
+    elif first + len(stored) > len(levels) or any(
+        levels[first + i].language != lv["language"] for i, lv in enumerate(stored)
+    ):
+        raise SnapshotError(f"{path}: levels do not match the catalog")
+    bank = QuestionBank(levels)
+    try:
+        bank.keys = _split(sections["keys"], n)
+        bank.texts = _split(sections["texts"], n)
+        bank.explanations = _split(sections["explanations"], n)
+
+        counts = bytes(sections["option_counts"])
+        flat = iter(_split(sections["options"], sum(counts)))
+        if n and counts.count(counts[0]) == n:
+            bank.options = list(zip(*[flat] * counts[0]))
+        else:
+            bank.options = list(map(tuple, map(islice, repeat(flat), counts)))
+        counts = bytes(sections["accepted_counts"])
+        total = sum(counts)
+        if total:
+            flat = iter(_split(sections["accepted"], total))
+            bank.accepted = list(map(tuple, map(islice, repeat(flat), counts)))
+        else:
+            bank.accepted = [()] * n
+
+        bank.correct = array("B", sections["correct"])
+        bank.level_of = _array("H", sections["level_of"])
+        if first:
+            bank.level_of = array("H", (level + first for level in bank.level_of))
+        # Language numbers follow the sorted codes, which differ in a catalog
+        table = bytes(bank.languages.index(code) for code in header["languages"]).ljust(256, b"\0")
+        bank.language_of = array("B", bytes(sections["language_of"]).translate(table))
+        bank.pools = [tuple(pool) for pool in header["pools"]]
+        bank._pool_ids = {pool: i for i, pool in enumerate(bank.pools)}
+        bank.pool_of = _array("I", sections["pool_of"])
+        bank._by_key = dict(zip(bank.keys, range(n)))
+        for i in range(len(stored)):
+            bank._by_level[first + i] = _array("I", sections[f"level_{i}"])
+        for code in header["languages"]:
+            bank._by_language[code] = _array("I", sections[f"language_{code}"])
+        bank._by_tag = {tag: _array("I", sections[f"tag_{i}"]) for i, tag in enumerate(header["tags"])}
+    except (KeyError, ValueError, UnicodeDecodeError) as exc:
+        if isinstance(exc, SnapshotError):
+            raise
+        raise SnapshotError(f"{path}: damaged snapshot: {exc}") from None
+    if len(bank._by_key) != n or len(bank.options) != n or len(bank.correct) != n:
+        raise SnapshotError(f"{path}: columns do not match the question count")
+    bank._finish()
+    return bank
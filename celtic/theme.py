@@ -0,0 +1,156 @@
+"""Static page markup shared by every rerun.
+
+Kept in an imported module so the strings are built once per process
+rather than on every script execution.
+"""
+from functools import lru_cache
+from html import escape
+
+CSS = """
+    <style>
+        .main {
+            background-color: #1e3d2f;
+            color: white;
+        }
+        .stButton button {
+            background-color: #49976d;
+            color: white;
+            font-weight: bold;
+            border-radius: 20px;
+            padding: 0.5rem 1rem;
+            border: none;
+        }
+        .stButton button:hover {
+            background-color: #3a7857;
+        }
+        .game-container {
+            background-color: #2c5840;
+            color: white;
+            padding: 2rem;
+            border-radius: 10px;
+            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.3);
+        }
+        .correct-answer {
+            background-color: #2c5840;
+            padding: 1rem;
+            border-radius: 5px;
+            border-left: 5px solid #8bcea0;
+            color: white;
+        }
+        .incorrect-answer {
+            background-color: #344d3f;
+            padding: 1rem;
+            border-radius: 5px;
+            border-left: 5px solid #e57373;
+            color: white;
+        }
+        .explanation {
+            background-color: #1a4731;
+            padding: 1rem;
+            border-radius: 5px;
+            margin-top: 1rem;
+            color: #e0e0e0;
+        }
+        .level-title {
+            color: #8bcea0;
+            font-weight: bold;
+        }
+        .question-counter {
+            font-size: 0.9rem;
+            color: #555;
+            margin-bottom: 1rem;
+        }
+        .header-container {
+            background: linear-gradient(90deg, #1a4731, #0d2419);
+            padding: 1.5rem;
+            border-radius: 10px;
+            color: white;
+            margin-bottom: 1.5rem;
+            text-align: center;
+        }
+        .flag-icon {
+            font-size: 1.5rem;
+            margin-right: 0.5rem;
+        }
+        .option-button {
+            background-color: #3a7857;
+            border: 1px solid #49976d;
+            padding: 10px;
+            border-radius: 5px;
+            margin-bottom: 10px;
+            cursor: pointer;
+            transition: background-color 0.3s;
+            color: white;
+        }
+        .option-button:hover {
+            background-color: #49976d;
+        }
+        .score-display {
+            font-size: 1.2rem;
+            font-weight: bold;
+            color: #8bcea0;
+            margin-top: 1rem;
+        }
+        .countdown {
+            position: relative;
+            background-color: #1a4731;
+            border-radius: 5px;
+            height: 1.6rem;
+            margin-bottom: 1rem;
+            overflow: hidden;
+        }
+        .countdown-bar {
+            background-color: #49976d;
+            height: 100%;
+            transition: width 1s linear;
+        }
+        .countdown-urgent .countdown-bar {
+            background-color: #e57373;
+        }
+        .countdown span {
+            position: absolute;
+            top: 0.2rem;
+            right: 0.6rem;
+            font-weight: bold;
+            color: white;
+        }
+        .fun-fact {
+            background-color: #1a4731;
+            padding: 1rem;
+            border-radius: 5px;
+            border-left: 5px solid #8bcea0;
+            margin-top: 1rem;
+            color: #e0e0e0;
+        }
+    </style>
+"""
+
+HEADER = """
+    <div class="header-container">
+        <h1>Celtic Language Explorer</h1>
+        <p>Learn Irish, Scottish Gaelic, Welsh, and Breton</p>
+        <div style="font-size: 1.5rem;">🍀 🏴󠁧󠁢󠁳󠁣󠁴󠁿 🏴󠁧󠁢󠁷󠁬󠁳󠁿 🇮🇪</div>
+    </div>
+"""
+
+
+@lru_cache(maxsize=8)
+def header(languages):
+    """``HEADER`` for the ``(name, flag)`` languages a content manifest offers."""
+    names = [escape(name, quote=False) for name, _ in languages]
+    listed = names[0] if len(names) == 1 else f"{', '.join(names[:-1])}, and {names[-1]}"
+    flags = " ".join(["🍀", *(flag for _, flag in languages)])
+    return f"""
+    <div class="header-container">
+        <h1>Celtic Language Explorer</h1>
+        <p>Learn {listed}</p>
+        <div style="font-size: 1.5rem;">{flags}</div>
+    </div>
+"""
+
+FOOTER = """
+<div style="text-align: center; margin-top: 2rem; padding: 1rem; font-size: 0.8rem; color: #8bcea0;">
+    Celtic Language Explorer © 2025<br>
+    Created with Streamlit
+</div>
+"""
@@ -0,0 +1,332 @@
+"""Validate question content and build snapshots for fast startup.
+
+    python -m celtic.validate content/manifest.json [--snapshot] [--jobs N]
+    python -m celtic.validate questions.jsonl [--snapshot]
+
+Checks every question of a JSONL bank, or of every pack a manifest
+lists, and prints each problem with its file and line:
+
+* required fields and their types, unique question ids
+* ``correct_answer`` is one of the ``options``
+* options are unique (they double as button keys) and non-empty
+* question and explanation text holds no HTML; the app shows it as
+  plain text, so markup would appear literally, and script, event
+  handler or ``javascript:`` content is reported as unsafe
+* levels exist, and a manifest's question counts match its packs
+
+Files are cut into chunks of whole lines that a process pool parses and
+checks in parallel. With ``--snapshot`` and no errors, each source gets
+a precompiled ``.bank`` file beside it (see ``celtic.snapshot``) that
+the app loads instead of the JSONL.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from celtic.packs import load_catalog
+from celtic.question_bank import BankError
+from celtic.snapshot import SEP, SnapshotBuilder, encode_chunk, snapshot_path, source_stamp
+
+CHUNK_BYTES = 4 << 20
+MAX_OPTIONS = 255
+# Level indexes are stored as unsigned 16-bit numbers
+MAX_LEVEL = 0xFFFF
+MAX_REPORTED = 50
+_UNPARSED = object()
+
+TAG = re.compile(r"<\s*/?\s*[a-zA-Z!][^>]*>")
+UNSAFE = re.compile(r"<\s*/?\s*(script|iframe|object|embed|style|link|meta|svg|math)\b|\son\w+\s*=|javascript:", re.I)
+
+
+class Problems:
+    """Errors found so far, as ``(location, message)`` in the order found."""
+
+    def __init__(self):
+        self.errors = []
+
+    def add(self, location, message):
+        self.errors.append((location, message))
+
+    def __len__(self):
+        return len(self.errors)
+
+    def report(self, out=sys.stderr, limit=MAX_REPORTED):
+        for location, message in self.errors[:limit]:
+            print(f"{location}: {message}", file=out)
+        if len(self.errors) > limit:
+            print(f"... and {len(self.errors) - limit} more", file=out)
+
+
+def _markup(field, value):
+    unsafe = UNSAFE.search(value)
+    if unsafe:
+        return f"{field} contains unsafe HTML ({unsafe.group(0).strip()!r})"
+    tag = TAG.search(value)
+    if tag:
+        return f"{field} contains HTML markup ({tag.group(0)!r}), which is shown as plain text"
+    return None
+
+
+def _strings(values):
+    return type(values) is list and all(type(v) is str and v.strip() for v in values)
+
+
+def check_question(record):
+    """Problems with one question record, as messages; empty if it is valid."""
+    # Written for speed: this runs once per question of banks with millions
+    problems = []
+    texts = []
+    for field in ("id", "question"):
+        value = record.get(field)
+        if type(value) is not str or not value.strip():
+            problems.append(f"{field} must be a non-empty string")
+        else:
+            texts.append(value)
+    for field in ("explanation", "pos", "answer_language"):
+        value = record.get(field)
+        if value is not None:
+            if type(value) is not str:
+                problems.append(f"{field} must be a string")
+            else:
+                texts.append(value)
+    for field in ("tags", "accepted"):
+        values = record.get(field)
+        if values is not None:
+            if not _strings(values):
+                problems.append(f"{field} must be a list of non-empty strings")
+            else:
+                texts.extend(values)
+    level = record.get("level")
+    if type(level) is not int or not 0 <= level <= MAX_LEVEL:
+        problems.append("level must be a level index")
+
+    options = record.get("options")
+    if not _strings(options):
+        problems.append("options must be a list of non-empty strings")
+    elif not 2 <= len(options) <= MAX_OPTIONS:
+        problems.append(f"needs 2 to {MAX_OPTIONS} options, has {len(options)}")
+    else:
+        texts.extend(options)
+        if len(set(options)) != len(options):
+            seen = set()
+            repeated = [o for o in options if o in seen or seen.add(o)]
+            problems.append(f"options repeat {repeated[0]!r}")
+        if record.get("correct_answer") not in options:
+            problems.append(f"correct_answer {record.get('correct_answer')!r} is not one of the options")
+
+    for field in ("question", "explanation"):
+        value = record.get(field)
+        if type(value) is str and "<" in value:
+            problem = _markup(field, value)
+            if problem:
+                problems.append(problem)
+    # Snapshots separate strings with NUL
+    if SEP in "".join(texts):
+        problems.append("text contains a NUL character")
+    return problems
+
+
+def check_chunk(task):
+    """Parse and check one run of lines; runs in a pool worker.
+
+    Returns ``(errors, level records, question line numbers, encoded chunk)``
+    with line numbers relative to the file.
+    """
+    first_line, data = task
+    errors = []
+    levels = []
+    lines = []
+    records = []
+    numbered = [
+        (lineno, line)
+        for lineno, line in enumerate(data.decode("utf-8", errors="replace").split("\n"), first_line)
+        if line.strip()
+    ]
+    try:
+        # One parse for the whole chunk; any syntax error sends it line by line
+        parsed = json.loads("[" + ",".join(line for _, line in numbered) + "]")
+        if len(parsed) != len(numbered):
+            raise ValueError("records span lines")
+    except ValueError:
+        parsed = []
+        for lineno, line in numbered:
+            try:
+                parsed.append(json.loads(line))
+            except json.JSONDecodeError as exc:
+                errors.append((lineno, str(exc)))
+                parsed.append(_UNPARSED)
+    for (lineno, _), record in zip(numbered, parsed):
+        if record is _UNPARSED:
+            continue
+        if not isinstance(record, dict):
+            errors.append((lineno, "expected a JSON object"))
+            continue
+        kind = record.get("kind", "question")
+        if kind == "level":
+            levels.append((lineno, record))
+        elif kind != "question":
+            errors.append((lineno, f"unknown record kind {kind!r}"))
+        else:
+            problems = check_question(record)
+            if problems:
+                errors.extend((lineno, problem) for problem in problems)
+            else:
+                lines.append(lineno)
+                records.append(record)
+    return errors, levels, lines, encode_chunk(records)
+
+
+def _chunks(data, size=CHUNK_BYTES):
+    """``(first line number, bytes)`` runs of whole lines of about ``size`` bytes."""
+    start = 0
+    lineno = 1
+    while start < len(data):
+        end = data.find(b"\n", min(start + size, len(data)) - 1)
+        end = len(data) if end < 0 else end + 1
+        yield lineno, data[start:end]
+        lineno += data.count(b"\n", start, end)
+        start = end
+
+
+class Workers:
+    """Process pool for chunk checks, started the first time a file spans several chunks."""
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self._executor = None
+
+    def map(self, func, tasks, parallel=True):
+        if not parallel or self.jobs < 2:
+            return map(func, tasks)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+        return self._executor.map(func, tasks)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+def check_file(path, workers, problems):
+    """Check every line of ``path``.
+
+    Returns ``(level records, question line numbers, builder)``, the
+    builder holding the valid questions.
+    """
+    path = Path(path)
+    levels = []
+    lines = []
+    try:
+        builder = SnapshotBuilder(source_stamp(path))
+        data = path.read_bytes()
+    except OSError as exc:
+        problems.add(path, exc)
+        return levels, lines, SnapshotBuilder()
+    results = workers.map(check_chunk, _chunks(data), parallel=len(data) > CHUNK_BYTES)
+    for errors, chunk_levels, chunk_lines, chunk in results:
+        for lineno, message in errors:
+            problems.add(f"{path}:{lineno}", message)
+        levels.extend(chunk_levels)
+        lines.extend(chunk_lines)
+        builder.add(chunk)
+
+    # Checks across chunks: unique ids
+    first_seen = {}
+    for lineno, key in zip(lines, builder.keys()):
+        seen = first_seen.setdefault(key, lineno)
+        if seen != lineno:
+            problems.add(f"{path}:{lineno}", f"duplicate question id {key!r} (first on line {seen})")
+    return levels, lines, builder
+
+
+def _check_levels(path, lines, builder, count, describe, problems):
+    """Report questions whose level index is not below ``count``."""
+    level_of = builder.level_of()
+    if level_of and max(level_of) >= count:
+        for lineno, level in zip(lines, level_of):
+            if level >= count:
+                problems.add(f"{path}:{lineno}", f"question refers to unknown {describe} level {level}")
+
+
+def validate_bank(path, workers, problems):
+    """Check a single-file JSONL bank; returns ``[(snapshot path, levels, builder)]``."""
+    levels, lines, builder = check_file(path, workers, problems)
+    records = []
+    for lineno, record in levels:
+        missing = [field for field in ("name", "flag", "description", "language") if not isinstance(record.get(field), str)]
+        if missing:
+            problems.add(f"{path}:{lineno}", f"level is missing {', '.join(missing)}")
+        records.append(record)
+    if not records:
+        problems.add(path, "no level records")
+    _check_levels(path, lines, builder, len(records), "bank", problems)
+    return [(snapshot_path(path), records, builder)]
+
+
+def validate_manifest(path, workers, problems):
+    """Check a manifest and each of its packs; returns one snapshot job per pack."""
+    try:
+        catalog = load_catalog(path)
+    except (OSError, BankError) as exc:
+        problems.add(path, exc)
+        return []
+    jobs = []
+    for pack in catalog.packs:
+        levels, lines, builder = check_file(pack.path, workers, problems)
+        for lineno, _ in levels:
+            problems.add(f"{pack.path}:{lineno}", "levels belong in the manifest, not in a pack")
+        _check_levels(pack.path, lines, builder, pack.count, pack.name, problems)
+        found = [0] * pack.count
+        for level in builder.level_of():
+            if level < pack.count:
+                found[level] += 1
+        for i, size in enumerate(found):
+            level = catalog.levels[pack.first + i]
+            if size != catalog.sizes[level.index]:
+                problems.add(path, f"level {level.name!r} lists {catalog.sizes[level.index]} questions "
+                                   f"but {pack.path} has {size}; run `python -m celtic.packs --update`")
+        records = [
+            {"name": level.name, "flag": level.flag, "description": level.description, "language": level.language}
+            for level in catalog.levels[pack.first:pack.first + pack.count]
+        ]
+        jobs.append((snapshot_path(pack.path), records, builder))
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate question content and build startup snapshots.")
+    parser.add_argument("source", type=Path, help="pack manifest (.json) or JSONL question bank")
+    parser.add_argument("--snapshot", action="store_true", help="write a .bank snapshot beside each source")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    problems = Problems()
+    validate = validate_manifest if args.source.suffix == ".json" else validate_bank
+    # Files of a single chunk are checked in this process
+    workers = Workers(args.jobs)
+    try:
+        jobs = validate(args.source, workers, problems)
+    finally:
+        workers.close()
+    questions = sum(builder.count for *_, builder in jobs)
+
+    if problems:
+        problems.report()
+        print(f"{len(problems)} problems in {args.source}", file=sys.stderr)
+        return 1
+    print(f"{args.source}: {questions} questions OK ({time.perf_counter() - started:.2f}s)")
+    if args.snapshot:
+        for out, levels, builder in jobs:
+            builder.write(out, levels)
+            print(f"Wrote {out} ({out.stat().st_size / 1024:.1f} KiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
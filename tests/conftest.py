@@ -0,0 +1,92 @@
+import copy
+import json
+
+import pytest
+
+from celtic.question_bank import load_jsonl
+
+LEVELS = [
+    {"kind": "level", "name": "Beginner Irish", "flag": "🇮🇪", "description": "Greetings", "language": "ga"},
+    {"kind": "level", "name": "Beginner Welsh", "flag": "🏴", "description": "Greetings", "language": "cy"},
+]
+
+# Answer languages are given for some questions only, so a run of records
+# mixes explicit pools with pools resolved from each level's language
+QUESTIONS = [
+    {"id": "ga-hello", "level": 0, "tags": ["greeting"], "pos": "phrase", "answer_language": "ga",
+     "question": "How do you say 'Hello' in Irish?", "options": ["Dia duit", "Slán", "Go raibh maith agat"],
+     "correct_answer": "Dia duit", "accepted": ["Dia dhuit"], "explanation": "Literally 'God be with you'."},
+    {"id": "ga-slan", "level": 0, "tags": ["greeting"], "pos": "greeting", "answer_language": "en",
+     "question": "What does 'Slán' mean?", "options": ["Hello", "Thank you", "Goodbye", "Please"],
+     "correct_answer": "Goodbye", "explanation": "Used to say goodbye."},
+    {"id": "ga-night", "level": 0, "pos": "phrase",
+     "question": "How do you say 'Good night' in Irish?", "options": ["Oíche mhaith", "Maidin mhaith", "Slán"],
+     "correct_answer": "Oíche mhaith"},
+    {"id": "cy-morning", "level": 1, "tags": ["greeting"], "pos": "phrase",
+     "question": "How do you say 'Good morning' in Welsh?", "options": ["Bore da", "Nos da", "Diolch", "Croeso"],
+     "correct_answer": "Bore da", "explanation": "Pronounced 'bor-eh dah'."},
+    {"id": "cy-cymru", "level": 1, "tags": ["place"], "pos": "noun", "answer_language": "en",
+     "question": "What does 'Cymru' mean?", "options": ["Hello", "Wales", "Dragon", "Mountain"],
+     "correct_answer": "Wales", "explanation": "The Welsh name for Wales."},
+    {"id": "cy-hiraeth", "level": 1, "tags": ["culture"], "pos": "emotion", "answer_language": "en",
+     "question": "What does 'hiraeth' mean?", "options": ["Joy", "Courage", "Homesickness/longing", "Celebration"],
+     "correct_answer": "Homesickness/longing", "accepted": ["Homesickness", "Longing"],
+     "explanation": "A longing for home."},
+    {"id": "cy-thanks", "level": 1, "pos": "phrase",
+     "question": "How do you say 'Thank you' in Welsh?", "options": ["Diolch", "Croeso", "Hwyl"],
+     "correct_answer": "Diolch"},
+]
+
+
+@pytest.fixture
+def levels():
+    return copy.deepcopy(LEVELS)
+
+
+@pytest.fixture
+def questions():
+    return copy.deepcopy(QUESTIONS)
+
+
+@pytest.fixture
+def write_bank(tmp_path, levels, questions):
+    """Writes a JSONL bank into ``tmp_path``; the sample levels and questions by default."""
+
+    def write(name="questions.jsonl", levels=levels, questions=questions):
+        path = tmp_path / name
+        records = [*levels, *questions]
+        path.write_text("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records), encoding="utf-8")
+        return path
+
+    return write
+
+
+@pytest.fixture
+def bank_path(write_bank):
+    return write_bank()
+
+
+@pytest.fixture
+def bank(bank_path):
+    return load_jsonl(bank_path)
+
+
+@pytest.fixture
+def manifest_path(tmp_path, levels, questions):
+    """The sample content as a manifest with one single-level pack per language."""
+    (tmp_path / "packs").mkdir()
+    languages = []
+    for index, level in enumerate(levels):
+        code = level["language"]
+        pack = [dict(record, level=0) for record in questions if record["level"] == index]
+        (tmp_path / "packs" / f"{code}.jsonl").write_text(
+            "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in pack), encoding="utf-8"
+        )
+        languages.append({
+            "code": code, "name": level["name"], "flag": level["flag"], "pack": f"packs/{code}.jsonl",
+            "levels": [{"name": level["name"], "flag": level["flag"], "description": level["description"],
+                        "questions": len(pack)}],
+        })
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"languages": languages}, ensure_ascii=False), encoding="utf-8")
+    return path
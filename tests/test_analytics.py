@@ -0,0 +1,117 @@
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from celtic.analytics import (  # noqa: E402
+    TIME_COLUMNS, AnalyticsRecorder, NullAnalytics, QuestionStats, confusion, open_analytics, summary,
+)
+
+HELLO = ("Dia dhuit", "Slán", "Oíche mhaith")
+NIGHT = ("Oíche mhaith", "Maidin mhaith")
+
+
+def events():
+    """Answers as ``(key, options, answer, choice, correct, seconds)``."""
+    return [
+        ("ga-hello", HELLO, 0, 0, True, 0.5),
+        ("ga-hello", HELLO, 0, 1, False, 1.5),
+        ("ga-hello", HELLO, 0, 1, False, 4.0),
+        ("ga-hello", HELLO, 0, -1, False, 100.0),
+        ("ga-night", NIGHT, 0, 0, True, 1.0),
+        ("ga-night", NIGHT, 0, 12, False, 2.0),
+    ]
+
+
+def test_counts():
+    stats = QuestionStats()
+    stats.add(events())
+    table = stats.columns()
+    assert table["question"] == ["ga-hello", "ga-night"]
+    assert (table["answers"], table["correct"], table["seconds"]) == ([4, 2], [1, 1], [106.0, 3.0])
+    assert table["option_1"] == ["Slán", "Maidin mhaith"]
+    assert table["option_2"] == ["Oíche mhaith", ""]
+    # Bucket upper edges are inclusive; the last bucket holds the rest
+    assert [table[name][0] for name in TIME_COLUMNS] == [1, 1, 0, 1, 0, 0, 0, 0, 0, 1]
+    assert [table[name][1] for name in TIME_COLUMNS[:2]] == [1, 1]
+    # A choice outside the option columns counts as "other"
+    assert (table["picks_0"], table["picks_1"], table["picks_other"]) == ([1, 1], [2, 0], [1, 1])
+
+
+def test_arrays_grow_without_losing_counts():
+    stats = QuestionStats(rows=2)
+    stats.add([(f"q{i}", ("a", "b"), 0, 0, True, 1.0) for i in range(5)])
+    stats.add([("q0", ("a", "b"), 0, 1, False, 1.0)])
+    table = stats.columns()
+    assert len(stats) == 5
+    assert table["answers"] == [2, 1, 1, 1, 1]
+    assert table["correct"] == [1, 1, 1, 1, 1]
+
+
+def test_edited_questions_take_their_latest_options():
+    stats = QuestionStats()
+    stats.add([("ga-night", NIGHT, 0, 0, True, 1.0)])
+    stats.add([("ga-night", ("Maidin mhaith", "Oíche mhaith"), 1, 1, True, 1.0)])
+    table = stats.columns()
+    assert (table["option_0"], table["answer"], table["answers"]) == (["Maidin mhaith"], [1], [2])
+
+
+def test_summary_puts_the_hardest_first():
+    stats = QuestionStats()
+    stats.add(events())
+    rows = summary(stats.columns())
+    assert [row["question"] for row in rows] == ["ga-hello", "ga-night"]
+    hello = rows[0]
+    assert (hello["answers"], hello["accuracy"], hello["mean_seconds"]) == (4, 0.25, 26.5)
+    assert (hello["top_pick"], hello["other_picks"], hello["median_seconds"]) == ("Slán", 1, 2)
+    assert rows[1]["top_pick"] == ""
+    assert summary(stats.columns(), min_answers=3) == rows[:1]
+    stats.add([("ga-slow", NIGHT, 0, 0, True, 90.0)])
+    assert summary(stats.columns())[-1]["median_seconds"] == math.inf
+
+
+def test_confusion():
+    stats = QuestionStats()
+    stats.add(events())
+    assert confusion(stats.columns(), "ga-hello") == [
+        {"option": "Dia dhuit", "correct": True, "picks": 1},
+        {"option": "Slán", "correct": False, "picks": 2},
+        {"option": "Oíche mhaith", "correct": False, "picks": 0},
+        {"option": "(other)", "correct": False, "picks": 1},
+    ]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_counts_accumulate_across_restarts(tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    recorder = open_analytics(tmp_path, fmt)
+    for event in events():
+        recorder.record(*event)
+    assert recorder.flush(5)
+    recorder.close()
+    assert (tmp_path / f"questions.{fmt}").exists()
+
+    recorder = AnalyticsRecorder(tmp_path / f"questions.{fmt}")
+    try:
+        for event in events()[:2]:
+            recorder.record(*event)
+        # A negative time, e.g. from a clock change, counts as zero
+        recorder.record("ga-night", NIGHT, 0, 0, True, -5.0)
+        assert recorder.flush(5)
+        table = recorder.snapshot()
+    finally:
+        recorder.close()
+    assert table["answers"] == [6, 3]
+    assert table["seconds"] == [108.0, 3.0]
+    assert table["picks_other"] == [1, 1]
+    assert table["option_2"] == ["Oíche mhaith", ""]
+    assert table["picks_0"] == [2, 2]
+
+
+def test_disabled():
+    recorder = open_analytics("none")
+    assert isinstance(recorder, NullAnalytics)
+    recorder.record("ga-hello", HELLO, 0, 0, True, 1.0)
+    assert recorder.snapshot()["question"] == []
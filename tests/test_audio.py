@@ -0,0 +1,63 @@
+import pytest
+
+from celtic.audio import HEADER, AudioPack, PackError, build_pack
+
+CLIPS = {"ga-hello.mp3": b"ID3 dia duit" * 50, "cy-morning.ogg": b"OggS bore da" * 30}
+
+
+@pytest.fixture
+def pack_path(tmp_path):
+    clips = tmp_path / "clips"
+    clips.mkdir()
+    for name, data in CLIPS.items():
+        (clips / name).write_bytes(data)
+    (clips / "notes.txt").write_text("not a clip")
+    path = tmp_path / "audio.pack"
+    assert build_pack(clips, path) == ["cy-morning", "ga-hello"]
+    return path
+
+
+def test_build_and_read(pack_path):
+    pack = AudioPack(pack_path)
+    try:
+        assert len(pack) == 2
+        # Clips are views of the mapping, released before it is closed
+        data, mime = pack.clip("ga-hello")
+        with data:
+            assert bytes(data) == CLIPS["ga-hello.mp3"] and mime == "audio/mpeg"
+        data, mime = pack.clip("cy-morning")
+        with data:
+            assert bytes(data) == CLIPS["cy-morning.ogg"] and mime == "audio/ogg"
+        assert pack.verify() == []
+    finally:
+        pack.close()
+
+
+def test_build_only_known_keys(tmp_path, pack_path):
+    assert build_pack(tmp_path / "clips", tmp_path / "ga.pack", keys={"ga-hello"}) == ["ga-hello"]
+
+
+def test_verify_reports_changed_clip(pack_path):
+    data = bytearray(pack_path.read_bytes())
+    data[-1] ^= 0xFF
+    pack_path.write_bytes(bytes(data))
+    pack = AudioPack(pack_path)
+    try:
+        assert pack.verify() == ["ga-hello"]
+    finally:
+        pack.close()
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: b"",
+    lambda data: data[:HEADER.size - 2],
+    lambda data: b"NOTAPACK" + data[8:],
+    # Cut inside the index
+    lambda data: data[:HEADER.size + 5],
+    # Clip data missing from the end
+    lambda data: data[:-10],
+])
+def test_corrupt_pack(pack_path, damage):
+    pack_path.write_bytes(damage(pack_path.read_bytes()))
+    with pytest.raises(PackError):
+        AudioPack(pack_path)
@@ -0,0 +1,77 @@
+import json
+import logging
+import os
+
+import pytest
+
+from celtic.content import ContentStore, load_fun_facts
+from celtic.packs import Catalog
+from celtic.question_bank import BankError
+
+
+@pytest.fixture
+def fun_facts_path(tmp_path):
+    path = tmp_path / "fun_facts.json"
+    path.write_text(json.dumps(["A fact"]), encoding="utf-8")
+    return path
+
+
+def touch(path, step=1):
+    """Move ``path``'s mtime on, as a later edit would."""
+    mtime = path.stat().st_mtime_ns + step * 1_000_000_000
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_unchanged_files_keep_the_same_content(bank_path, fun_facts_path):
+    store = ContentStore(bank_path, fun_facts_path, check_interval=0)
+    content = store.get()
+    assert (content.total_questions, content.fun_facts, content.languages) == (7, ("A fact",), ())
+    assert store.get() is content
+
+
+def test_edits_are_picked_up(bank_path, fun_facts_path, write_bank, questions):
+    store = ContentStore(bank_path, fun_facts_path, check_interval=0)
+    write_bank(bank_path.name, questions=[*questions, dict(questions[0], id="ga-hello-again")])
+    touch(bank_path)
+    assert store.get().total_questions == 8
+    fun_facts_path.write_text(json.dumps(["A fact", "Another"]), encoding="utf-8")
+    touch(fun_facts_path)
+    assert store.get().fun_facts == ("A fact", "Another")
+
+
+def test_edits_wait_for_the_check_interval(bank_path, fun_facts_path, write_bank, questions):
+    store = ContentStore(bank_path, fun_facts_path, check_interval=3600)
+    write_bank(bank_path.name, questions=questions[:3])
+    touch(bank_path)
+    assert store.get().total_questions == 7
+
+
+def test_a_broken_edit_keeps_the_current_content(bank_path, fun_facts_path, write_bank, questions, caplog):
+    store = ContentStore(bank_path, fun_facts_path, check_interval=0)
+    content = store.get()
+    bank_path.write_text(bank_path.read_text(encoding="utf-8") + "{not json\n", encoding="utf-8")
+    touch(bank_path)
+    with caplog.at_level(logging.WARNING, logger="celtic.content"):
+        assert store.get() is content
+        # The broken version is not compiled again on every check
+        assert store.get() is content
+    assert caplog.text.count("Content reload failed") == 1
+
+    write_bank(bank_path.name, questions=questions[:3])
+    touch(bank_path, step=2)
+    assert store.get().total_questions == 3
+
+
+def test_manifest_content(manifest_path, fun_facts_path):
+    content = ContentStore(manifest_path, fun_facts_path).get()
+    assert isinstance(content.bank, Catalog)
+    assert content.total_questions == 7
+    assert [name for name, _ in content.languages] == ["Beginner Irish", "Beginner Welsh"]
+
+
+def test_fun_facts_must_be_strings(tmp_path):
+    path = tmp_path / "fun_facts.json"
+    for facts in ([], ["A fact", " "], {"fact": "A fact"}):
+        path.write_text(json.dumps(facts), encoding="utf-8")
+        with pytest.raises(BankError):
+            load_fun_facts(path)
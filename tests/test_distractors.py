@@ -0,0 +1,75 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from celtic.distractors import DistractorEngine  # noqa: E402
+from celtic.question_bank import load_jsonl  # noqa: E402
+
+
+@pytest.fixture
+def rare_bank(write_bank, questions):
+    # The only question of its kind, so its pool holds just its own two options
+    rare = {"id": "cy-yes", "level": 1, "pos": "answer", "question": "Which means 'yes'?",
+            "options": ["Ie", "Na"], "correct_answer": "Ie"}
+    return load_jsonl(write_bank(questions=[*questions, rare]))
+
+
+def pool_texts(bank, qid):
+    pool = bank.pool_of[qid]
+    return {text for other in range(len(bank)) if bank.pool_of[other] == pool for text in bank.options[other]}
+
+
+def test_decks_offer_the_answer_and_distinct_distractors_from_its_pool(bank):
+    engine = DistractorEngine(bank, seed=1)
+    for level in range(len(bank.levels)):
+        for _ in range(20):
+            deck = engine.level_deck(level)
+            for qid in bank.level_questions(level):
+                options = deck.options(qid)
+                assert options[deck.correct_index(qid)] == bank.correct_answer(qid)
+                assert len(set(options)) == len(options) == min(4, len(pool_texts(bank, qid)))
+                assert set(options) <= pool_texts(bank, qid)
+
+
+def test_small_pools_are_padded(rare_bank):
+    engine = DistractorEngine(rare_bank, seed=1)
+    qid = rare_bank.qid("cy-yes")
+    options, correct = engine.deal([qid], sessions=50, seed=2)
+    assert (options[:, 0, 2:] == -1).all()
+    assert {engine.deck([qid], seed).options(qid) for seed in range(20)} == {("Ie", "Na"), ("Na", "Ie")}
+
+
+def test_batches_hand_each_session_its_own_row(bank):
+    engine = DistractorEngine(bank, seed=1, batch=3)
+    sources = [engine.level_deck(0).source for _ in range(7)]
+    # Three batches: rows 0-2, 0-2 and 0, each batch from a new child seed
+    assert [row for *_, row in sources] == [0, 1, 2, 0, 1, 2, 0]
+    assert len({spawn_key for _, spawn_key, _, _ in sources}) == 3
+
+
+def test_replay_deals_the_same_deck(bank):
+    engine = DistractorEngine(bank, batch=4)
+    decks = [engine.level_deck(1) for _ in range(6)]
+    other = DistractorEngine(bank)
+    for deck in decks:
+        again = other.replay(1, deck.source)
+        for qid in bank.level_questions(1):
+            assert again.options(qid) == deck.options(qid)
+            assert again.correct_index(qid) == deck.correct_index(qid)
+
+
+def test_seeded_engines_deal_alike(bank):
+    first = [DistractorEngine(bank, seed=5).level_deck(0) for _ in range(2)]
+    assert first[0].options(0) == first[1].options(0)
+    assert first[0].source == first[1].source
+
+
+def test_load_deck_round_trip(bank):
+    engine = DistractorEngine(bank, seed=3)
+    deck = engine.level_deck(1)
+    qids = bank.level_questions(1)
+    loaded = engine.load_deck(qids, *deck.dump())
+    assert [loaded.options(qid) for qid in qids] == [deck.options(qid) for qid in qids]
+    options, correct = deck.dump()
+    with pytest.raises(ValueError):
+        engine.load_deck(qids[:-1], options, correct)
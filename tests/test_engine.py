@@ -0,0 +1,120 @@
+import pytest
+
+from celtic.engine import (
+    GAME_COMPLETE, LEVEL_COMPLETE, MAX_POINTS, PLAYING, SCORE_BANDS, START, TIMED_OUT, GameSession,
+    InvalidTransition, score_band, speed_points,
+)
+
+
+def answer(game, right, now=None):
+    index = game.correct_index()
+    return game.check_answer(index if right else (index + 1) % len(game.options()), now)
+
+
+@pytest.mark.parametrize("correct, seconds, points", [
+    (True, 0.0, MAX_POINTS),
+    (True, 5.0, 88),
+    (True, 10.0, 75),
+    (True, 20.0, 50),
+    (True, 20.5, 0),
+    (False, 1.0, 0),
+    (True, -3.0, MAX_POINTS),
+])
+def test_speed_points(correct, seconds, points):
+    assert speed_points(correct, seconds, 20) == points
+
+
+@pytest.mark.parametrize("score, total, band", [
+    (10, 10, 0),
+    (9, 10, 1),
+    (8, 10, 1),
+    (79, 100, 2),
+    (6, 10, 2),
+    (5, 10, 3),
+    (0, 10, 3),
+    (0, 0, 3),
+])
+def test_score_band(score, total, band):
+    assert score_band(score, total) == SCORE_BANDS[band][1]
+
+
+def test_a_game_through_every_level(bank):
+    game = GameSession(bank)
+    assert game.state == START
+    game.start()
+    results = []
+    states = []
+    while game.state != GAME_COMPLETE:
+        if game.state == LEVEL_COMPLETE:
+            assert game.level_score == 2
+            game.next_level()
+            assert game.level_score == 0
+        results.append(answer(game, right=len(results) % 3 != 2))
+        states.append(game.next_question())
+    # Three Irish questions, then four Welsh ones
+    assert states == [PLAYING, PLAYING, LEVEL_COMPLETE, PLAYING, PLAYING, PLAYING, GAME_COMPLETE]
+    assert game.score == results.count(True) == 5
+    assert game.level_score == 3
+    assert [correct for _, correct, _ in game.history] == results
+
+
+def test_transitions_are_checked(bank):
+    game = GameSession(bank)
+    with pytest.raises(InvalidTransition):
+        game.check_answer(0)
+    game.start()
+    with pytest.raises(InvalidTransition):
+        game.next_level()
+    answer(game, right=True)
+    with pytest.raises(InvalidTransition):
+        answer(game, right=False)
+    assert game.score == 1
+
+
+def test_restart_clears_the_score(bank):
+    game = GameSession(bank)
+    game.start(time_limit=10)
+    game.present(0.0)
+    answer(game, right=True, now=1.0)
+    game.next_question()
+    game.restart()
+    assert (game.state, game.level, game.question, game.score, game.points) == (PLAYING, 0, 0, 0, 0)
+    assert game.time_limit == 10
+    game.restart(time_limit=0)
+    assert game.time_limit is None
+
+
+def test_timed_answers_earn_speed_points(bank):
+    game = GameSession(bank)
+    game.start(time_limit=20)
+    game.present(100.0)
+    # Later reruns keep the time the question was first shown
+    game.present(104.0)
+    assert game.time_left(105.0) == 15.0
+    answer(game, right=True, now=110.0)
+    game.next_question()
+    game.present(200.0)
+    answer(game, right=False, now=201.0)
+    assert (game.score, game.points) == (1, 75)
+
+
+def test_time_up_marks_the_question_missed(bank):
+    game = GameSession(bank)
+    game.start(time_limit=20)
+    game.present(0.0)
+    assert not game.time_up(19.5)
+    assert game.time_up(20.0)
+    assert (game.selected, game.is_correct, game.score, game.points) == (TIMED_OUT, False, 0, 0)
+    assert game.history[-1][1] is False
+    # Already answered
+    assert not game.time_up(30.0)
+
+
+def test_untimed_games_never_time_out(bank):
+    game = GameSession(bank)
+    game.start()
+    game.present(0.0)
+    assert game.time_left(1000.0) is None
+    assert not game.time_up(1000.0)
+    answer(game, right=True, now=1.0)
+    assert game.points == 0
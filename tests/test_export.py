@@ -0,0 +1,53 @@
+import json
+import re
+
+import pytest
+
+from celtic import export
+from celtic.question_bank import BankError
+
+
+def test_select_levels(bank):
+    assert export.select_levels(bank, ()) == [0, 1]
+    assert export.select_levels(bank, ["2"]) == [1]
+    assert export.select_levels(bank, ["cy", "1"]) == [0, 1]
+    for wanted in (["3"], ["0"], ["br"]):
+        with pytest.raises(BankError):
+            export.select_levels(bank, wanted)
+
+
+def test_payload_stores_each_string_once(bank):
+    data = export.payload(bank, [0, 1], ("Fact one", "Slán"))
+    strings = data["s"]
+    assert len(strings) == len(set(strings))
+    for (name, flag, description, questions), level in zip(data["l"], bank.levels):
+        assert (strings[name], strings[flag], strings[description]) == (level.name, level.flag, level.description)
+        exported = [(strings[q], [strings[o] for o in opts], correct, strings[e]) for q, opts, correct, e in questions]
+        assert exported == [
+            (bank.question(qid), list(bank.options[qid]), bank.correct_index(qid), bank.explanation(qid))
+            for qid in bank.level_questions(level.index)
+        ]
+    assert [strings[fact] for fact in data["f"]] == ["Fact one", "Slán"]
+
+
+def test_page_keeps_text_inside_its_script(bank):
+    bank.texts[0] = "Is </script><script>alert(1)</script> a tag?"
+    page = export.build_page(bank, [0], ())
+    data = re.search(r'<script type="application/json" id="quiz-data">(.*?)</script>', page, re.S).group(1)
+    assert json.loads(data)["s"][0] == bank.texts[0]
+
+
+def test_play_again_restarts_the_game():
+    # Like the app, both restart buttons go straight back into play
+    assert 'button("Play Again",restart,box)' in export.SCRIPT
+    assert 'button("Restart Game",restart,box)' in export.SCRIPT
+
+
+def test_main_writes_the_page(tmp_path, manifest_path):
+    fun_facts = tmp_path / "fun_facts.json"
+    fun_facts.write_text(json.dumps(["A fact"]), encoding="utf-8")
+    out = tmp_path / "quiz.html"
+    args = [str(out), "--levels", "cy", "--questions", str(manifest_path), "--fun-facts", str(fun_facts)]
+    assert export.main(args) == 0
+    page = out.read_text(encoding="utf-8")
+    assert "Beginner Welsh" in page and "Beginner Irish" not in page
@@ -0,0 +1,75 @@
+import random
+
+from celtic.fuzzy import AnswerIndex, edit_distance, fold, tolerance
+
+LETTERS = "abcdeé "
+
+
+def levenshtein(a, b):
+    """Reference: the full dynamic programming table."""
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def typo(rng, text, edits):
+    for _ in range(edits):
+        i = rng.randrange(len(text) + 1)
+        kind = rng.randrange(3)
+        if kind == 0 or not text:
+            text = text[:i] + rng.choice(LETTERS) + text[i:]
+        elif kind == 1:
+            text = text[:i - 1] + text[i:] if i else text[1:]
+        else:
+            i = min(i, len(text) - 1)
+            text = text[:i] + rng.choice(LETTERS) + text[i + 1:]
+    return text
+
+
+def test_fold():
+    assert fold("  Sláinte! ") == "slainte"
+    assert fold("Homesickness/longing") == "homesickness longing"
+    assert fold("?!") == ""
+
+
+def test_edit_distance_matches_reference():
+    rng = random.Random(0)
+    for _ in range(3000):
+        a = "".join(rng.choice("abc") for _ in range(rng.randrange(10)))
+        b = "".join(rng.choice("abc") for _ in range(rng.randrange(10)))
+        limit = rng.randrange(5)
+        assert edit_distance(a, b, limit) == min(levenshtein(a, b), limit + 1), (a, b, limit)
+
+
+def test_match_examples(bank):
+    index = AnswerIndex(bank)
+    assert index.match("slainte", bank.qid("ga-hello")).accepted is False
+    assert index.match("dia dhuit", bank.qid("ga-hello")).accepted
+    assert index.match("DIA DUIT!", bank.qid("ga-hello")).distance == 0
+    assert index.match("goodby", bank.qid("ga-slan")).accepted
+    assert not index.match("goodbyexxx", bank.qid("ga-slan")).accepted
+    # A right answer to another question is still wrong here
+    assert not index.match("Wales", bank.qid("ga-slan")).accepted
+
+
+def test_match_against_reference(bank):
+    index = AnswerIndex(bank)
+    rng = random.Random(1)
+    answers = {qid: [fold(a) for a in (bank.correct_answer(qid), *bank.accepted[qid])] for qid in range(len(bank))}
+    for _ in range(2000):
+        qid = rng.randrange(len(bank))
+        source = rng.choice(answers[rng.choice(list(answers))])
+        text = typo(rng, source, rng.randrange(5))
+        query = fold(text)
+        close = [
+            levenshtein(query, answer) for answer in answers[qid]
+            if query and levenshtein(query, answer) <= min(tolerance(len(query)), tolerance(len(answer)))
+        ]
+        match = index.match(text, qid)
+        assert match.accepted == bool(close), (text, bank.keys[qid])
+        if close:
+            assert match.distance == min(close)
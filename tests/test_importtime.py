@@ -0,0 +1,17 @@
+import sys
+
+from celtic.importtime import startup_modules
+
+
+def test_from_imports_of_submodules(tmp_path):
+    package = tmp_path / "pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "tools.py").write_text("VALUE = 1\n")
+    app = tmp_path / "app.py"
+    app.write_text("import os\nfrom pkg import tools\nfrom pkg.tools import VALUE\nfrom os import path\n")
+    before = list(sys.path)
+    assert startup_modules(app) == ["os", "pkg", "pkg.tools"]
+    # Nothing is imported or added to the search path along the way
+    assert sys.path == before
+    assert "pkg" not in sys.modules
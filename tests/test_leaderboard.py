@@ -0,0 +1,39 @@
+import pytest
+
+from celtic import render
+from celtic.leaderboard import GAME, Leaderboard, level_board
+
+
+@pytest.fixture
+def board():
+    leaderboard = Leaderboard()
+    for i, score in enumerate([5, 9, 7, 9, 2]):
+        leaderboard.submit(GAME, f"p{i}", f"Player {i}", score, 10, finished_at=100.0 + i)
+    return leaderboard
+
+
+def test_top_is_best_first_and_earliest_on_ties(board):
+    assert [result.name for result in board.top(GAME, 3)] == ["Player 1", "Player 3", "Player 2"]
+    assert board.top(level_board(0)) == []
+
+
+@pytest.mark.parametrize("percentage, rank, percentile", [
+    (100, 1, 100.0),
+    (90, 1, 60.0),
+    (70, 3, 40.0),
+    (60, 4, 40.0),
+    (10, 6, 0.0),
+])
+def test_standing(board, percentage, rank, percentile):
+    assert board.standing(GAME, percentage) == (rank, percentile, 5)
+
+
+def test_standing_on_an_empty_board(board):
+    assert board.standing(level_board(3), 50) == (1, 100.0, 0)
+
+
+def test_rows_keep_names_as_plain_data(board):
+    board.submit(GAME, "px", "![](http://host/p.png) [win](http://x)", 10, 10, finished_at=200.0)
+    rows = render.leaderboard_rows(board.top(GAME, 2))
+    assert rows[0] == {"Rank": 1, "Player": "![](http://host/p.png) [win](http://x)", "Score": "10/10 (100%)"}
+    assert rows[1]["Rank"] == 2
@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+
+import pytest
+
+from celtic.packs import PackCache, check, load_catalog
+from celtic.question_bank import BankError
+
+
+def pack_path(manifest_path, code):
+    return manifest_path.parent / "packs" / f"{code}.jsonl"
+
+
+def edit_pack(manifest_path, code, edit):
+    """Rewrite a pack's records through ``edit`` and move its mtime on."""
+    path = pack_path(manifest_path, code)
+    records = edit([json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()])
+    path.write_text("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records), encoding="utf-8")
+    mtime = path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def catalog(manifest_path):
+    catalog = load_catalog(manifest_path, cache=PackCache())
+    catalog.check_interval = 0
+    return catalog
+
+
+def test_packs_load_when_their_level_is_played(catalog):
+    assert (len(catalog), catalog.sizes, catalog.languages) == (7, (3, 4), ("ga", "cy"))
+    assert catalog.questions_through(1) == 7
+    assert len(catalog.cache) == 0
+    bank = catalog.bank_for(1)
+    assert len(catalog.cache) == 1
+    assert [bank.keys[qid] for qid in bank.level_questions(1)] == ["cy-morning", "cy-cymru", "cy-hiraeth", "cy-thanks"]
+    assert catalog.bank_for(1) is bank
+
+
+def test_cache_evicts_the_least_recently_used():
+    cache = PackCache(capacity=5)
+    loads = []
+
+    def loader(key, size):
+        def load():
+            loads.append(key)
+            return [key] * size
+        return load
+
+    cache.get("ga", loader("ga", 2))
+    cache.get("cy", loader("cy", 2))
+    cache.get("ga", loader("ga", 2))
+    cache.get("br", loader("br", 2))
+    assert loads == ["ga", "cy", "br"]
+    assert (cache.peek("cy"), cache.size) == (None, 4)
+    # A pack larger than the whole cache is still kept while it is the only one
+    cache.get("kw", loader("kw", 9))
+    assert (len(cache), cache.size) == (1, 9)
+    cache.clear()
+    assert (len(cache), cache.size) == (0, 0)
+
+
+def test_edited_pack_is_reloaded(catalog, manifest_path):
+    bank = catalog.bank_for(1)
+
+    def reword(records):
+        records[0]["question"] = "How do you greet someone in the morning in Welsh?"
+        return records
+
+    edit_pack(manifest_path, "cy", reword)
+    reloaded = catalog.bank_for(1)
+    assert reloaded is not bank
+    assert reloaded.question(reloaded.qid("cy-morning")) == "How do you greet someone in the morning in Welsh?"
+    # The other pack is untouched
+    assert catalog.bank_for(0) is catalog.bank_for(0)
+
+
+def test_broken_edit_keeps_the_last_good_pack(catalog, manifest_path, caplog):
+    bank = catalog.bank_for(1)
+    edit_pack(manifest_path, "cy", lambda records: records[:-1])
+    with caplog.at_level(logging.WARNING, logger="celtic.packs"):
+        assert catalog.bank_for(1) is bank
+    assert "Pack reload failed" in caplog.text
+    # With no good copy to fall back on the error comes through
+    fresh = load_catalog(manifest_path, cache=PackCache())
+    with pytest.raises(BankError, match="has 3 questions"):
+        fresh.bank_for(1)
+
+
+def test_pack_levels_must_exist(catalog, manifest_path):
+    edit_pack(manifest_path, "ga", lambda records: [dict(records[0], level=1), *records[1:]])
+    with pytest.raises(BankError, match="unknown Beginner Irish level 1"):
+        catalog.bank_for(0)
+
+
+@pytest.mark.parametrize("manifest, message", [
+    ({"languages": []}, "lists no languages"),
+    ({"languages": [{"code": "ga"}]}, "languages\\[0\\]"),
+])
+def test_bad_manifest(tmp_path, manifest, message):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    with pytest.raises(BankError, match=message):
+        load_catalog(path)
+
+
+def test_check_updates_the_counts(manifest_path, capsys):
+    assert check(manifest_path) == 0
+    edit_pack(manifest_path, "ga", lambda records: records[:2])
+    assert check(manifest_path) == 1
+    assert "out of date" in capsys.readouterr().err
+    assert check(manifest_path, update=True) == 0
+    assert load_catalog(manifest_path).sizes == (2, 4)
+    assert check(manifest_path) == 0
@@ -0,0 +1,114 @@
+import sqlite3
+
+import pytest
+
+from celtic.engine import ADAPTIVE, LEVEL_COMPLETE, LINEAR, PLAYING, TYPED, GameSession
+from celtic.leaderboard import GAME, Result
+from celtic.progress import NullProgressStore, SQLiteProgressStore, open_progress_store
+
+# The positions table as first released
+OLD_POSITIONS = """
+CREATE TABLE positions (
+    player TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    question INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    selected INTEGER,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "progress.db"
+
+
+@pytest.fixture
+def store(db_path):
+    store = SQLiteProgressStore(db_path)
+    yield store
+    store.close()
+
+
+def test_answers_come_back_oldest_first(store):
+    store.record_answer("p1", "ga-hello", "Dia dhuit", True)
+    store.record_answer("p2", "ga-hello", "Slán", False)
+    store.record_answer("p1", "ga-slan", "Slán", False)
+    assert store.flush(5)
+    history = store.answer_history("p1")
+    assert [(key, correct) for key, correct, _ in history] == [("ga-hello", 1), ("ga-slan", 0)]
+    assert history[0][2] <= history[1][2]
+    assert store.answer_history("p3") == []
+
+
+def test_latest_position_wins(bank, store):
+    game = GameSession(bank)
+    game.start(order=ADAPTIVE, answer_mode=TYPED, time_limit=15)
+    while game.state != LEVEL_COMPLETE:
+        game.present(0.0)
+        game.check_answer(game.correct_index(), now=3.0)
+        store.save_position("p1", game.position())
+        game.next_question()
+    game.next_level()
+    game.check_answer(game.correct_index())
+    store.save_position("p1", game.position())
+    assert store.flush(5)
+
+    position = store.load_position("p1")
+    assert (position.state, position.level, position.question, position.score) == (PLAYING, 1, 0, 4)
+    assert (position.level_base, position.order, position.answer_mode) == (3, ADAPTIVE, TYPED)
+    assert (position.time_limit, position.points) == (15, 270)
+    assert store.load_position("p2") is None
+
+    resumed = GameSession(bank)
+    assert resumed.resume(position)
+    assert (resumed.level_base, resumed.level_score, resumed.order) == (3, 1, ADAPTIVE)
+    assert (resumed.time_limit, resumed.points, resumed.answer_mode) == (15, 270, TYPED)
+
+
+def test_results(store):
+    result = Result("p1", "Player 1", 6, 7, 1234.5)
+    store.record_result(GAME, result)
+    assert store.flush(5)
+    [(board, stored)] = store.results()
+    assert board == GAME
+    assert [getattr(stored, name) for name in Result.__slots__] == ["p1", "Player 1", 6, 7, 1234.5]
+
+
+def test_old_positions_table_is_upgraded(bank, db_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executescript(OLD_POSITIONS)
+        conn.execute("INSERT INTO positions VALUES ('p1', ?, 1, 2, 4, NULL, 0)", (PLAYING,))
+    conn.close()
+
+    store = SQLiteProgressStore(db_path)
+    try:
+        position = store.load_position("p1")
+        assert (position.state, position.level, position.question, position.score) == (PLAYING, 1, 2, 4)
+        assert (position.level_base, position.order, position.answer_mode, position.time_limit) == (None,) * 4
+        # Older positions resume with the session's own settings
+        game = GameSession(bank, order=LINEAR)
+        assert game.resume(position)
+        assert (game.score, game.order, game.time_limit, game.points) == (4, LINEAR, None, 0)
+
+        store.save_position("p1", game.position())
+        assert store.flush(5)
+        assert store.load_position("p1").level_base == 4
+    finally:
+        store.close()
+    # Opening an upgraded database again leaves it as it is
+    SQLiteProgressStore(db_path).close()
+
+
+def test_null_store_keeps_nothing(bank):
+    store = open_progress_store("none")
+    assert isinstance(store, NullProgressStore)
+    game = GameSession(bank)
+    game.start()
+    store.record_answer("p1", "ga-hello", "Slán", False)
+    store.save_position("p1", game.position())
+    store.record_result(GAME, Result("p1", "Player 1", 1, 7, 0.0))
+    assert (store.load_position("p1"), store.answer_history("p1"), store.results()) == (None, [], [])
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from celtic.scheduler import (
+    DAY, GRADE_CORRECT, GRADE_INCORRECT, MIN_EASINESS, RELEARN_DELAY, Card, ReviewScheduler, sm2,
+)
+
+
+def test_intervals_grow_with_each_correct_review():
+    card = Card(0)
+    intervals = [sm2(card, GRADE_CORRECT, 0.0).interval for _ in range(4)]
+    # Grade 4 leaves the easiness at 2.5
+    assert intervals == [1.0, 6.0, 15.0, 38.0]
+    assert card.repetitions == 4
+    assert card.due == 38.0 * DAY
+
+
+def test_a_miss_starts_the_card_over():
+    card = Card(0)
+    sm2(card, GRADE_CORRECT, 0.0)
+    sm2(card, GRADE_CORRECT, 0.0)
+    sm2(card, GRADE_INCORRECT, 500.0)
+    assert (card.repetitions, card.interval, card.due) == (0, 0.0, 500.0 + RELEARN_DELAY)
+    assert sm2(card, GRADE_CORRECT, 1000.0).interval == 1.0
+
+
+@pytest.mark.parametrize("grade, easiness", [(5, 2.6), (4, 2.5), (3, 2.36), (1, 1.96), (0, 1.7)])
+def test_easiness_follows_the_grade(grade, easiness):
+    assert sm2(Card(0), grade, 0.0).easiness == pytest.approx(easiness)
+
+
+def test_easiness_has_a_floor():
+    card = Card(0)
+    for _ in range(10):
+        sm2(card, 0, 0.0)
+    assert card.easiness == MIN_EASINESS
+
+
+def test_new_cards_keep_their_order():
+    scheduler = ReviewScheduler([7, 3, 5])
+    assert (len(scheduler), 3 in scheduler, 4 in scheduler) == (3, True, False)
+    order = []
+    for _ in range(3):
+        qid = scheduler.next_due()
+        order.append(qid)
+        scheduler.review(qid, GRADE_CORRECT, 0.0)
+    assert order == [7, 3, 5]
+
+
+def test_missed_cards_come_back_before_learned_ones():
+    scheduler = ReviewScheduler([0, 1, 2])
+    scheduler.review(0, GRADE_CORRECT, 0.0)
+    scheduler.review(1, GRADE_INCORRECT, 0.0)
+    scheduler.review(2, GRADE_CORRECT, 0.0)
+    assert scheduler.next_due() == 1
+
+
+def test_next_due_avoids_the_excluded_card():
+    scheduler = ReviewScheduler([0, 1])
+    assert scheduler.next_due(exclude=0) == 1
+    # The excluded card is still there afterwards
+    assert scheduler.next_due() == 0
+    assert ReviewScheduler([4]).next_due(exclude=4) == 4
+    assert ReviewScheduler([]).next_due() is None
+
+
+def test_seed_replays_answers_from_this_pool_only():
+    scheduler = ReviewScheduler([0, 1])
+    scheduler.seed([(0, True, 10.0), (9, False, 20.0), (0, True, 30.0)])
+    assert scheduler.card(0).repetitions == 2
+    assert scheduler.card(0).due == 30.0 + 6 * DAY
+    assert scheduler.next_due() == 1
+
+
+def test_heap_stays_small_and_correct():
+    rng = random.Random(1)
+    scheduler = ReviewScheduler(range(10))
+    for step in range(2000):
+        scheduler.review(rng.randrange(10), rng.choice([0, 3, 4, 5]), float(step))
+        soonest = min(range(10), key=lambda qid: (scheduler.card(qid).due, scheduler._live[qid]))
+        assert scheduler.next_due() == soonest
+    assert len(scheduler._heap) <= 2 * len(scheduler) + 65
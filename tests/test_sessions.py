@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from celtic.engine import ADAPTIVE, LEVEL_COMPLETE, PLAYING, GameSession
+from celtic.packs import PackCache, load_catalog
+from celtic.question_bank import load_jsonl
+from celtic.sessions import SessionFormatError, dumps, loads
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+def finish_level(game):
+    while game.state != LEVEL_COMPLETE:
+        game.check_answer(game.correct_index())
+        game.next_question()
+
+
+def play_into_level_1(bank, **kwargs):
+    """A game answered through level 0 and the first question of level 1."""
+    game = GameSession(bank, rng=random.Random(3), clock=Clock(), **kwargs)
+    game.start(order=ADAPTIVE)
+    finish_level(game)
+    game.next_level()
+    game.check_answer(game.correct_index())
+    return game
+
+
+@pytest.fixture
+def changed_bank(write_bank):
+    def compile(**kwargs):
+        return load_jsonl(write_bank("changed.jsonl", **kwargs))
+
+    return compile
+
+
+def test_round_trip(bank):
+    game = play_into_level_1(bank)
+    loaded = loads(dumps(game), bank, history=game.history[:3])
+    for name in ("state", "level", "question", "score", "level_base", "selected", "is_correct", "order"):
+        assert getattr(loaded, name) == getattr(game, name), name
+    assert loaded.qid == game.qid
+    assert loaded.history == game.history
+
+
+def test_only_the_current_level_is_carried(bank):
+    game = play_into_level_1(bank)
+    # Without the stored answers only this level's one answer comes back
+    assert loads(dumps(game), bank).history == game.history[-1:]
+
+
+def test_stored_copies_of_carried_answers_are_dropped(bank):
+    game = play_into_level_1(bank)
+    # The progress store stamps each answer just after the engine does
+    stored = [(key, correct, answered_at + 0.01) for key, correct, answered_at in game.history]
+    history = loads(dumps(game), bank, history=stored).history
+    assert [key for key, *_ in history] == [key for key, *_ in game.history]
+
+
+def test_unchanged_content_keeps_playing(bank, changed_bank):
+    game = play_into_level_1(bank)
+    # A reload of the same content compiles a new bank object
+    loaded = loads(dumps(game), changed_bank())
+    assert loaded.state == PLAYING
+    assert loaded.bank.keys[loaded.qid] == game.bank.keys[game.qid]
+
+
+def test_level_removed(bank, changed_bank, levels, questions):
+    game = play_into_level_1(bank)
+    changed = changed_bank(levels=levels[:1], questions=[q for q in questions if q["level"] == 0])
+    with pytest.raises(SessionFormatError):
+        loads(dumps(game), changed)
+
+
+def test_level_complete_with_no_next_level(bank, changed_bank, levels, questions):
+    game = GameSession(bank)
+    game.start()
+    finish_level(game)
+    changed = changed_bank(levels=levels[:1], questions=[q for q in questions if q["level"] == 0])
+    with pytest.raises(SessionFormatError):
+        loads(dumps(game), changed)
+
+
+def test_current_question_removed(bank, changed_bank, questions):
+    game = play_into_level_1(bank)
+    current = game.bank.keys[game.qid]
+    with pytest.raises(SessionFormatError):
+        loads(dumps(game), changed_bank(questions=[q for q in questions if q["id"] != current]))
+
+
+def test_pack_file_deleted(manifest_path):
+    game = play_into_level_1(load_catalog(manifest_path, cache=PackCache()))
+    (manifest_path.parent / "packs" / "cy.jsonl").unlink()
+    # A new catalog has no cached copy of the pack to fall back on
+    with pytest.raises(SessionFormatError):
+        loads(dumps(game), load_catalog(manifest_path, cache=PackCache()))
+
+
+def test_dealt_options_no_longer_fit(bank, changed_bank, questions):
+    pytest.importorskip("numpy")
+    from celtic.distractors import DistractorEngine
+
+    game = play_into_level_1(bank, dealer=DistractorEngine)
+    assert game.deck is not None
+    changed = changed_bank(questions=[*questions, dict(questions[-1], id="cy-thanks-again")])
+    with pytest.raises(SessionFormatError):
+        loads(dumps(game), changed, dealer=DistractorEngine)
+
+
+def test_damaged_session(bank):
+    data = dumps(play_into_level_1(bank))
+    with pytest.raises(SessionFormatError):
+        loads(data[:12], bank)
+    with pytest.raises(SessionFormatError):
+        loads(b"XX" + data[2:], bank)
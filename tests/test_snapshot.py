@@ -0,0 +1,66 @@
+import logging
+
+from celtic import validate
+from celtic.question_bank import QuestionBank, load_bank, load_jsonl, read_jsonl
+from celtic.snapshot import SnapshotBuilder, encode_chunk, fresh_snapshot, read_snapshot, snapshot_path
+
+
+def columns(bank):
+    """Every compiled column of ``bank`` as plain, comparable values."""
+    result = {}
+    for name in QuestionBank.__slots__:
+        if name == "_derived":
+            continue
+        value = getattr(bank, name)
+        if name == "levels":
+            value = [(lv.index, lv.name, lv.flag, lv.description, lv.language) for lv in value]
+        elif name in ("options", "accepted", "_by_level"):
+            value = [list(item) for item in value]
+        elif name in ("_by_language", "_by_tag"):
+            value = {key: list(item) for key, item in value.items()}
+        elif not isinstance(value, (list, tuple, dict)):
+            value = list(value)
+        result[name] = value
+    return result
+
+
+def test_validated_snapshot_matches_jsonl(bank_path):
+    assert validate.main([str(bank_path), "--snapshot", "--jobs", "1"]) == 0
+    snapshot = snapshot_path(bank_path)
+    assert fresh_snapshot(bank_path) == snapshot
+    assert columns(read_snapshot(snapshot)) == columns(load_jsonl(bank_path))
+
+
+def test_chunks_mixing_given_and_level_answer_languages(tmp_path, bank_path):
+    levels, questions = read_jsonl(bank_path)
+    records = [record for _, record in questions]
+    builder = SnapshotBuilder()
+    # Pairs put questions with and without an answer language, and from
+    # both levels, in the same chunk
+    for start in range(0, len(records), 2):
+        builder.add(encode_chunk(records[start:start + 2]))
+    bank = read_snapshot(builder.write(tmp_path / "chunked.bank", levels))
+
+    expected = load_jsonl(bank_path)
+    assert columns(bank) == columns(expected)
+    pool = {key: bank.pools[bank.pool_of[bank.qid(key)]] for key in ("ga-night", "cy-morning", "cy-thanks")}
+    assert pool == {"ga-night": ("ga", "phrase"), "cy-morning": ("cy", "phrase"), "cy-thanks": ("cy", "phrase")}
+
+
+def test_stale_snapshot_is_ignored(bank_path, write_bank, questions):
+    assert validate.main([str(bank_path), "--snapshot", "--jobs", "1"]) == 0
+    write_bank(bank_path.name, questions=[*questions, dict(questions[0], id="ga-hello-again")])
+    assert fresh_snapshot(bank_path) is None
+    assert "ga-hello-again" in load_bank(bank_path)
+
+
+def test_damaged_snapshot_falls_back_to_jsonl(bank_path, caplog):
+    assert validate.main([str(bank_path), "--snapshot", "--jobs", "1"]) == 0
+    snapshot = snapshot_path(bank_path)
+    snapshot.write_bytes(snapshot.read_bytes()[:-8])
+    # The source is unchanged, so the snapshot still looks fresh
+    assert fresh_snapshot(bank_path) == snapshot
+    with caplog.at_level(logging.WARNING, logger="celtic.question_bank"):
+        bank = load_bank(bank_path)
+    assert columns(bank) == columns(load_jsonl(bank_path))
+    assert "Ignoring snapshot" in caplog.text